@@ -8,6 +8,7 @@ import re
 import pykat.exceptions as pkex
 import numpy as np
 import pykat
+import pykat.external.six as six
 
 __suffix = {'y': 'e-24',  # yocto
             'z': 'e-21',  # zepto
@@ -28,7 +29,22 @@ __suffix = {'y': 'e-24',  # yocto
             
 __exceptions = ["$fs", "$mfs"]
 
+# Scalars that float() converts as they are
+__scalar_types = frozenset((float, int, bool, np.float64, np.float32, np.int64, np.int32) +
+                           tuple(six.integer_types))
+
 def SIfloat(value):
+    # plain numbers and strings, as most values are, don't need to go
+    # through numpy
+    if type(value) in __scalar_types:
+        return float(value)
+        
+    if isinstance(value, six.string_types):
+        if value.startswith('$') or value in __exceptions:
+            return value
+        
+        return convertToFloat(value)
+        
     if isinstance(value, pykat.commands.Constant):
         return '$' + value.name
         
@@ -46,7 +62,7 @@ def SIfloat(value):
     v = np.vectorize(convertToFloat)
     
     if value.size == 1:
-        return float(v(value))
+        return float(v(value).item())
         
     a = v(value)
     
@@ -18,6 +18,7 @@ USE_GUI = False
 HAS_OPTIVIS = False
 
 import six
+import sys
 
 ########################
 # Global helper functions
@@ -25,28 +26,32 @@ isContainer = lambda c: (not isinstance(c, six.string_types)) and hasattr(c, "__
 is_container = lambda c: (not isinstance(c, six.string_types)) and hasattr(c, "__iter__")
 ########################
 
-import imp
+import importlib
+import importlib.util
 
-try:    
-	imp.find_module('optivis')
-	HAS_OPTIVIS = True
-except ImportError:
-	HAS_OPTIVIS = False
+HAS_OPTIVIS = importlib.util.find_spec('optivis') is not None
 
 import pykat.exceptions as pkex
 
 NoGUIException = pkex.BasePyKatException("No PyQt4 module was found so cannot open a GUI")
-    
+
 import pykat.finesse as finesse
 import pykat.components as components
 import pykat.detectors as detectors
 import pykat.commands as commands
-import pykat.style as style
 
 from pykat.optics.gaussian_beams import BeamParam
 
-from pykat.plotting import init_pykat_plotting
-from pykat.style import use as set_plot_style
+# The modules above need each other so are always imported together, through
+# pykat.finesse. These are imported when first used, and their dependencies,
+# like scipy, matplotlib and pandas in other subpackages, are imported by the
+# functions that need them, so that scripts which only parse and run kat
+# objects do not pay for them.
+_lazy_modules = {"style":    "pykat.style",
+                 "plotting": "pykat.plotting"}
+
+_lazy_names = {"init_pykat_plotting": ("pykat.plotting", "init_pykat_plotting"),
+               "set_plot_style":      ("pykat.style", "use")}
 
 from .SIfloat import SIfloat
 
@@ -57,25 +62,53 @@ class nokat(object):
 	def __getattribute__(self, attr):
 		warn(msg)
 
-try:
-	kat = finesse.kat()
-	v = kat.finesse_version()
-except pkex.MissingFinesse:
-	from warnings import warn
-	warn(msg)
-	kat = nokat()
-	v = str(__min_req_finesse__)
-
-version_found    = [int(_) for _ in v.split('-')[0].split('.')]
+from warnings import warn
+
+def _find_finesse():
+    """
+    Makes the module level `kat` object and finds the version `v` of Finesse
+    the first time either is used, rather than running Finesse when pykat is
+    imported. Whether Finesse is new enough is checked when a kat object is
+    first run instead.
+    """
+    global kat, v, version_found, fulfilled
+    
+    try:
+        kat = finesse.kat()
+        v = kat.finesse_version()
+    except pkex.MissingFinesse:
+        warn(msg)
+        kat = nokat()
+        v = str(__min_req_finesse__)
+    
+    version_found = [int(_) for _ in v.split('-')[0].split('.')]
+    fulfilled = finesse._finesse_version_fulfilled(v)
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        return importlib.import_module(_lazy_modules[name])
+    elif name in _lazy_names:
+        module, attr = _lazy_names[name]
+        globals()[name] = getattr(importlib.import_module(module), attr)
+        return globals()[name]
+    elif name in ("kat", "v", "version_found", "fulfilled"):
+        _find_finesse()
+        return globals()[name]
+    
+    raise AttributeError("module 'pykat' has no attribute '{0}'".format(name))
+
 version_required = [int(_) for _ in __min_req_finesse__.split('-')[0].split('.')]
 
-fulfilled = all([_ == __ for _,__ in zip(version_found, version_required)]) or any([_ > __ for _,__ in zip(version_found, version_required)])
-            
-if not fulfilled:
-    raise pkex.BasePyKatException("Pykat %s requires Finesse version %s or higher. You have have %s" % (__version__ ,
-                                                                                              str(__min_req_finesse__),
-                                                                                              v))
+if sys.version_info < (3, 7): # no lazy module attributes
+    for _ in list(_lazy_modules) + list(_lazy_names):
+        __getattr__(_)
+    
+    _find_finesse()
+
 def info():
+    if "kat" not in globals():
+        _find_finesse()
+    
     print("Pykat version: " + __version__)
     print("Pykat loaded from: " + __file__)
     if kat != nokat():
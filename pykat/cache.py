@@ -0,0 +1,350 @@
+"""
+On-disk cache of Finesse outputs, keyed on the kat script that was run.
+
+Nothing is cached unless asked for. Either pass a RunCache to a run:
+
+    cache = pykat.cache.RunCache()
+    out = kat.run(cache=cache)
+
+or enable a default cache that every `kat.run` uses, including those made
+inside pykat.ifo functions such as pretune and scan_to_precision:
+
+    pykat.cache.enable()
+    ...
+    print(pykat.cache.get_default().stats())
+
+Setting the environment variable PYKAT_RUN_CACHE to a directory enables the
+default cache in that directory when pykat is first used.
+
+The key of each entry is a hash of the kat script run (excluding the time
+stamp comment pykat adds), the command line options given to Finesse, the
+path of the kat binary and its version. Runs that save their input or output
+files are never cached.
+
+The kat objects made by the make_kat functions in pykat.ifo, such as
+pykat.ifo.aligo.make_kat, can be cached in the same way with a ModelCache:
+
+    kat = aligo.make_kat(cache=pykat.cache.ModelCache())
+
+or by default with pykat.cache.enable_models() or the environment variable
+PYKAT_MODEL_CACHE. These entries are keyed on the contents of the kat file
+read, the arguments given and the pykat source files, so editing any of
+them makes a new entry.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import re
+import sys
+import glob
+import pickle
+import hashlib
+import tempfile
+
+_timestamp = re.compile(r"^% Generated by PyKat.*$\n?", re.M)
+
+_default = None
+_default_checked = False
+
+_default_models = None
+_default_models_checked = False
+
+# Changed whenever what is stored for a model changes
+MODEL_FORMAT = 1
+
+def root_directory():
+    """
+    Returns the directory pykat keeps its caches in, which is
+    $XDG_CACHE_HOME/pykat or ~/.cache/pykat.
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "pykat")
+
+def default_directory():
+    """
+    Returns the directory the cache uses when none is given, which is
+    $XDG_CACHE_HOME/pykat/runs or ~/.cache/pykat/runs.
+    """
+    return os.path.join(root_directory(), "runs")
+
+def model_directory():
+    """
+    Returns the directory the model cache uses when none is given, which is
+    $XDG_CACHE_HOME/pykat/models or ~/.cache/pykat/models.
+    """
+    return os.path.join(root_directory(), "models")
+
+class RunCache(object):
+    """
+    A least recently used cache of kat.run outputs stored as pickles in a
+    directory. When adding an entry pushes the cache over `max_size` bytes or
+    `max_entries` entries the least recently used ones are removed.
+
+    The attributes `hits` and `misses` count the lookups this object has made.
+    """
+
+    def __init__(self, directory=None, max_size=2**30, max_entries=None):
+        if directory is None:
+            directory = default_directory()
+
+        self.directory = directory
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __len__(self):
+        return len(self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def _entries(self):
+        entries = []
+
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError: # removed by another process
+                    continue
+
+                entries.append((st.st_mtime, st.st_size, name))
+
+        return entries
+
+    @staticmethod
+    def key(katScript, args, kat_exec, version):
+        """
+        Returns the key for running katScript with the command line options
+        args using the Finesse binary kat_exec of the given version.
+        """
+        h = hashlib.sha1()
+
+        for _ in (_timestamp.sub("", katScript), repr(args), os.path.realpath(kat_exec), version):
+            h.update(str(_).encode("utf-8"))
+            h.update(b"\0")
+
+        return h.hexdigest()
+
+    def get(self, key):
+        """
+        Returns the stored output for key, or None if there isn't one.
+        """
+        path = self._path(key)
+
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except Exception: # missing or unreadable entry
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path, None) # mark as recently used
+        except OSError:
+            pass
+
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        """
+        Stores value under key, evicting old entries if the cache is full.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp, self._path(key))
+        except:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is within its
+        size and entry limits.
+        """
+        entries = sorted(self._entries())
+        size = sum(_[1] for _ in entries)
+
+        while len(entries) > 0 and ((self.max_size is not None and size > self.max_size) or
+                                    (self.max_entries is not None and len(entries) > self.max_entries)):
+            mtime, nbytes, name = entries.pop(0)
+            size -= nbytes
+
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        Removes every entry from the cache and resets the counters.
+        """
+        for _, _, name in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Returns a dictionary of the hits, misses, number of entries and total
+        size in bytes of the cache.
+        """
+        entries = self._entries()
+
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "entries": len(entries),
+                "size": sum(_[1] for _ in entries)}
+
+def enable(directory=None, **kwargs):
+    """
+    Enables a default RunCache used by every kat.run and returns it. Keyword
+    arguments are passed to RunCache.
+    """
+    global _default, _default_checked
+
+    _default = RunCache(directory, **kwargs)
+    _default_checked = True
+
+    return _default
+
+def disable():
+    """
+    Stops kat.run using a default cache.
+    """
+    global _default, _default_checked
+
+    _default = None
+    _default_checked = True
+
+def get_default():
+    """
+    Returns the default RunCache, or None if there isn't one.
+    """
+    global _default_checked
+
+    if not _default_checked:
+        _default_checked = True
+
+        if os.environ.get("PYKAT_RUN_CACHE"):
+            enable(os.environ["PYKAT_RUN_CACHE"])
+
+    return _default
+
+def _source_files(module):
+    """
+    Returns the pykat source files a model made by a function in module
+    depends on: the core modules, pykat.ifo and the module itself.
+    """
+    pykat_dir = os.path.dirname(os.path.abspath(__file__))
+
+    files = sorted(glob.glob(os.path.join(pykat_dir, "*.py")))
+    files.append(os.path.join(pykat_dir, "ifo", "__init__.py"))
+
+    module = sys.modules.get(module)
+
+    if module is not None and getattr(module, "__file__", None):
+        files.append(module.__file__)
+
+    return files
+
+class ModelCache(RunCache):
+    """
+    A least recently used cache of the kat objects, along with their IFO
+    objects, made by the make_kat functions in pykat.ifo. Each entry is a
+    pickle of the kat object, which loads many times faster than parsing
+    the kat file and building the IFO again.
+    """
+
+    def __init__(self, directory=None, max_size=2**28, max_entries=None):
+        if directory is None:
+            directory = model_directory()
+
+        RunCache.__init__(self, directory, max_size=max_size, max_entries=max_entries)
+
+    @staticmethod
+    def key(make_kat, katfiles, arguments):
+        """
+        Returns the key for the kat object the function make_kat makes from
+        the kat files katfiles when given the dictionary of arguments. The
+        contents of the kat files are hashed so that changing one gives a
+        new key, as does changing a pykat source file.
+        """
+        h = hashlib.sha1()
+
+        for _ in (MODEL_FORMAT, sys.version_info[:2], make_kat.__module__, make_kat.__name__,
+                  sorted(arguments.items())):
+            h.update(str(_).encode("utf-8"))
+            h.update(b"\0")
+
+        for filename in katfiles:
+            with open(filename, "rb") as f:
+                h.update(f.read())
+
+            h.update(b"\0")
+
+        for filename in _source_files(make_kat.__module__):
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+
+            h.update(str((filename, st.st_mtime, st.st_size)).encode("utf-8"))
+
+        return h.hexdigest()
+
+def enable_models(directory=None, **kwargs):
+    """
+    Enables a default ModelCache used by the make_kat functions in pykat.ifo
+    and returns it. Keyword arguments are passed to ModelCache.
+    """
+    global _default_models, _default_models_checked
+
+    _default_models = ModelCache(directory, **kwargs)
+    _default_models_checked = True
+
+    return _default_models
+
+def disable_models():
+    """
+    Stops the make_kat functions using a default model cache.
+    """
+    global _default_models, _default_models_checked
+
+    _default_models = None
+    _default_models_checked = True
+
+def get_default_models():
+    """
+    Returns the default ModelCache, or None if there isn't one.
+    """
+    global _default_models_checked
+
+    if not _default_models_checked:
+        _default_models_checked = True
+
+        if os.environ.get("PYKAT_MODEL_CACHE"):
+            enable_models(os.environ["PYKAT_MODEL_CACHE"])
+
+    return _default_models
@@ -24,7 +24,7 @@ from numpy import min, max
 from pykat.param import Param, putter
 from collections import namedtuple
 from pykat.optics.gaussian_beams import BeamParam
-from pykat.freeze import canFreeze
+from pykat.freeze import canFreeze, deepcopy_dict
 
 @canFreeze
 class Command(object):
@@ -48,7 +48,7 @@ class Command(object):
         result = cls.__new__(cls)
         result._unfreeze()
         memo[id(self)] = result
-        result.__dict__ = copy.deepcopy(self.__dict__, memo)
+        result.__dict__ = deepcopy_dict(self.__dict__, memo)
         
         for _ in result._putters:
             _._updateOwner(result)
@@ -128,7 +128,9 @@ class Constant(Command):
     @property
     def value(self): return self.__value
     @value.setter
-    def value(self, Value): self.__value = SIfloat(Value)
+    def value(self, Value):
+        self.__value = SIfloat(Value)
+        Param.constant_changes += 1
     
     def __str__(self): return "$"+self.name
     
@@ -39,7 +39,7 @@ from pykat.param import Param, AttrParam
 import weakref
 import pykat.exceptions as pkex
 from copy import deepcopy
-from pykat.freeze import canFreeze
+from pykat.freeze import canFreeze, deepcopy_dict
 
 next_component_id = 1
 
@@ -113,25 +113,10 @@ class NodeGaussSetter(object):
         return self.__node().n
 
 
-id_____pykat_class = 0
-
 @canFreeze
 class Component(object):
     __metaclass__ = abc.ABCMeta
 
-    def __new__(cls, *args, **kwargs):
-        # This creates an instance specific class for the component
-        # this enables us to add properties to instances rather than
-        # all classes
-        global id_____pykat_class
-        id_____pykat_class += 1
-        cnew_name = str("%s.%s_%i" % (cls.__module__, cls.__name__, id_____pykat_class))
-
-        cnew = type(cnew_name, (cls,), {})
-
-        o = object.__new__(cnew)
-        return o
-
     def __init__(self, name=None):
         self._unfreeze()
 
@@ -145,23 +130,29 @@ class Component(object):
         self.__removed = False
         self._default_fsig_param = None
         self.optivisLabelContent = None
+        self.__node_setters = {}
 
         # store a unique ID for this component
         global next_component_id
         self.__id = next_component_id
         next_component_id += 1
 
+    def __setattr__(self, name, value):
+        if name in self.__dict__.get("_Component__node_setters", ()):
+            raise AttributeError("can't set attribute '{0}', it is a node of {1}".format(name, self.name))
+
+        self.__dict__.pop("_finesse_text", None)
+        super(Component, self).__setattr__(name, value)
+
     def __deepcopy__(self, memo):
         """
         When deep copying a kat object we need to take into account
-        the instance specific properties.
+        the weak references parameters hold to their owner.
         """
-        # Here we create a copy of this object based of the base class
-        # of this one, otherwise we're making a copy of a copy of a copy...
-        result = self.__class__.__new__(self.__class__.__base__)
+        result = self.__class__.__new__(self.__class__)
         result._unfreeze()
         memo[id(self)] = result
-        result.__dict__ = copy.deepcopy(self.__dict__, memo)
+        result.__dict__ = deepcopy_dict(self.__dict__, memo)
 
         for _ in result._params:
             _._updateOwner(result)
@@ -198,7 +189,7 @@ class Component(object):
 
         self._kat = kat
 
-        kat.nodes.registerComponentNodes(self, self._requested_node_names, self.__on_node_change)
+        kat.nodes.registerComponentNodes(self, self._requested_node_names, self._on_node_change)
 
     def __repr__(self):
         return "<%s (%s) at %s>" % (self.__class__.__name__, self.__name, hex(id(self)))
@@ -213,49 +204,57 @@ class Component(object):
 
         self.__removed = True
 
-    def __on_node_change(self):
+    def _on_node_change(self):
         # need to update the node gauss parameter setter members
         self.__update_node_setters()
+        self.__dict__.pop("_finesse_text", None)
 
-    def __update_node_setters(self):
-        # check if any node setters have already been added. If so we
-        # need to remove them. This function should get called if the nodes
-        # are updated, either by some function call or the GUI
-        key_rm = [k for k in self.__dict__ if k.startswith("__nodesetter_", 0, 13)]
+    def _getCachedFinesseText(self):
+        """
+        Returns the same as getFinesseText, reusing the text made the last
+        time if nothing it depends on has changed since. The text is kept in
+        __dict__ until this component, one of its parameters or its nodes
+        change. Text that uses constants is also remade when any constant
+        changes, as the parameter values are checked when making it.
+        Components with parameters that are put elsewhere are not cached, as
+        their text depends on other objects.
+        """
+        cached = self.__dict__.get("_finesse_text")
 
-        # now we have a list of which to remove
-        for key in key_rm:
-            ns = self.__dict__[key]
-            name = str(ns.node.name)
+        if cached is not None and (cached[1] is None or cached[1] == Param.constant_changes):
+            return cached[0]
 
-            if '__nodesetter_' + name in self.__dict__:
-                delattr(self, '__nodesetter_' + name)
+        txt = self.getFinesseText()
+        uses_constants = False
 
-            if name in self.__class__.__dict__:
-                delattr(self.__class__, name)
+        for p in self._params:
+            if p.put_count > 0:
+                return txt
 
-        # Now re-add them pointing to the recent nodes
-        for node in self.nodes:
-            if type(node) != pykat.node_network.DumpNode:
-                ns = NodeGaussSetter(self, node)
-                self.__add_node_setter(ns)
+            uses_constants = uses_constants or p._isConst
 
-    def __add_node_setter(self, ns):
-        self._unfreeze()
+        self.__dict__["_finesse_text"] = (txt, Param.constant_changes if uses_constants else None)
 
-        if not isinstance(ns, NodeGaussSetter):
-            raise pkex.ValueError("Argument is not of type NodeGaussSetter")
+        return txt
 
-        name = str(ns.node.name)
-        fget = lambda self: self.__get_node_setter(name)
+    def __update_node_setters(self):
+        # Replace the node setters with ones for the nodes now attached.
+        # This function should get called if the nodes are updated, either
+        # by some function call or the GUI. They are also stored in __dict__
+        # under the node names, which makes them attributes, e.g. comp.n1
+        for name in self.__node_setters:
+            del self.__dict__[name]
 
-        setattr(self.__class__, name, property(fget))
-        setattr(self, '__nodesetter_' + name, ns)
+        setters = {}
 
-        self._freeze()
+        for node in self.nodes:
+            name = str(node.name)
+
+            if type(node) != pykat.node_network.DumpNode and name not in self.__dict__ and not hasattr(type(self), name):
+                setters[name] = NodeGaussSetter(self, node)
 
-    def __get_node_setter(self, name):
-        return getattr(self, '__nodesetter_' + name)
+        self.__dict__.update(setters)
+        self.__node_setters = setters
 
     @staticmethod
     @abc.abstractmethod
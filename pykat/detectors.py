@@ -26,14 +26,12 @@ import warnings
 import copy
 
 from pykat import USE_GUI, NoGUIException
-from pykat.freeze import canFreeze
+from pykat.freeze import canFreeze, deepcopy_dict
 
 if USE_GUI:
     import pykat.gui.resources
     from pykat.gui.graphics import *
 
-id_____pykat_class = 0
-
 @canFreeze
 class BaseDetector(object) :
     """
@@ -43,19 +41,6 @@ class BaseDetector(object) :
     
     __metaclass__ = abc.ABCMeta
     
-    def __new__(cls, *args, **kwargs):
-        # This creates an instance specific class for the component
-        # this enables us to add properties to instances rather than
-        # all classes
-        global id_____pykat_class
-        id_____pykat_class += 1
-        cnew_name = str("%s.%s_%i" % (cls.__module__, cls.__name__, id_____pykat_class))
-        
-        cnew = type(cnew_name, (cls,), {})
-        
-        o = object.__new__(cnew)
-        return o
-        
     def __init__(self, name, nodes=None, max_nodes=1):
 
         self._unfreeze()
@@ -121,13 +106,11 @@ class BaseDetector(object) :
     def __deepcopy__(self, memo):
         """
         When deep copying a kat object we need to take into account
-        the instance specific properties.
+        the weak references parameters hold to their owner.
         """
-        
-        # Here we create a copy of this object based of the base class
-        # of this one, otherwise we're making a copy of a copy of a copy...
-        result = self.__class__.__new__(self.__class__.__base__)
-        result.__dict__ = copy.deepcopy(self.__dict__, memo)
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        result.__dict__ = deepcopy_dict(self.__dict__, memo)
         
         for _ in result._params:
             _._updateOwner(result)
@@ -586,42 +569,38 @@ class bp(Detector1):
         
         return rtn
 
-id___2 = 0
-
 class pd(Detector1):
 
-    def __new__(cls, *args, **kwargs):
-        # This creates an instance specific class for the component
-        # this enables us to add properties to instances rather than
-        # all classes
-        global id___2
-        id___2 += 1
-        cnew_name = str("%s.%s_%i" % (cls.__module__, cls.__name__, id___2))
-    
-        cnew = type(cnew_name, (cls,), {})
-    
-        return object.__new__(cnew)
-
-    def __deepcopy__(self, memo):
+    def __demod_property(name):
         """
-        When deep copying a kat object we need to take into account
-        the instance specific properties.
-        
-        PD code needs to override this as it needs to call set_demod_attrs.
+        Property for the demodulation frequency or phase `name` ("f1",
+        "phase2", ...), which only exists for the number of demodulations
+        the photodiode has.
         """
+        num = name[-1]
         
-        # Here we create a copy of this object based of the base class
-        # of this one, otherwise we're making a copy of a copy of a copy...
-        result = self.__class__.__new__(self.__class__.__base__)
-        result.__dict__ = copy.deepcopy(self.__dict__, memo)
-        
-        # Need to update f/p attrs
-        result.__set_demod_attrs()
+        def check(self):
+            if int(num) > self.num_demods:
+                raise AttributeError("'{0}' has {1} demodulation(s) so no attribute '{2}'".format(self.name, self.num_demods, name))
+            
+        def fget(self):
+            check(self)
+            return self.__get_fphi(name)
         
-        for _ in result._params:
-            _._updateOwner(result)
+        def fset(self, value):
+            check(self)
             
-        return result
+            if name.startswith("f"):
+                self.__set_f(num, value)
+            else:
+                self.__set_phi(num, value)
+            
+        return property(fget, fset)
+    
+    f1, f2, f3, f4, f5 = map(__demod_property, ("f1", "f2", "f3", "f4", "f5"))
+    phase1, phase2, phase3, phase4, phase5 = map(__demod_property, ("phase1", "phase2", "phase3", "phase4", "phase5"))
+    
+    del __demod_property
 
     def _get_fphi_str(self):
         """
@@ -631,14 +610,14 @@ class pd(Detector1):
         fphi_str = ""
             
         for n in range(1, 1+self.num_demods):
-            _f = self.__getattribute__("f"+str(n))
+            _f = getattr(self, "f"+str(n))
             
             if _f == "$fs":
                 fphi_str += " $fs"
             else:
                 fphi_str += " {0}".format(_f)
                 
-            phi_val = self.__getattribute__("phase"+str(n))
+            phi_val = getattr(self, "phase"+str(n))
             
             if phi_val != None:
                 if type(phi_val) == float:
@@ -672,8 +651,8 @@ class pd(Detector1):
         self.__pdtype = pdtype
 
         # create the parameters for all 5 demodulations regardless
-        # of how many the user specifies. Later we add properties to
-        # those which correspond to the number of demodulations
+        # of how many the user specifies. Only those which correspond to
+        # the number of demodulations are available as attributes
         
         self.__f1 = Param("f1", self, None)
         self.__f2 = Param("f2", self, None)
@@ -709,8 +688,6 @@ class pd(Detector1):
             elif i<num_demods-1:
                 raise pkex.BasePyKatException("Missing demodulation phase {0} (phase{0})".format(i+1))
    
-        self.__set_demod_attrs()
-    
         self._freeze()
                 
     @property
@@ -732,7 +709,6 @@ class pd(Detector1):
             raise pkex.BasePyKatException("Number of demodulations must be between 0 and 5")
         
         self.__num_demods = value
-        self.__set_demod_attrs()
 
     @property
     def pdtype(self): return self.__pdtype
@@ -761,38 +737,6 @@ class pd(Detector1):
         p = getattr(self, '_pd__phase' + num)  
         p.value = value
         
-    def __set_demod_attrs(self):
-        """
-        For the set number of demodulations the correct number of 
-        Parameters are created.
-        """
-        self._unfreeze()
-        
-        # if there are demodulations present then we want to add
-        # the various parameters so they are available for users
-        # to play with.
-        if self.__num_demods > 0:
-            for i in range(1,6):
-                name = str(i)
-                
-                if i <= self.num_demods:
-                    if not hasattr(self, "f"+name):
-                        fget = lambda self, i=i:        self.__get_fphi('f'+str(i))
-                        fset = lambda self, value, i=i: self.__set_f(str(i), value)
-                        
-                        setattr(self.__class__, "f"+name, property(fget=fget, fset=fset))
-                    
-                    if not hasattr(self, "phase"+name):
-                        setattr(self.__class__, "phase"+name, property(fget=lambda self, i=i: self.__get_fphi('phase'+str(i)), fset=lambda self, value, i=i: self.__set_phi(str(i), value)))
-                else:
-                    if hasattr(self, "f"+name):
-                        delattr(self.__class__, "f"+name)
-                        
-                    if hasattr(self, "phase"+name):
-                        delattr(self.__class__, "phase"+name)
-        
-        self._freeze()
-    
     @staticmethod
     def parseFinesseText(text): 
         values = text.split()
@@ -90,3 +90,15 @@ class FinesseRunError(BasePyKatException) :
         BasePyKatException.__init__(self, self.__err)
         #BasePyKatException.__init__(self, "{0}".format(self.__err))
         
+
+class FinesseTimeout(BasePyKatException) :
+    def __init__(self, timeout):
+        self.timeout = timeout
+        BasePyKatException.__init__(self, "Finesse did not finish within {0:g} seconds and was stopped".format(timeout))
+
+class FinesseRunAborted(BasePyKatException) :
+    def __init__(self, tag, value, rows=None):
+        self.tag = tag
+        self.value = value
+        self.rows = rows
+        BasePyKatException.__init__(self, "Finesse was stopped by the run callback after a '{0}' message".format(tag))
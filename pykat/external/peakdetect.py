@@ -5,8 +5,7 @@
 ###############################################################
 import numpy as np
 from math import pi, log
-from scipy import fft, ifft
-from scipy.optimize import curve_fit
+from numpy.fft import fft, ifft
 
 i = 10000
 x = np.linspace(0, 3.5 * pi, i)
@@ -57,6 +56,7 @@ def _peakdetect_parabole_fitter(raw_peaks, x_axis, y_axis, points):
         # build list of approximations
         # k = -m as first approximation?
         p0 = (-m, tau, m)
+        from scipy.optimize import curve_fit
         popt, pcov = curve_fit(func, x_data, y_data, p0)
         # retrieve tau and m i.e x and y value of peak
         x, y = popt[1:3]
@@ -437,6 +437,7 @@ def peakdetect_sine(y_axis, x_axis, points = 9, lock_frequency = False):
             
             # subtract offset from waveshape
             y_data -= offset
+            from scipy.optimize import curve_fit
             popt, pcov = curve_fit(func, x_data, y_data, p0)
             # retrieve tau and A i.e x and y value of peak
             x = popt[-1]
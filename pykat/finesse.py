@@ -42,7 +42,9 @@ import time
 import pickle
 import base64
 import zlib
+import hashlib
 import pykat
+import pykat.cache
 import warnings
 import re
 import math
@@ -52,6 +54,11 @@ import ctypes.util
 import collections
 import re
 import copy
+import threading
+import glob
+import json
+import io
+import select
 
 from subprocess import Popen, PIPE
 
@@ -85,7 +92,7 @@ from pykat.commands import Command, xaxis, Constant
 from pykat.SIfloat import *
 from pykat.param import Param, AttrParam
 from pykat.external import progressbar
-from pykat.freeze import canFreeze
+from pykat.freeze import canFreeze, deepcopy_dict
 
 import pykat.external.six as six
 import pykat.exceptions as pkex
@@ -102,8 +109,6 @@ if USE_GUI:
     from PyQt4.QtCore import QCoreApplication
     from PyQt4.QtGui import QApplication
 
-from multiprocessing import Process, Manager
-
 PYKAT_DATA = "#PYKAT_DATA="
 NO_BLOCK = "NO_BLOCK"
 pykat_web = "www.gwoptics.org/pykat"
@@ -112,15 +117,30 @@ pykat_web = "www.gwoptics.org/pykat"
 space_trace = namedtuple("space_trace", ['gouyx','gouyy'])
 node_trace = namedtuple("node_trace", ['qx','qy'])
 cav_trace = namedtuple("cav_trace", ['isStable','gx','gy','qx','qy','finesse','loss','length','FSR','FWHM','pole'])
+run_chunk = namedtuple("run_chunk", ['start','stop','katScript'])
+
+lkat_location = None
+_lkat_searched = False
 
-lkat_location = ctypes.util.find_library("kat")
+def _find_lkat():
+    """
+    Returns the path of the shared Finesse library libkat, or None if it can't
+    be found. Searching runs external tools so is only done when first needed.
+    """
+    global lkat_location, _lkat_searched
+
+    if not _lkat_searched:
+        lkat_location = ctypes.util.find_library("kat")
+        _lkat_searched = True
+
+    return lkat_location
 
 
 def f__lkat_process(callback, cmd, kwargs):
     """
     """
 
-    if lkat_location is None:
+    if _find_lkat() is None:
         raise RuntimeError("Could not find shared library 'libkat', please install to a system location or copy to the same directory as this script")
 
     lkat = ctypes.PyDLL(lkat_location)
@@ -195,6 +215,390 @@ def f__lkat_trace_callback(lkat, trace_info, getCavities, getNodes, getSpaces):
                                                  gouyy = space.gouy_y)
 
 
+_finesse_binaries = None
+
+def _finesse_binaries_file():
+    return os.path.join(pykat.cache.root_directory(), "finesse_binaries.json")
+
+def _load_finesse_binaries():
+    try:
+        with open(_finesse_binaries_file(), "r") as f:
+            binaries = json.load(f)
+    except (IOError, OSError, ValueError): # missing or unreadable
+        return {}
+
+    return binaries if isinstance(binaries, dict) else {}
+
+def _save_finesse_binaries():
+    """
+    Stores what is known about each Finesse binary so that other processes
+    do not need to run them again. Failing to save is not an error.
+    """
+    path = _finesse_binaries_file()
+
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+        with os.fdopen(fd, "w") as f:
+            json.dump(_finesse_binaries, f)
+
+        os.replace(tmp, path)
+    except (IOError, OSError):
+        pass
+
+def _finesse_binary_info(kat_exec):
+    """
+    Returns a dictionary of what is known about the Finesse binary at
+    kat_exec. Entries are kept for the binary's path, modification time and
+    size, so that it only needs to be run once to find out each thing unless
+    it is replaced. They are also stored on disk, see `_save_finesse_binaries`.
+    """
+    global _finesse_binaries
+
+    if _finesse_binaries is None:
+        _finesse_binaries = _load_finesse_binaries()
+
+    st = os.stat(kat_exec)
+    path = os.path.realpath(kat_exec)
+    info = _finesse_binaries.get(path)
+
+    if info is None or info.get("mtime") != st.st_mtime or info.get("size") != st.st_size:
+        info = _finesse_binaries[path] = {"mtime": st.st_mtime, "size": st.st_size}
+
+    return info
+
+def _finesse_binary_version(kat_exec):
+    """
+    Returns the version of the Finesse binary at kat_exec.
+    """
+    info = _finesse_binary_info(kat_exec)
+
+    if "version" not in info:
+        p = Popen([kat_exec, '-v'], stdout=PIPE, stderr=PIPE)
+
+        out, err = p.communicate()
+
+        if err:
+            raise pkex.BasePyKatException("Error getting version: " + str(err.decode("utf-8")))
+
+        vals = str(out.decode("utf-8")).split()
+
+        info["version"] = vals[2][1:-2] #Format: Finesse 2.2 (2.2-0-g994eac8), 03.07.2017
+
+        _save_finesse_binaries()
+
+    return info["version"]
+
+def _finesse_version_fulfilled(version):
+    """
+    Returns True if the Finesse version string meets pykat.__min_req_finesse__.
+    """
+    version_found    = [int(_) for _ in version.split('-')[0].split('.')]
+    version_required = [int(_) for _ in pykat.__min_req_finesse__.split('-')[0].split('.')]
+
+    n = max(len(version_found), len(version_required))
+
+    return version_found + [0]*(n-len(version_found)) >= version_required + [0]*(n-len(version_required))
+
+def _check_finesse_version(kat_exec):
+    """
+    Raises an exception if the Finesse binary at kat_exec is older than pykat
+    requires. Setting the environment variable PYKAT_SKIP_VERSION_CHECK skips
+    this check.
+    """
+    if os.environ.get("PYKAT_SKIP_VERSION_CHECK"):
+        return
+
+    v = _finesse_binary_version(kat_exec)
+
+    if not _finesse_version_fulfilled(v):
+        raise pkex.BasePyKatException("Pykat %s requires Finesse version %s or higher. You have have %s" % (pykat.__version__,
+                                                                                                  str(pykat.__min_req_finesse__),
+                                                                                                  v))
+
+def _finesse_has_binary_output(kat_exec):
+    """
+    Returns True if the Finesse binary at kat_exec lists the -binary-output
+    option in its help text.
+    """
+    info = _finesse_binary_info(kat_exec)
+
+    if "binary_output" not in info:
+        p = Popen([kat_exec, '-h'], stdout=PIPE, stderr=PIPE)
+
+        out, err = p.communicate()
+
+        info["binary_output"] = b"-binary-output" in out + err
+
+        _save_finesse_binaries()
+
+    return info["binary_output"]
+
+def _read_text_data(outfile, block_size=2**25):
+    """
+    Reads the rows of numbers following the header of a Finesse text output
+    file into a 2D array, starting from the current position of the open
+    file outfile.
+
+    From numpy 1.23 loadtxt is compiled so is used directly. With older
+    versions the file is read in blocks of whole lines and each block is
+    converted at once with np.fromstring, which is much faster than their
+    line by line loadtxt.
+    """
+    if np.lib.NumpyVersion(np.__version__) >= '1.23.0':
+        return np.loadtxt(outfile, comments='%', ndmin=2)
+
+    blocks = []
+    cols = None
+    tail = ""
+
+    while True:
+        text = outfile.read(block_size)
+        text = tail + text
+
+        if len(text) == 0:
+            break
+
+        if len(text) == len(tail):
+            # end of the file without a trailing new line
+            end = len(text)
+        else:
+            end = text.rfind("\n") + 1
+
+        text, tail = text[:end], text[end:]
+
+        if len(text.strip()) == 0:
+            continue
+
+        if cols is None:
+            cols = len(text.lstrip().split("\n", 1)[0].split())
+
+        if "%" in text:
+            blocks.append(np.loadtxt(text.splitlines(), comments='%', ndmin=2).ravel())
+        else:
+            blocks.append(np.fromstring(text, sep=" "))
+
+    if cols is None:
+        return np.empty((0, 0))
+
+    return np.concatenate(blocks).reshape(-1, cols)
+
+def _open_pykat_pipe(pipe_name, p, duration=5):
+    """
+    Waits for the Finesse process p to make its pykat pipe and opens it for
+    reading once Finesse has connected to the other end. Finesse makes the
+    pipe itself, so until it exists this retries with a delay starting at
+    10us, doubling up to 1ms, rather than waiting a whole millisecond each
+    time. Returns None if Finesse stops before it has connected.
+
+    On Linux the pipe is opened non-blocking and polled, so that a Finesse
+    process killed before connecting, for example by a run timeout, does
+    not leave the open waiting forever. Elsewhere opening blocks until
+    Finesse has connected.
+
+    duration - Seconds to wait for the pipe before raising an exception
+    """
+    end = time.time() + duration
+    delay = 1e-5
+
+    while True:
+        try:
+            if not sys.platform.startswith("linux"):
+                if six.PY2:
+                    return codecs.open(pipe_name, "r", "utf-8")
+                else:
+                    return open(pipe_name, "r", encoding="utf-8")
+
+            fd = os.open(pipe_name, os.O_RDONLY | os.O_NONBLOCK)
+            break
+        except FileNotFoundError as ex:
+            if _has_exited(p):
+                # Finesse has already stopped, any errors are
+                # reported from its return code
+                return None
+            elif time.time() > end:
+                raise pkex.BasePyKatException("Could not connect to pykat pipe in {0} seconds. Ensure you are using Finesse >= v2.1 and Pykat >= v1.0.0. Or set usePipe=False when making kat object.".format(duration))
+
+            time.sleep(delay)
+            delay = min(2*delay, 1e-3)
+
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+
+    # Linux only signals the end of the pipe once Finesse has connected
+    # to it, until then check every millisecond that it is still running
+    while not poller.poll(1):
+        if _has_exited(p):
+            os.close(fd)
+            return None
+
+    import fcntl
+
+    fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) & ~os.O_NONBLOCK)
+
+    return io.open(fd, "r", encoding="utf-8")
+
+def _has_exited(p):
+    """
+    Returns True if the process p, from Popen or asyncio, has finished.
+    """
+    if hasattr(p, "poll"):
+        return p.poll() is not None
+    else:
+        return p.returncode is not None
+
+async def _open_pykat_pipe_async(pipe_name, p, duration=5):
+    """
+    Waits, without blocking the event loop, for the Finesse process p to make
+    its pykat pipe and returns an asyncio (StreamReader, transport) pair for
+    reading it. Returns (None, None) if Finesse stops before the pipe is made.
+
+    The pipe is opened non-blocking, for which Linux does not signal the end
+    of the pipe until Finesse has connected to it and then closed it.
+    """
+    import asyncio
+
+    end = time.time() + duration
+    delay = 1e-5
+
+    while not os.path.exists(pipe_name):
+        if p.returncode is not None:
+            return (None, None)
+        elif time.time() > end:
+            raise pkex.BasePyKatException("Could not connect to pykat pipe in {0} seconds. Ensure you are using Finesse >= v2.1 and Pykat >= v1.0.0.".format(duration))
+
+        await asyncio.sleep(delay)
+        delay = min(2*delay, 1e-3)
+
+    pipe = os.fdopen(os.open(pipe_name, os.O_RDONLY | os.O_NONBLOCK), "rb", 0)
+
+    reader = asyncio.StreamReader()
+    transport, _ = await asyncio.get_event_loop().connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+
+    return (reader, transport)
+
+def _kill_process(pid):
+    """
+    Kills the process pid and waits for it without an event loop, for when
+    the coroutine that started it can no longer await it. The process may
+    already have stopped or been reaped by the loop's child watcher.
+    """
+    import signal
+
+    try:
+        os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        os.waitpid(pid, 0)
+    except OSError:
+        pass
+
+def _remove_pipe(pipe_name):
+    """
+    Removes a pykat pipe left behind by Finesse, if it is still there.
+    """
+    try:
+        os.remove(pipe_name)
+    except OSError:
+        pass
+
+def _remove_run_files(katfile):
+    """
+    Removes the kat file of a run that was stopped and any outputs Finesse
+    had written for it.
+    """
+    katfile.close()
+
+    root = os.path.splitext(katfile.name)[0]
+
+    for _ in [katfile.name, root + ".out"] + glob.glob(glob.escape(root) + ".*.out"):
+        if os.path.isfile(_):
+            os.remove(_)
+
+class _RunMonitor(object):
+    """
+    Passes the messages Finesse sends over the pykat pipe to a run callback as
+    (tag, value) pairs. If outfile is given the data rows Finesse has written
+    to that text output file since the last message are also passed, as a
+    ("rows", array) pair.
+
+    When the callback returns True a FinesseRunAborted exception is raised,
+    holding all the rows read so far.
+    """
+
+    def __init__(self, callback, outfile=None):
+        self.callback = callback
+        self.outfile = outfile
+        self.rows = []
+        self._file = None
+        self._buffer = b""
+
+    def __call__(self, tag, value):
+        if self.callback(tag, value):
+            raise pkex.FinesseRunAborted(tag, value, self.all_rows())
+
+        rows = self.read_rows()
+
+        if rows is not None and self.callback("rows", rows):
+            raise pkex.FinesseRunAborted("rows", rows, self.all_rows())
+
+    def read_rows(self):
+        """
+        Returns the complete rows added to the output file since the last
+        call, or None if there are none.
+        """
+        if self.outfile is None:
+            return None
+
+        if self._file is None:
+            try:
+                self._file = open(self.outfile, "rb")
+            except (IOError, OSError): # not made yet
+                return None
+
+        data = self._buffer + self._file.read()
+        end = data.rfind(b"\n")
+
+        if end < 0:
+            self._buffer = data
+            return None
+
+        self._buffer = data[end+1:]
+
+        lines = [_ for _ in data[:end].split(b"\n") if len(_.strip()) > 0 and not _.lstrip().startswith(b"%")]
+
+        if len(lines) == 0:
+            return None
+
+        rows = np.array(b" ".join(lines).split(), dtype=np.float64).reshape(len(lines), -1)
+        self.rows.append(rows)
+
+        return rows
+
+    def all_rows(self):
+        if len(self.rows) == 0:
+            return None
+
+        return np.vstack(self.rows)
+
+    def finish(self):
+        """
+        Passes on any rows written since the last message once Finesse has
+        finished. The callback can no longer stop the run.
+        """
+        rows = self.read_rows()
+
+        if rows is not None:
+            self.callback("rows", rows)
+
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 @canFreeze
 class GaussCommands(object):
     """
@@ -323,16 +727,17 @@ class BlockedKatFile(object):
 
 class KatBatch(object):
 
-    def __init__(self):
-        from IPython.parallel import Client
+    def __init__(self, **kwargs):
+        from pykat.parallel import _Client
 
-        self._c = Client()
-        self._lb = c.load_balanced_view()
-        self.lb.block = False
+        self._c = _Client(**kwargs)
+        self._lb = self._c.load_balanced_view()
+        self._lb.block = False
 
         self._todo = []
 
-    def _run(dir, commands, **kwargs):
+    @staticmethod
+    def _run(commands, **kwargs):
         import pykat
         kat = pykat.finesse.kat()
         kat.verbose = False
@@ -346,17 +751,15 @@ class KatBatch(object):
         return kat.run(**kw)
 
     def addKat(self, kat, **kwargs):
-        import os
-        cdir = os.getcwd()
-        script = "\n".join(kat.generateKatScript())
-        self.todo.append(self.lb.apply_async(self._run, script, **kwargs))
-        return self.todo[-1]
+        script = "".join(kat.generateKatScript())
+        self._todo.append(self._lb.apply_async(KatBatch._run, script, **kwargs))
+        return self._todo[-1]
 
     def wait(self):
-        return self.lb.wait(self.todo)
+        return self._lb.wait(self._todo)
 
     def results(self):
-        return self.todo
+        return self._todo
 
 
 def GUILength(L):
@@ -365,6 +768,18 @@ def GUILength(L):
     """
     return L # * ( 40 * erfc(L/400.0) + 0.01)
 
+def _label_columns(labels):
+    """
+    Maps the name of each output, the first word of its label, to the
+    columns it is in, two for outputs with abs:deg or re:im values.
+    """
+    columns = {}
+
+    for i, label in enumerate(labels or ()):
+        columns.setdefault(label.split()[0], []).append(i)
+
+    return dict((k, tuple(v)) for k, v in six.iteritems(columns))
+
 @canFreeze
 class KatRun(object):
     def __init__(self):
@@ -387,8 +802,28 @@ class KatRun(object):
         self.katVersion = None
         self.katPath = None
         self.yaxis = None
+        self.chunks = None
+        self.timings = OrderedDict()
         self._freeze()
 
+    def __setattr__(self, name, value):
+        if name == "ylabels":
+            self.__dict__.pop("_columns", None)
+
+        super(KatRun, self).__setattr__(name, value)
+
+    def _getColumns(self):
+        """
+        Returns the map of output names to columns of y, made from ylabels
+        when first needed and kept until ylabels is set again.
+        """
+        columns = self.__dict__.get("_columns")
+
+        if columns is None:
+            columns = self.__dict__["_columns"] = _label_columns(self.ylabels)
+
+        return columns
+
     def __contains__(self, key):
         """
         The Finesse output file will output headers with re:im or abs:deg in the name.
@@ -403,7 +838,7 @@ class KatRun(object):
                 print("it is")
 
         """
-        return key in set(_.split()[0] for _ in self.ylabels)
+        return key in self._getColumns()
 
     def info(self):
 
@@ -411,8 +846,7 @@ class KatRun(object):
         kat.verbose = False
         kat.parse(self.katScript)
 
-        detectors = list(set([lbl.split()[0] for lbl in self.ylabels]))
-        detectors.sort()
+        detectors = sorted(self._getColumns())
 
         print("")
         print("--- Output info ---")
@@ -702,7 +1136,7 @@ class KatRun(object):
 
             return np.array(results).squeeze()
         else:
-            idx = [i for i in range(len(self.ylabels)) if self.ylabels[i].split()[0] == str(value)]
+            idx = self._getColumns().get(str(value), ())
             out = None
 
             if len(idx) > 0:
@@ -720,7 +1154,7 @@ class KatRun(object):
                         out = self.y[:, idx[0]] + 1j*self.y[:, idx[1]]
 
                 if out is None:
-                    out = self.y[:, idx]
+                    out = self.y[:, list(idx)]
 
                 if out.size == 1:
                     return out[0].squeeze()
@@ -750,8 +1184,28 @@ class KatRun2D(object):
         self.save_input = False
         self.save_output = False
         self.katPath = None
+        self.chunks = None
+        self.timings = OrderedDict()
         self._freeze()
 
+    def __setattr__(self, name, value):
+        if name == "zlabels":
+            self.__dict__.pop("_columns", None)
+
+        super(KatRun2D, self).__setattr__(name, value)
+
+    def _getColumns(self):
+        """
+        Returns the map of output names to indices of z, made from zlabels
+        when first needed and kept until zlabels is set again.
+        """
+        columns = self.__dict__.get("_columns")
+
+        if columns is None:
+            columns = self.__dict__["_columns"] = _label_columns(self.zlabels)
+
+        return columns
+
     def saveKatRun(self, filename):
         with open(filename,'wb') as outfile:
             pickle.dump(self, outfile)
@@ -781,7 +1235,7 @@ class KatRun2D(object):
 
             return np.array(results).squeeze()
         else:
-            idx = [i for i in range(len(self.zlabels)) if self.zlabels[i].split()[0] == str(value)]
+            idx = self._getColumns().get(str(value), ())
             out = None
 
             if len(idx) > 0:
@@ -799,7 +1253,7 @@ class KatRun2D(object):
                         out = self.z[idx[0], :, :] + 1j*self.z[idx[1], :, :]
 
                 if out is None:
-                    out = self.z[idx]
+                    out = self.z[list(idx)]
 
                 if out.size == 1:
                     return out[0].squeeze()
@@ -808,6 +1262,145 @@ class KatRun2D(object):
             else:
                 raise  pkex.BasePyKatException("No output by the name '{0}' found in the output".format(str(value)))
 
+@canFreeze
+class SweepResult(object):
+    """
+    Outputs of `kat.sweep`. `data` is a structured numpy array with a field
+    for each detector, shaped like the sweep, so that
+
+        result["P"][i, j]
+
+    is the output of detector P for the point with the i-th value of the
+    first parameter and j-th value of the second. Each field has the shape
+    a single run returns for that detector, for example one value per xaxis
+    step, which are stored in `x` (and `y` for x2axis runs).
+
+    `dims` names the sweep axes and `coords` maps each swept parameter to its
+    values. A grid sweep has an axis per parameter, a zip sweep a single
+    "point" axis along which every parameter varies.
+    """
+    def __init__(self, dims, coords, data, x=None, y=None):
+        self._unfreeze()
+        self.dims = dims
+        self.coords = coords
+        self.data = data
+        self.x = x
+        self.y = y
+        self.timings = OrderedDict()
+        self._freeze()
+
+    @property
+    def shape(self): return self.data.shape
+
+    @property
+    def detectors(self): return self.data.dtype.names
+
+    def get(self, value): return self[value]
+
+    def __getitem__(self, value):
+        if value not in self.data.dtype.names:
+            raise pkex.BasePyKatException("No output by the name '{0}' found in the sweep".format(str(value)))
+
+        return self.data[value]
+
+class KatSnapshot(object):
+    """
+    The parameter values and settings of a kat object when `kat.snapshot()`
+    was called, which `restore` puts back. Taking one records values rather
+    than copying every object like `kat.deepcopy()`, so it is the cheaper way
+    of changing a model, running it and returning it to how it was:
+
+        with kat.snapshot():
+            kat.ETMX.phi = 10
+            kat.parse("pd P nAS")
+            out = kat.run()
+
+    Restoring sets every parameter, constant, command and kat option (maxtem,
+    noxaxis, yaxis, ...) back, undoes changed puts and removes the components,
+    detectors, commands, signals and blocks added since. Objects removed since
+    cannot be brought back, so restoring then raises an exception; use
+    `kat.deepcopy()` for changes that remove parts of the model.
+    """
+
+    _setting_types = (type(None), bool, float, complex) + six.string_types + six.integer_types
+
+    def __init__(self, kat):
+        self.kat = kat
+        self._objects = (kat.detectors, kat.commands, kat.components)
+        self._targets = list(kat.signals.targets)
+        self._blocks = list(kat.getBlocks())
+        self._constants = dict(kat.constants)
+        self._constant_values = [(c, c.value) for c in kat.constants.values()]
+        self._commands = [(c, dict(c.__dict__)) for c in kat.commands.values()]
+        self._settings = dict((k, v) for k, v in six.iteritems(kat.__dict__) if isinstance(v, self._setting_types))
+        self._lambda0 = kat.lambda0
+        self._params = [(p, p._value, p._isConst, p._constName, p._putter, p._alt) for p in self.__params()]
+
+    def __params(self):
+        kat = self.kat
+
+        for objects in (kat.components.values(), kat.detectors.values(), kat.commands.values(), [kat.signals], kat.signals.targets):
+            for o in objects:
+                for p in getattr(o, "_params", ()):
+                    yield p
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.restore()
+
+    def restore(self):
+        """
+        Returns the kat object to how it was when the snapshot was taken.
+        """
+        kat = self.kat
+        current = (kat.detectors, kat.commands, kat.components)
+
+        for saved, now in zip(self._objects, current):
+            for name, obj in six.iteritems(saved):
+                if now.get(name) is not obj:
+                    raise pkex.BasePyKatException("'{0}' has been removed or replaced since the snapshot was taken so it cannot be restored".format(name))
+
+        for t in self._targets:
+            if t.removed:
+                raise pkex.BasePyKatException("Signal '{0}' has been removed since the snapshot was taken so it cannot be restored".format(t.name))
+
+        # Detectors and commands go before the components they may refer to
+        added = [now[name] for saved, now in zip(self._objects, current) for name in now if name not in saved]
+        added.extend(t for t in kat.signals.targets if all(t is not _ for _ in self._targets))
+
+        if len(added) > 0:
+            kat.remove(*added)
+
+        for name in list(kat.getBlocks()):
+            if name not in self._blocks:
+                kat.removeBlock(name)
+
+        for p, value, isConst, constName, putter, alt in self._params:
+            if p._putter is not putter or p._alt != alt:
+                p.put(putter, alt)
+
+            p._value = value
+            p._isConst = isConst
+            p._constName = constName
+            p._changed()
+
+        for c, state in self._commands:
+            c.__dict__.update(state)
+
+        kat.constants.clear()
+        kat.constants.update(self._constants)
+
+        for c, value in self._constant_values:
+            c.value = value
+
+        # lambda0 also changes the beam parameters set at nodes
+        if kat.lambda0 != self._lambda0:
+            kat.lambda0 = self._lambda0
+
+        kat.__dict__.update(self._settings)
+
 @canFreeze
 class Signals(object):
 
@@ -836,7 +1429,7 @@ class Signals(object):
             # Here we need to update the params with new owners
             result = self.__class__.__new__(self.__class__)
             memo[id(self)] = result
-            result.__dict__ = copy.deepcopy(self.__dict__, memo)
+            result.__dict__ = deepcopy_dict(self.__dict__, memo)
 
             for _ in result._params:
                 _._updateOwner(result)
@@ -902,7 +1495,7 @@ class Signals(object):
         # Here we need to update the params with new owners
         result = self.__class__.__new__(self.__class__)
         memo[id(self)] = result
-        result.__dict__ = copy.deepcopy(self.__dict__, memo)
+        result.__dict__ = deepcopy_dict(self.__dict__, memo)
 
         for _ in result._params:
             _._updateOwner(result)
@@ -1012,31 +1605,147 @@ class Block:
 
         return "\n".join(objs)
 
-id___ = 0
+# A reference to a constant, `$name`, in a line of Finesse code. As in
+# Finesse the name must be followed by a space, an operator, a closing
+# bracket or the end of the line.
+_constant_reference = re.compile(r"\$([^\s$+\-*/)]+)(?=[ +\-*/)]|\Z)")
 
-@canFreeze
-class kat(object):
-    #def __del__(self):
-    #    print ("\33[101m__del__() called: object %08x destroyed (%s)\33[0m" % (id(self), self.__class__))
+def _parse_object(cls):
+    return lambda kat, line: cls.parseFinesseText(line)
+
+def _parse_setting(attr, convert, optional=False):
+    """
+    Returns a parser for commands of the form `command value` that set an
+    attribute of the kat object. If optional the value can be left out, in
+    which case the attribute is not changed.
+    """
+    def parse(kat, line):
+        v = line.split()
+
+        if len(v) > 2 or (len(v) < 2 and not optional):
+            raise pkex.BasePyKatException("{0} command `{1}` is incorrect.".format(v[0], line))
+
+        if len(v) == 2:
+            setattr(kat, attr, convert(v[1]))
+
+    return parse
+
+def _parse_xaxis(kat, line):
+    kat.noxaxis = False
+    return pykat.commands.xaxis.parseFinesseText(line)
+
+def _parse_noxaxis(kat, line):
+    kat.noxaxis = True
 
-    def __new__(cls, *args, **kwargs):
-        # This may seem like an arbitrary step but here we are creating a
-        # new class that is a base class of itself. This is because when
-        # the kat object adds new components it also adds properties for
-        # each of these. There properties are unique to each kat object,
-        # but properties are part of the class definition. Thus if two
-        # kat objects share the same class definition they also have the
-        # same properties regardless of whether they have the actual
-        # object added to it. So we create an instance specific class.
-        global id___
-        id___ += 1
-        cnew = type(pykat.finesse.kat.__name__ + str("_") + str(id___), (pykat.finesse.kat,), {})
+def _parse_multisig(kat, line):
+    kat.multisig = True
 
-        obj = object.__new__(cnew)
+def _parse_lambda(kat, line):
+    kat.lambda0 = SIfloat(line.split()[-1])
 
-        #print ("\33[104m__del__() called: object %08x created (%s)\33[0m" % (id(obj), obj.__class__))
+def _parse_yaxis(kat, line):
+    kat.yaxis = line.split(" ", 1)[-1]
+
+def _parse_mf(kat, line):
+    kat.mf.extend(line.split()[1:])
+
+def _parse_terminal(kat, line):
+    if kat.verbose:
+        print ("Ignoring Gnuplot/Python terminal command '{0}'".format(line))
+
+# Commands that need other objects to be parsed first are deferred. These
+# are given as (pass, needs placeholder), the pass being 0 or 1 for the
+# order they are processed in and the placeholder keeping the position of
+# the command in its block.
+_parse_deferred = {
+    "gauss": (0, False), "gauss*": (0, False), "gauss**": (0, False),
+    "pdtype": (0, False), "attr": (0, False),
+    "cav": (0, True), "func": (0, True), "var": (0, True),
+    "lock": (0, True), "fsig": (0, True),
+    "scale": (1, False), "noplot": (1, False),
+    "put": (1, False), "put*": (1, False),
+}
+
+_parse_commands = None
+_parse_prefixes = None
+_parse_handlers = {}
+
+def _parse_handler(first):
+    """
+    Returns how a line of Finesse code starting with the command `first`
+    is parsed: a function taking the kat object and the line that returns
+    any new object, a tuple from _parse_deferred or None if pykat can't
+    parse it. Commands are looked up by name and then by the start of their
+    name, e.g. pd1 or bs2, and the result is remembered for each command.
+    """
+    global _parse_commands, _parse_prefixes
 
-        return obj
+    try:
+        return _parse_handlers[first]
+    except KeyError:
+        pass
+
+    if _parse_commands is None:
+        comps = pykat.components
+        dets = pykat.detectors
+        cmds = pykat.commands
+
+        commands = {
+            "m": comps.mirror, "m1": comps.mirror, "m2": comps.mirror,
+            "s": comps.space, "l": comps.laser, "dbs": comps.dbs,
+            "qshot": dets.qshot, "qshotS": dets.qshot, "qshotN": dets.qshot,
+            "qnoised": dets.qnoised, "qnoisedS": dets.qnoised, "qnoisedN": dets.qnoised,
+            "x2axis": cmds.x2axis, "x2axis*": cmds.x2axis,
+        }
+
+        _parse_commands = dict((k, _parse_object(v)) for k, v in commands.items())
+
+        _parse_commands.update({
+            "xaxis": _parse_xaxis, "xaxis*": _parse_xaxis,
+            "noxaxis": _parse_noxaxis,
+            "multisig": _parse_multisig,
+            "lambda": _parse_lambda,
+            "yaxis": _parse_yaxis,
+            "mf": _parse_mf,
+            "gnuterm": _parse_terminal, "pyterm": _parse_terminal,
+            "powers": _parse_setting("powers", int),
+            "phase": _parse_setting("phase", int),
+            "maxtem": _parse_setting("maxtem", lambda v: -1 if v == "off" else int(v)),
+            "deriv_h": _parse_setting("deriv_h", float),
+            "trace": _parse_setting("trace", str, optional=True),
+            "retrace": _parse_setting("retrace", str, optional=True),
+        })
+
+        _parse_commands.update(_parse_deferred)
+
+        # checked in order, so longer prefixes must come before shorter ones
+        _parse_prefixes = tuple((k, _parse_object(v)) for k, v in (
+            ("sq", comps.squeezer), ("bs", comps.beamSplitter),
+            ("gr", comps.grating),
+            ("isol", comps.isolator), ("lens", comps.lens),
+            ("mod", comps.modulator), ("ad", dets.ad), ("xd", dets.xd),
+            ("tf3", cmds.tf3), ("tf2", cmds.tf2), ("tf", cmds.tf),
+            ("cp", dets.cp), ("bp", dets.bp), ("gouy", dets.gouy),
+            ("beam", dets.beam), ("pd", dets.pd), ("hd", dets.hd),
+            ("qhd", dets.qhd),
+        ))
+
+    handler = _parse_commands.get(first)
+
+    if handler is None:
+        for prefix, _ in _parse_prefixes:
+            if first.startswith(prefix):
+                handler = _
+                break
+
+    _parse_handlers[first] = handler
+
+    return handler
+
+@canFreeze
+class kat(object):
+    #def __del__(self):
+    #    print ("\33[101m__del__() called: object %08x destroyed (%s)\33[0m" % (id(self), self.__class__))
 
     def __init__(self, kat_file=None, kat_code=None, katdir="", katname="", tempdir=None, tempname=None):
 
@@ -1048,6 +1757,7 @@ class kat(object):
         self.__components = {}  # dictionary of optical components
         self.__detectors = {}   # dictionary of detectors
         self.__commands = {}    # dictionary of commands
+        self.__type_index = {}  # getAll results by type, cleared by add and remove
         self.__gui = None
         self.nodes = NodeNetwork(self)
         self.__katdir = katdir # user specfied
@@ -1099,6 +1809,12 @@ class kat(object):
 
         self._finesse_exec()
 
+    def __setattr__(self, name, value):
+        if self.__get_object(name) is not None:
+            raise AttributeError("can't set attribute '{0}', it is an object in the simulation".format(name))
+
+        super(kat, self).__setattr__(name, value)
+
     def __and__(self, other):
         """
         Quick syntax for returning a string of the block if present.
@@ -1141,6 +1857,22 @@ class kat(object):
     def deepcopy(self):
         return copy.deepcopy(self)
 
+    def snapshot(self):
+        """
+        Returns a KatSnapshot of the parameter values and settings of this kat
+        object, which puts them back when restored or when used as a context
+        manager on leaving the with block. This is much cheaper than deepcopy
+        when a model is changed, run and then wanted as it was.
+
+        Example:
+            with kat.snapshot():
+                kat.ETMX.phi += 10
+                out = kat.run()
+
+            # kat.ETMX.phi has its previous value again
+        """
+        return KatSnapshot(self)
+
     def getAll(self, type, parameter=None):
         """
         Returns a collection of all objects of the type argument that are
@@ -1152,44 +1884,37 @@ class kat(object):
 
             # Get all the names of photodiodes
             names = kat.getAll(pykat.commands.cavity, "name")
+
+        The objects of each type asked for are kept until something is
+        added to or removed from this kat object, so calling this in a loop
+        doesn't look through every object each time.
         """
-        items = []
+        items = self.__type_index.get(type)
 
-        for a in (item for item in self.__class__.__dict__):
-            b = getattr(self, a)
+        if items is None:
+            items = []
 
-            if isinstance(b, type):
-                items.append(b)
+            for objects in (self.__components, self.__detectors, self.__commands):
+                items.extend(_ for _ in objects.values() if isinstance(_, type))
 
+            items = self.__type_index[type] = tuple(items)
 
         if parameter is None:
-            return tuple(items)
+            return items
         else:
             return tuple(getattr(_, parameter) for _ in items)
 
     def __deepcopy__(self, memo):
         """
-        When deep copying a kat object we need to take into account
-        the instance specific properties. This is because when
-        the kat object adds new components it also adds properties for
-        each of these. There properties are unique to each kat object,
-        but properties are part of the class definition. Thus if two
-        kat objects share the same class definition they also have the
-        same properties regardless of whether they have the actual
-        object added to it. So we create an instance specific class.
+        When deep copying a kat object the components need to make new
+        node gauss setters, as these only hold weak references to the
+        components and nodes of the original.
         """
-        result = self.__class__.__new__(self.__class__.__base__)
+        result = self.__class__.__new__(self.__class__)
         memo[id(self)] = result
-        result.__dict__ = copy.deepcopy(self.__dict__, memo)
-
-        # Find all properties in class we are copying
-        # and deep copy these to the new class instance
-        for x in self.__class__.__dict__.items():
-            if isinstance(x[1], property):
-                setattr(result.__class__, x[0], x[1])
+        result.__dict__ = deepcopy_dict(self.__dict__, memo)
 
         result._kat__signals = copy.deepcopy(self.signals, memo)
-        result.nodes._NodeNetwork__update_nodes_properties()
 
         # Update any weakrefs
         for c in result.components:
@@ -1385,9 +2110,12 @@ class kat(object):
                 constants.update(useConstants)
 
             for line in commands:
+                if "const" not in line:
+                    continue
+
                 values = line.split()
 
-                if len(values)>0 and values[0] == 'const':
+                if values[0] == 'const':
                     if len(values) >= 3:
                         if useConstants is not None and values[1] in useConstants:
                             pkex.printWarning("Specified {} constant value in useConstants, ignoring line {}".format(values[1], line))
@@ -1408,35 +2136,36 @@ class kat(object):
 
                 return commands
             else:
-                # replace all the constant reference with the actual value
-                commands_new = []
+                # replace all the constant references with their value in
+                # one go for each line, leaving any that aren't constants
+                strings = dict((k, str(v.value)) for k, v in constants.items())
+                used = []
 
-                for line in commands:
-                    values = line.split()
+                def replace(match):
+                    key = match.group(1)
 
-                    if len(values) > 0 and values[0] != 'const':
-                        # check if we have a var/constant in this line
-                        if line.find('$') >= 0:
-                            for key in constants.keys():
-                                # TODO: need to fix this for checking mulitple instances of const in a single line
+                    if key not in strings:
+                        return match.group(0)
 
-                                chars = [' ', '+', '-', '*', '/', ')']
+                    used.append(key)
+                    return strings[key]
 
-                                for c in chars:
-                                    none_found = False
+                commands_new = []
 
-                                    while not none_found:
-                                        if line.find('$'+key+c) > -1:
-                                            constants[key].usedBy.append(line)
-                                            line = line.replace('$'+key+c, str(constants[key].value)+ c)
-                                        else:
-                                            none_found = True
+                for line in commands:
+                    values = line.split(None, 1)
 
-                                if line.endswith('$'+key):
-                                    constants[key].usedBy.append(line)
-                                    line = line.replace('$'+key, str(constants[key].value))
+                    if len(values) == 0 or values[0] == 'const':
+                        continue
 
-                        commands_new.append(line)
+                    if '$' in line:
+                        del used[:]
+                        line = _constant_reference.sub(replace, line)
+
+                        for key in used:
+                            constants[key].usedBy.append(line)
+
+                    commands_new.append(line)
 
                 return commands_new
 
@@ -1646,164 +2375,42 @@ class kat(object):
                         self.addLine("% " + line[idx:], self.__currentTag)
                         line = line[:idx]
 
-                    first = line.split(" ",1)[0]
+                    first = line.split(None, 1)[0]
                     obj = None
 
-                    def get_ph():
-                        ph = Block.Placeholder()
-                        self.__blocks[self.__currentTag].contents.append(ph)
-                        return ph
-
-                    if(first == "m" or first == "m1" or first == "m2"):
-                        obj = pykat.components.mirror.parseFinesseText(line)
-                    elif(first == "s"):
-                        obj = pykat.components.space.parseFinesseText(line)
-                    elif(first == "l"):
-                        obj = pykat.components.laser.parseFinesseText(line)
-                    elif(first[:2] == "sq"):
-                        obj = pykat.components.squeezer.parseFinesseText(line)
-                    elif(first[0:2] == "bs"):
-                        obj = pykat.components.beamSplitter.parseFinesseText(line)
-                    elif(first[0:2] == "gr"):
-                        obj = pykat.components.grating.parseFinesseText(line)
-                    elif(first[0:5] == "dbs"):
-                        obj = pykat.components.dbs.parseFinesseText(line)
-                    elif(first[0:4] == "isol"):
-                        obj = pykat.components.isolator.parseFinesseText(line)
-                    elif(first[0:4] == "lens"):
-                        obj = pykat.components.lens.parseFinesseText(line)
-                    elif(first[0:3] == "mod"):
-                        obj = pykat.components.modulator.parseFinesseText(line)
-                    elif(first[0:2] == "ad"):
-                        obj = pykat.detectors.ad.parseFinesseText(line)
-                    elif(first[0:2] == "xd"):
-                        obj = pykat.detectors.xd.parseFinesseText(line)
-                    elif(first[0:3] == "tf3"):
-                        obj = pykat.commands.tf3.parseFinesseText(line)
-                    elif(first[0:3] == "tf2"):
-                        obj = pykat.commands.tf2.parseFinesseText(line)
-                    elif(first[0:2] == "tf"):
-                        obj = pykat.commands.tf.parseFinesseText(line)
-                    elif(first[0:2] == "cp"):
-                        obj = pykat.detectors.cp.parseFinesseText(line)
-                    elif(first[0:2] == "bp"):
-                        obj = pykat.detectors.bp.parseFinesseText(line)
-                    elif(first[0:4] == "gouy"):
-                        obj = pykat.detectors.gouy.parseFinesseText(line)
-                    elif(first[0:4] == "beam"):
-                        obj = pykat.detectors.beam.parseFinesseText(line)
-                    elif(first[0:2] == "pd" and first != "pdtype"):
-                        obj = pykat.detectors.pd.parseFinesseText(line)
-                    elif(first == "qshot" or first == "qshotS" or first == "qshotN"):
-                        obj = pykat.detectors.qshot.parseFinesseText(line)
-                    elif(first == "qnoised" or first == "qnoisedS" or first == "qnoisedN"):
-                        obj = pykat.detectors.qnoised.parseFinesseText(line)
-                    elif(first == "xaxis" or first == "xaxis*"):
-                        self.noxaxis = False
-                        obj = pykat.commands.xaxis.parseFinesseText(line)
-                    elif(first[0:2] == "hd"):
-                        obj = pykat.detectors.hd.parseFinesseText(line)
-                    elif(first.startswith("qhd")):
-                        obj = pykat.detectors.qhd.parseFinesseText(line)
-                    elif(first == "x2axis" or first == "x2axis*"):
-                        obj = pykat.commands.x2axis.parseFinesseText(line)
-                    elif(first == "gauss" or first == "gauss*" or first == "gauss**"):
-                        after_process[0].append((line, self.__currentTag))
-                    elif(first == "scale"):
-                        after_process[1].append((line, self.__currentTag))
-                    elif(first == "pdtype"):
-                        after_process[0].append((line, self.__currentTag))
-                    elif(first == "cav"):
-                        after_process[0].append((line, self.__currentTag, get_ph()))
-                    elif(first == "func"):
-                        after_process[0].append((line, self.__currentTag, get_ph()))
-                    elif(first == "var"):
-                        after_process[0].append((line, self.__currentTag, get_ph()))
-                    elif(first == "lock"):
-                        after_process[0].append((line, self.__currentTag, get_ph()))
-                    elif(first == "attr"):
-                        after_process[0].append((line, self.__currentTag))
-                    elif(first == "noxaxis"):
-                        self.noxaxis = True
-                    elif(first == 'multisig'):
-                        self.multisig = True
-                    elif(first == "lambda"):
-                        v = line.split()
-                        self.lambda0 = SIfloat(v[-1])
-                    elif(first == "powers"):
-                        v = line.split()
-                        if len(v) != 2:
-                            raise pkex.BasePyKatException("powers command `{0}` is incorrect.".format(line))
-                        self.powers = int(v[1])
-                    elif(first == "yaxis"):
-                        v = line.split(" ", 1)
-                        self.yaxis = v[-1]
-                    elif(first == "phase"):
-                        v = line.split()
-                        if len(v) != 2:
-                            raise pkex.BasePyKatException("phase command `{0}` is incorrect.".format(line))
-                        else:
-                            self.phase = int(v[1])
-                    elif(first == "maxtem"):
-                        v = line.split()
-                        if len(v) != 2:
-                            raise pkex.BasePyKatException("maxtem command `{0}` is incorrect.".format(line))
-                        else:
-                            if v[1] == "off":
-                                self.maxtem = -1
-                            else:
-                                self.maxtem = int(v[1])
-                    elif(first == "trace"):
-                        v = line.split()
-                        if len(v) > 2:
-                            raise pkex.BasePyKatException("Trace command `{0}` is incorrect.".format(line))
-                        elif len(v) == 2:
-                            self.trace = v[1]
-                    elif(first == "retrace"):
-                        v = line.split()
-                        if len(v) > 2:
-                            raise pkex.BasePyKatException("Retrace command `{0}` is incorrect.".format(line))
-                        elif len(v) == 2:
-                            self.retrace = v[1]
-                    elif(first == "deriv_h"):
-                        v = line.split()
-                        if len(v) != 2:
-                            raise pkex.BasePyKatException("deriv_h command `{0}` is incorrect.".format(line))
-                        else:
-                            self.deriv_h = float(v[1])
-                    elif(first == "gnuterm" or first == "pyterm"):
-                        if self.verbose:
-                            print ("Ignoring Gnuplot/Python terminal command '{0}'".format(line))
-                    elif(first == "fsig"):
-                        after_process[0].append((line, self.__currentTag, get_ph()))
-                    elif(first == "noplot"):
-                        after_process[1].append((line, self.__currentTag))
-                    elif(first == "put" or first == "put*"):
-                        after_process[1].append((line, self.__currentTag))
-                    elif(first == "const"):
+                    if first == "const":
                         if preserveConstants:
-                            v = line.split()
                             # if preserving the constant should be in the constants dictionary
-                            const = self.constants[v[1]]
+                            const = self.constants[line.split()[1]]
 
                             self.__blocks['NO_BLOCK'].contents.remove(const)
                             self.__blocks[self.__currentTag].contents.append(const)
-                        else:
-                            # If not preserving then just ignore the constant as it
-                            # has already been parsed and replaced in processConstants
-                            obj = None
-
-                    elif(first == "mf"):
-                        obj = None
-                        for _ in line.split()[1:]:
-                            self.mf.append(_)
-                    else:
+
+                        # If not preserving then just ignore the constant as it
+                        # has already been parsed and replaced in processConstants
+                        continue
+
+                    handler = _parse_handler(first)
+
+                    if handler is None:
                         if self.verbose:
                             print ("Parsing `{0}` into pykat object not implemented yet, added as extra line.".format(line))
 
-                        obj = line
                         # manually add the line to the block contents
                         self.addLine(line, self.__currentTag)
+                        continue
+
+                    elif type(handler) is tuple:
+                        if handler[1]:
+                            ph = Block.Placeholder()
+                            self.__blocks[self.__currentTag].contents.append(ph)
+                            after_process[handler[0]].append((line, self.__currentTag, ph))
+                        else:
+                            after_process[handler[0]].append((line, self.__currentTag))
+
+                        continue
+
+                    obj = handler(self, line)
 
                     if obj is not None and not isinstance(obj, six.string_types):
                         if self.hasNamedObject(obj.name):
@@ -2032,7 +2639,7 @@ class kat(object):
                 sys.exit(1)
 
     def _finesse_exec(self, binary_name="kat"):
-        from distutils.spawn import find_executable
+        from shutil import which as find_executable
 
         if len(self.__katdir) > 0:
             self.__finesse_dir = self.__katdir.strip()
@@ -2069,16 +2676,7 @@ class kat(object):
 
         kat_binary - Name of binary file to run
         """
-        p = Popen([self._finesse_exec(kat_binary), '-v'], stdout=PIPE, stderr=PIPE)
-
-        out, err = p.communicate()
-        
-        if err:
-            raise pkex.BasePyKatException("Error getting version: " + str(err.decode("utf-8")))
-
-        vals = str(out.decode("utf-8")).split()
-
-        return vals[2][1:-2] #Format: Finesse 2.2 (2.2-0-g994eac8), 03.07.2017
+        return _finesse_binary_version(self._finesse_exec(kat_binary))
 
     def finesse_syntax(self, page=1, kat_binary='kat'):
         """
@@ -2096,18 +2694,378 @@ class kat(object):
             else:
                 raise pkex.BasePyKatException("page must be 1 or 2")
 
-        p = Popen([self._finesse_exec(kat_binary), command_str], stdout=PIPE, stderr=PIPE)
+        p = Popen([self._finesse_exec(kat_binary), command_str], stdout=PIPE, stderr=PIPE)
+
+        out, err = p.communicate()
+
+        if err:
+            raise pkex.BasePyKatException("Error getting syntax: " + str(err.decode("utf-8")))
+
+        print(out.decode("utf-8"))
+        return out.decode("utf-8")
+
+    def _new_run_output(self, kat_exec, plot=None):
+        """
+        Returns an empty KatRun or KatRun2D for running the current simulation,
+        holding the kat script that will be run.
+        """
+        if hasattr(self, "x2axis") and self.noxaxis == False:
+            r = KatRun2D()
+        else:
+            r = KatRun()
+
+        r.yaxis = self.yaxis
+
+        r.katScript = "".join(self.generateKatScript())
+        r.katScript += "time\n"
+
+        r.katPath = kat_exec
+
+        if (plot==None):
+            # ensure we don't do any plotting. That should be handled
+            # by user themselves
+            r.katScript+=("gnuterm no\n")
+            r.katScript+=("pyterm no\n")
+        else:
+            r.katScript+=(plot+"\n")
+
+        return r
+
+    def _write_run_files(self, r, kat_exec, usePipe, binary_output, cmd_args, getTraceData):
+        """
+        Writes the script of r to a kat file and returns the file, the name of
+        the pykat pipe Finesse should make and the command to run Finesse with.
+        """
+        # create a kat file which we will write the script into
+        if self.__tempname is None:
+            katfile = tempfile.NamedTemporaryFile(mode ='w', suffix=".kat", dir=self.__tempdir, delete=False)
+        else:
+            filepath =os.path.join(self.__tempdir, self.__tempname+".kat" )
+            katfile = open( filepath, 'w' )
+
+        katfile.writelines(r.katScript)
+        katfile.flush()
+
+        pipe_name = katfile.name + str(uuid.uuid4())
+
+        if usePipe:
+            cmd=[kat_exec, "--pykat=" + pipe_name]
+        else:
+            cmd=[kat_exec, "--perl1"]
+
+        if self.__time_code:
+            cmd.append('--perf-timing')
+
+        if binary_output:
+            cmd.append('-binary-output')
+
+        if cmd_args != None:
+            cmd.extend(cmd_args)
+
+        if getTraceData:
+            cmd.append('--trace')
+
+        cmd.append('--no-backspace')
+        # set default format so that less repeated numbers are printed to the
+        # output file, should speed up running and parsing of output files
+        cmd.append('-format=%.15g')
+
+        cmd.append(katfile.name)
+
+        if sys.platform == "win32" or sys.platform == "cygwin":
+            # Pipes in windows need to be prefixed with a hidden location.
+            pipe_name = "\\\\.\\pipe\\" + pipe_name
+
+        return katfile, pipe_name, cmd
+
+    def _run_cache_lookup(self, cache, r, kat_exec, saving, options):
+        """
+        Finds the cache to use for running r and looks up its output. Returns
+        the cache, the key of this run in it and the cached output, with a
+        None key when the cache isn't used and a None output on a miss.
+        """
+        if cache is None:
+            cache = pykat.cache.get_default()
+
+        if cache is None or cache is False or saving:
+            return (None, None, None)
+
+        cache_key = cache.key(r.katScript, options, kat_exec, _finesse_binary_version(kat_exec))
+        cached = cache.get(cache_key)
+
+        if cached is not None and self.verbose:
+            print("Using the cached output of an identical run")
+
+        return (cache, cache_key, cached)
+
+    def _read_pykat_pipe(self, r, pipe_name, p, ignore_lockloss=True, callback=None):
+        """
+        Connects to the pykat pipe of the Finesse process p and reads it until
+        Finesse closes it, calling callback(tag, value) for each line. The
+        time taken to connect is stored in r.timings and the time at which
+        it connected is returned.
+        """
+        _start = time.time()
+        fifo = None
+
+        try:
+            fifo = _open_pykat_pipe(pipe_name, p)
+            _connected = time.time()
+            r.timings["connect"] = _connected - _start
+
+            if fifo is not None:
+                for line in fifo:
+                    (tag, value) = self._read_pipe_line(r, line, ignore_lockloss)
+
+                    if callback is not None:
+                        callback(tag, value)
+        finally:
+            if fifo is not None:
+                fifo.close()
+
+            if not sys.platform in ("win32", "cygwin"):
+                _remove_pipe(pipe_name)
+
+        return _connected
+
+    def _read_pipe_line(self, r, line, ignore_lockloss=True):
+        """
+        Handles a line sent by Finesse over the pykat pipe, returning its tag
+        and value. Progress values are returned as (percent, status).
+        """
+        v = line.split(u":", 1)
+
+        if len(v) != 2:
+            return (None, None)
+
+        (tag, line) = v
+
+        if tag == "version":
+            r.katVersion = line.strip()
+            return (tag, r.katVersion)
+        elif tag == "lock_fail":
+            if not ignore_lockloss:
+                raise pkex.LockLossException(line.strip())
+            else:
+                print("\nLock loss ocurred during step {}\n".format(line.strip()))
+
+            return (tag, line.strip())
+        elif tag == "progress":
+            var = line.split("\t")
+
+            if len(var) == 3:
+                return (tag, (int(var[1]), var[0] + " " + var[2][:-1]))
+
+        return (tag, None)
+
+    def _finish_run(self, r, returncode, stdout, stderr, katfile, usePipe=True, getTraceData=False,
+                    save_kat=False, kat_name=None, save_output=False, binary_output=False, keep_outfile=False):
+        """
+        Reads the outputs of a finished Finesse process into r, returning
+        what kat.run returns for it.
+        """
+        _start_parse = time.time()
+
+        r.stdout = stdout
+        r.stderr = stderr
+
+        k = r.stdout.rfind('computation time:')
+
+        if usePipe == False:
+            # Set version if not using pipe information
+            s = r.stdout.find('(build ') + 7
+            e = r.stdout[s:].find(')')
+
+            if s == -1 or e == -1:
+                r.katVersion = "Couldn't get version number"
+            else:
+                r.katVersion = r.stdout[s:(s+e)]
+
+        if k > 0:
+            try:
+                line = r.stdout[k:]
+                r.runtime = float(line.split(":")[1].replace("s",""))
+            except:
+                r.runtime = 0.0
+
+        r.runDateTime = datetime.datetime.now()
+
+        # If Finesse returned an error, just print that and exit!
+        if returncode != 0:
+            raise pkex.FinesseRunError(r.stderr, katfile.name)
+
+        self.__prevrunfilename = katfile.name
+
+        root = os.path.splitext(katfile.name)
+        base = os.path.basename(root[0])
+        path = os.path.split(katfile.name)[0]
+
+        if self.verbose: print("Used Finesse %s at %s" % (r.katVersion, r.katPath))
+
+        traceData = None
+
+        if getTraceData:
+            # First see if we have any trace files
+
+            traceFiles = [file for file in os.listdir(path) if file.endswith(".trace") and file.startswith(base)]
+
+            #print("Found %i trace files" % len(traceFiles))
+            #print(path)
+            #print(traceFiles)
+
+            if len(traceFiles) > 0:
+                import fileinput
+                traceData = []
+
+                for file in traceFiles:
+                    traceData.append({})
+                    try:
+                        ifile = fileinput.input(os.path.join(path, file))
+
+                        for line in ifile:
+                            line = line.strip()
+
+                            if len(line) > 0:
+                                a = line.split(':', 1)
+
+                                if a[0].isdigit():
+                                    values = a[1].split()
+
+                                    node_name = values[1].split("(")[0]
+                                    component_name = values[2].split("(")[0]
+
+                                    line1x = ifile.readline().replace('(','').replace(')','')
+                                    line2x = ifile.readline().replace('(','').replace(')','')
+                                    line1y = ifile.readline().replace('(','').replace(')','')
+                                    line2y = ifile.readline().replace('(','').replace(')','')
+
+                                    spqx = line2x.strip().split("gamma")
+                                    spqy = line2y.strip().split("gamma")
+
+                                    nr = values[4].split("=")[1]
+                                    qx = spqx[0].split("=")[1].replace('i','j').replace(' ','')
+                                    qy = spqy[0].split("=")[1].replace('i','j').replace(' ','')
+
+                                    traceData[-1][node_name] = (pykat.BeamParam(q=complex(qx), nr=nr, wavelength=self.lambda0),
+                                                                pykat.BeamParam(q=complex(qy), nr=nr, wavelength=self.lambda0),
+                                                                component_name)
+
+                                    direc = a[1].split(";")[-1].strip().split(None, 1)[-1]
+
+                                    traceData[-1][node_name][0].direction = direc
+                                    traceData[-1][node_name][1].direction = direc
+
+                    finally:
+                        ifile.close()
+                        os.remove(os.path.join(path, file))
+
+        r.save_input = save_kat
+
+        katfile.close()
+
+        if save_kat:
+            if kat_name is None:
+                kat_name = "pykat_output"
+
+            cwd = os.path.os.getcwd()
+            newkatfile = os.path.join(cwd, kat_name + ".kat")
+
+            if os.path.isfile(newkatfile):
+                os.remove(newkatfile)
+
+            os.rename(katfile.name, newkatfile)
+
+            r.infile = newkatfile
+
+            if self.verbose: print("Kat file saved to '{0}'".format(newkatfile))
+        else:
+            os.remove(katfile.name)
+
+        def _process_out_file(r, outfile):
+            if r.save_output:
+                newoutfile = "{0}.out".format(base)
+
+                cwd = os.path.os.getcwd()
+                newoutfile = os.path.join(cwd,newoutfile)
+
+                if os.path.isfile(newoutfile):
+                    os.remove(newoutfile)
+
+                os.rename(outfile, newoutfile)
+
+                r.outfile = newoutfile
+                outfile = newoutfile
+
+                if self.verbose: print("Output data saved to '{0}'".format(newoutfile))
+
+            if hasattr(self, "x2axis") and self.noxaxis == False:
+                [r.x, r.y, r.z, hdr] = self.readOutFile(outfile, binary_output)
+
+                r.xlabel = hdr[0]
+                r.ylabel = hdr[1]
+                r.zlabels = [s.strip() for s in hdr[2:]]
+            else:
+                [r.x, r.y, hdr] = self.readOutFile(outfile, binary_output)
+
+                r.xlabel = hdr[0]
+                r.ylabels = [s.strip() for s in hdr[1:]]
+
+            if keep_outfile:
+                r.outfile = outfile
+            elif not r.save_output:
+                if binary_output and sys.platform == "win32":
+                    # mapped files can't be removed on windows so copy the data out first
+                    for _ in ("x", "y", "z"):
+                        if isinstance(getattr(r, _, None), np.memmap):
+                            setattr(r, _, np.array(getattr(r, _)))
+
+                # data stays accessible from the memory map after removing the file
+                os.remove(outfile)
+
+            r.timings["parse"] = time.time() - _start_parse
+
+        r.save_output = save_output
+
+        if not self.multisig:
+            outfile = root[0] + ".out"
+            _process_out_file(r, outfile)
+            rtn = [r]
+        else:
+            multisigs = sorted({_.name for _ in self.signals.targets})
+            rtn = {}
+
+            for sig in multisigs:
+                rtn[sig] = copy.deepcopy(r)
+                outfile = root[0] + "." + sig + ".out"
+                _process_out_file(rtn[sig], outfile)
+
+        perfData = []
+
+        if sys.version > '3':
+            long = int
+
+        if self.__time_code:
+            with open(root[0] + ".perf",'r') as perffile:
+                for l in perffile.readlines():
+                    vals = l.strip().split()
+                    perfData.append((vals[0], long(vals[1]), long(vals[2])))
+                    #perfData.append((vals[0], float(vals[1]), float(vals[2]), float(vals[3])))
+
+            os.remove(root[0] + ".perf")
 
-        out, err = p.communicate()
+            rtn.append(perfData)
 
-        if err:
-            raise pkex.BasePyKatException("Error getting syntax: " + str(err.decode("utf-8")))
+        if getTraceData:
+            rtn.append(traceData)
 
-        print(out.decode("utf-8"))
-        return out.decode("utf-8")
+        if isinstance(rtn, list) and len(rtn) == 1:
+            rtn = rtn[0]
+
+        return rtn
 
     def run(self, plot=None, save_output=False, save_kat=False, kat_name=None, cmd_args=None,
-            getTraceData=False, rethrowExceptions=False, usePipe=True, binary_output=False, ignore_lockloss=True, kat_binary="kat"):
+            getTraceData=False, rethrowExceptions=False, usePipe=True, binary_output=None, ignore_lockloss=True, kat_binary="kat",
+            timeout=None, split=None, cache=None, keep_outfile=False, callback=None):
         """
         Runs the current simulation setup that has been built thus far.
         It returns a KatRun or KatRun2D object which is populated with the various
@@ -2123,7 +3081,13 @@ class kat(object):
 
         cmd_args (list of strings) - command line flags to pass to FINESSE
         
-        binary_output (bool) - If true, it asks Finesse to pass data to Pykat in a binary format.
+        binary_output (bool) - If true, it asks Finesse to pass data to Pykat in a binary format,
+                            which is memory mapped rather than read in. If None the binary format
+                            is used if the Finesse binary supports it.
+
+        keep_outfile (bool) - If true the temporary output file is kept as the backing store of the
+                            memory mapped outputs and its path stored in the output's outfile.
+                            Otherwise it is deleted once read.
         
         getTraceData (bool) - If true a list of dictionaries is returned along with the
                             output file. Each dictionary is the result of the beam tracing
@@ -2138,85 +3102,92 @@ class kat(object):
         rethrowExceptions - if true exceptions will be thrown again rather than being excepted and calling sys.exit()
         ignore_lockloss   - When True locklosses are ignored and a warning is shown if verbose is True
         kat_binary        - Name of binary in $FINESSE_DIR to use
+        timeout           - Maximum time in seconds Finesse is allowed to run for, after which
+                            it is killed and a FinesseTimeout exception is raised
+        split             - If set the xaxis is cut into this many contiguous chunks which are
+                            run as separate Finesse processes at the same time, see `run_split`
+        cache             - A pykat.cache.RunCache to look up and store the output of this run in,
+                            False to not use a cache, or None to use the default cache if one has
+                            been enabled with pykat.cache.enable()
+        callback          - A function called as callback(tag, value) while Finesse runs, see below
+
+        The callback is given each message Finesse sends over the pykat pipe:
+        ("version", str), ("progress", (percent, status)) and ("lock_fail", step).
+        With text outputs it is also given ("rows", array) with the data rows
+        Finesse has written to its output file since the last message, so a
+        binary_output of None picks text outputs when a callback is used. If
+        the callback returns True Finesse is stopped and a FinesseRunAborted
+        exception raised holding the rows read so far, for example to give up
+        on a sweep once the lock is lost:
+
+            kat.run(callback=lambda tag, value: tag == "lock_fail", rethrowExceptions=True)
+
+        Outputs found in the cache are returned without calling the callback.
+        See `run_stream` for a generator of these messages.
         """
         start = time.time()
+        watchdog = None
+        monitor = None
+        p = None
 
         try:
+            if split is not None and split > 1:
+                if save_output or save_kat or getTraceData or self.__time_code or callback is not None:
+                    raise pkex.BasePyKatException("save_output, save_kat, getTraceData, timeCode and callback cannot be used with a split run")
+
+                return self.run_split(split, plot=plot, cmd_args=cmd_args, usePipe=usePipe,
+                                      binary_output=binary_output, ignore_lockloss=ignore_lockloss,
+                                      kat_binary=kat_binary, timeout=timeout)
+
             if not hasattr(self, "xaxis") and self.noxaxis != None and self.noxaxis == False:
                 raise pkex.BasePyKatException("No xaxis was defined")
 
             kat_exec = self._finesse_exec(kat_binary)
+            _check_finesse_version(kat_exec)
+
+            if binary_output is None:
+                # rows can only be streamed from text outputs
+                binary_output = callback is None and _finesse_has_binary_output(kat_exec)
 
             if self.verbose: print ("--------------------------------------------------------------")
             if self.verbose: print ("Running kat - Started at " + str(datetime.datetime.fromtimestamp(start)))
 
-            if hasattr(self, "x2axis") and self.noxaxis == False:
-                r = KatRun2D()
-            else:
-                r = KatRun()
-
-            r.yaxis = self.yaxis
+            r = self._new_run_output(kat_exec, plot)
 
-            r.katScript = "".join(self.generateKatScript())
-            r.katScript += "time\n"
+            cache, cache_key, cached = self._run_cache_lookup(cache, r, kat_exec, save_output or save_kat,
+                                                              (usePipe, binary_output, getTraceData, self.__time_code, ignore_lockloss, cmd_args))
 
-            r.katPath = kat_exec
+            if cached is not None:
+                return cached
 
-            if (plot==None):
-                # ensure we don't do any plotting. That should be handled
-                # by user themselves
-                r.katScript+=("gnuterm no\n")
-                r.katScript+=("pyterm no\n")
-            else:
-                r.katScript+=(plot+"\n")
-
-            # create a kat file which we will write the script into
-            if self.__tempname is None:
-                katfile = tempfile.NamedTemporaryFile(mode ='w', suffix=".kat", dir=self.__tempdir, delete=False)
-            else:
-                filepath =os.path.join(self.__tempdir, self.__tempname+".kat" )
-                katfile = open( filepath, 'w' )
-
-            katfile.writelines(r.katScript)
-            katfile.flush()
-
-            pipe_name = katfile.name + str(uuid.uuid4())
-
-            if usePipe:
-                cmd=[kat_exec, "--pykat=" + pipe_name]
-            else:
-                cmd=[kat_exec, "--perl1"]
-
-            if self.__time_code:
-                cmd.append('--perf-timing')
-            
-            if binary_output:
-                cmd.append('-binary-output')
-                
-            if cmd_args != None:
-                cmd.extend(cmd_args)
-
-            if getTraceData:
-                cmd.append('--trace')
-
-            cmd.append('--no-backspace')
-            # set default format so that less repeated numbers are printed to the
-            # output file, should speed up running and parsing of output files
-            cmd.append('-format=%.15g')
-
-            cmd.append(katfile.name)
+            katfile, pipe_name, cmd = self._write_run_files(r, kat_exec, usePipe, binary_output, cmd_args, getTraceData)
 
-            if sys.platform == "win32" or sys.platform == "cygwin":
-            	# Pipes in windows need to be prefixed with a hidden location.
-            	pipe_name = "\\\\.\\pipe\\" + pipe_name
+            if callback is not None:
+                monitor = _RunMonitor(callback, None if binary_output or self.multisig else os.path.splitext(katfile.name)[0] + ".out")
 
             _stdout = tempfile.TemporaryFile()
             _stderr = tempfile.TemporaryFile()
 
+            r.timings["prepare"] = time.time() - start
+            _start_kat = time.time()
+
             # Using PIPE for out/err is limited to 2^16 characters and will deadlock
             # the process if alot of warnings are printed, using tempfiles instead
             p = Popen(cmd, stderr=_stderr, stdout=_stdout)
 
+            r.timings["spawn"] = time.time() - _start_kat
+
+            if timeout is not None:
+                timed_out = threading.Event()
+
+                def _stop():
+                    timed_out.set()
+                    p.kill()
+
+                watchdog = threading.Timer(timeout, _stop)
+                watchdog.daemon = True
+                watchdog.start()
+
             if self.verbose:
                 if self.noxaxis:
                     maxval = 1
@@ -2227,264 +3198,571 @@ class kat(object):
 
                 pb = progressbar.ProgressBar(widgets=widgets, maxval = maxval)
 
-            fifo = None
-
-            _start_kat = time.time()
-
-            duration = 5 # Duration for searching for open pipe
+            def _progress(tag, value):
+                if tag == "progress" and self.verbose and value is not None:
+                    pb.currval = value[0]
+                    pb.widgets[-1] = value[1]
+                    pb.update()
 
-            try:
-                if usePipe == True:
-                    while fifo is None:
-                        try:
-                            if time.time() < _start_kat + duration:
-                                time.sleep(0.001)
+                if monitor is not None:
+                    monitor(tag, value)
 
-                                if six.PY2:
-                                    fifo = codecs.open(pipe_name, "r", "utf-8")
-                                else:
-                                    fifo = open(pipe_name, "r", encoding="utf-8")
+            _connected = time.time()
 
-                                self.__looking = False
-                            else:
-                                raise pkex.BasePyKatException("Could not connect to pykat pipe in {0} seconds. Ensure you are using Finesse >= v2.1 and Pykat >= v1.0.0. Or set usePipe=False when making kat object.".format(duration))
-                        except FileNotFoundError as ex:
-                            if self.verbose:
-                                if not self.__looking:
-                                    self.__looking = True
+            if usePipe == True:
+                _connected = self._read_pykat_pipe(r, pipe_name, p, ignore_lockloss, _progress)
 
-                    if fifo is not None:
-                        for line in fifo:
-                            v = line.split(u":", 1)
+            p.wait()
 
-                            if len(v) != 2:
-                                continue
+            r.timings.setdefault("connect", 0)
+            r.timings["compute"] = time.time() - _connected
 
-                            (tag, line) = v
+            if watchdog is not None:
+                watchdog.cancel()
 
-                            if tag == "version":
-                                r.katVersion = line.strip()
-                            elif tag == "lock_fail":
-                                if not ignore_lockloss:
-                                    raise pkex.LockLossException(line.strip())
-                                else:
-                                    print("\nLock loss ocurred during step {}\n".format(line.strip()))
-                                        
-                            elif tag == "progress" and self.verbose:
-                                var = line.split("\t")
-
-                                if len(var) == 3:
-                                    pb.currval = int(var[1])
-                                    pb.widgets[-1] = var[0] + " " + var[2][:-1]
-                                    pb.update()
-            finally:
-            	if fifo is not None:
-            		fifo.close()
+                if timed_out.is_set():
+                    raise pkex.FinesseTimeout(timeout)
 
-            p.wait()
+            if monitor is not None:
+                monitor.finish()
 
             _stdout.seek(0)
             _stderr.seek(0)
 
-            r.stdout = _stdout.read().decode('utf-8', 'replace')
-            r.stderr = _stderr.read().decode('utf-8', 'replace')
+            stdout = _stdout.read().decode('utf-8', 'replace')
+            stderr = _stderr.read().decode('utf-8', 'replace')
 
             _stderr.close()
             _stdout.close()
 
-            k = r.stdout.rfind('computation time:')
+            rtn = self._finish_run(r, p.returncode, stdout, stderr, katfile, usePipe=usePipe,
+                                   getTraceData=getTraceData, save_kat=save_kat, kat_name=kat_name,
+                                   save_output=save_output, binary_output=binary_output,
+                                   keep_outfile=keep_outfile)
 
-            if usePipe == False:
-                # Set version if not using pipe information
-                s = r.stdout.find('(build ') + 7
-                e = r.stdout[s:].find(')')
+            if cache_key is not None:
+                cache.put(cache_key, rtn)
 
-                if s == -1 or e == -1:
-                    r.katVersion = "Couldn't get version number"
-                else:
-                    r.katVersion = r.stdout[s:(s+e)]
+            return rtn
+        except KeyboardInterrupt as ex:
+            pkex.printWarning("Keyboard interrupt caught, stopped simulation.")
+        except (pkex.FinesseRunAborted, pkex.FinesseTimeout) as ex:
+            if p is not None:
+                # a timeout from a split run has been cleaned up by its chunk
+                p.kill()
+                p.wait()
 
-            if k > 0:
-                try:
-                    line = r.stdout[k:]
-                    r.runtime = float(line.split(":")[1].replace("s",""))
-                except:
-                    r.runtime = 0.0
+                _stdout.close()
+                _stderr.close()
+                _remove_run_files(katfile)
+
+            if rethrowExceptions:
+                raise ex
+            else:
+                pkex.PrintError("Run stopped:", ex)
+        except pkex.FinesseRunError as ex:
+            pykat.lastErrorKat = self
+
+            if rethrowExceptions:
+                raise ex
+            else:
+                pkex.PrintError("Error from Finesse (See 'pykat.lastErrorKat' for kat object):", ex)
+
+        except pkex.BasePyKatException as ex:
+            if rethrowExceptions:
+                raise ex
+            else:
+                pkex.PrintError("Error from pykat:", ex)
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
 
-            r.runDateTime = datetime.datetime.now()
+            if monitor is not None:
+                monitor.close()
 
-            # If Finesse returned an error, just print that and exit!
-            if p.returncode != 0:
-                raise pkex.FinesseRunError(r.stderr, katfile.name)
+            if self.verbose:
+                print ("")
+                print ("Finished in {0:g} seconds".format(float(time.time() - start)))
 
-            self.__prevrunfilename = katfile.name
+    async def run_async(self, plot=None, save_output=False, save_kat=False, kat_name=None, cmd_args=None,
+                        getTraceData=False, binary_output=None, ignore_lockloss=True, kat_binary="kat",
+                        timeout=None, cache=None, keep_outfile=False, callback=None):
+        """
+        Runs the current simulation as an asyncio coroutine, returning the same
+        outputs as `run` without blocking the event loop while Finesse runs.
+        Many runs can be in flight at once, for example limited by a semaphore:
 
-            root = os.path.splitext(katfile.name)
-            base = os.path.basename(root[0])
-            path = os.path.split(katfile.name)[0]
+            sem = asyncio.Semaphore(32)
 
-            if self.verbose: print("Used Finesse %s at %s" % (r.katVersion, r.katPath))
+            async def run(kat):
+                async with sem:
+                    return await kat.run_async()
 
-            traceData = None
+            outs = await asyncio.gather(*(run(kat) for kat in kats))
 
-            if getTraceData:
-                # First see if we have any trace files
+        Cancelling the task running this stops Finesse. Unlike `run` errors are
+        always raised rather than printed, no progress bar is shown and the
+        pykat pipe is always used. See `run` for the arguments, including the
+        callback.
+        """
+        import asyncio
 
-                traceFiles = [file for file in os.listdir(path) if file.endswith(".trace") and file.startswith(base)]
+        start = time.time()
 
-                #print("Found %i trace files" % len(traceFiles))
-                #print(path)
-                #print(traceFiles)
+        if not hasattr(self, "xaxis") and self.noxaxis != None and self.noxaxis == False:
+            raise pkex.BasePyKatException("No xaxis was defined")
 
-                if len(traceFiles) > 0:
-                    import fileinput
-                    traceData = []
+        kat_exec = self._finesse_exec(kat_binary)
+        _check_finesse_version(kat_exec)
 
-                    for file in traceFiles:
-                        traceData.append({})
-                        try:
-                            ifile = fileinput.input(os.path.join(path, file))
+        if binary_output is None:
+            binary_output = callback is None and _finesse_has_binary_output(kat_exec)
 
-                            for line in ifile:
-                                line = line.strip()
+        r = self._new_run_output(kat_exec, plot)
 
-                                if len(line) > 0:
-                                    a = line.split(':', 1)
+        cache, cache_key, cached = self._run_cache_lookup(cache, r, kat_exec, save_output or save_kat,
+                                                          (True, binary_output, getTraceData, self.__time_code, ignore_lockloss, cmd_args))
 
-                                    if a[0].isdigit():
-                                        values = a[1].split()
+        if cached is not None:
+            return cached
 
-                                        node_name = values[1].split("(")[0]
-                                        component_name = values[2].split("(")[0]
+        katfile, pipe_name, cmd = self._write_run_files(r, kat_exec, True, binary_output, cmd_args, getTraceData)
 
-                                        line1x = ifile.readline().replace('(','').replace(')','')
-                                        line2x = ifile.readline().replace('(','').replace(')','')
-                                        line1y = ifile.readline().replace('(','').replace(')','')
-                                        line2y = ifile.readline().replace('(','').replace(')','')
+        monitor = None
 
-                                        spqx = line2x.strip().split("gamma")
-                                        spqy = line2y.strip().split("gamma")
+        if callback is not None:
+            monitor = _RunMonitor(callback, None if binary_output or self.multisig else os.path.splitext(katfile.name)[0] + ".out")
 
-                                        nr = values[4].split("=")[1]
-                                        qx = spqx[0].split("=")[1].replace('i','j').replace(' ','')
-                                        qy = spqy[0].split("=")[1].replace('i','j').replace(' ','')
+        _stdout = tempfile.TemporaryFile()
+        _stderr = tempfile.TemporaryFile()
 
-                                        traceData[-1][node_name] = (pykat.BeamParam(q=complex(qx), nr=nr, wavelength=self.lambda0),
-                                                                    pykat.BeamParam(q=complex(qy), nr=nr, wavelength=self.lambda0),
-                                                                    component_name)
+        p = None
+        finished = False
+        closed = False
 
-                                        direc = a[1].split(";")[-1].strip().split(None, 1)[-1]
+        try:
+            r.timings["prepare"] = time.time() - start
+            _start_kat = time.time()
 
-                                        traceData[-1][node_name][0].direction = direc
-                                        traceData[-1][node_name][1].direction = direc
+            p = await asyncio.create_subprocess_exec(*cmd, stdout=_stdout, stderr=_stderr)
 
-                        finally:
-                            ifile.close()
+            r.timings["spawn"] = time.time() - _start_kat
 
-            r.save_input = save_kat
+            try:
+                await asyncio.wait_for(self._wait_async(r, pipe_name, p, ignore_lockloss, monitor), timeout)
+                finished = True
+            except asyncio.TimeoutError:
+                raise pkex.FinesseTimeout(timeout)
+        except GeneratorExit:
+            # the coroutine was closed rather than cancelled, for example by
+            # its loop closing, so nothing can be awaited any more
+            closed = True
+            raise
+        finally:
+            if p is not None and p.returncode is None:
+                if closed:
+                    _kill_process(p.pid)
+                else:
+                    try:
+                        p.kill()
+                    except ProcessLookupError:
+                        pass
 
-            if save_kat:
-                if kat_name is None:
-                    kat_name = "pykat_output"
+                    await p.wait()
 
-                cwd = os.path.os.getcwd()
-                newkatfile = os.path.join(cwd, kat_name + ".kat")
+            if not sys.platform in ("win32", "cygwin"):
+                _remove_pipe(pipe_name)
 
-                if os.path.isfile(newkatfile):
-                    os.remove(newkatfile)
+            if not finished:
+                # stopped or cancelled runs leave nothing behind
+                _stdout.close()
+                _stderr.close()
+                _remove_run_files(katfile)
 
-                os.rename(katfile.name, newkatfile)
+                if monitor is not None:
+                    monitor.close()
 
-                r.infile = newkatfile
+        if monitor is not None:
+            monitor.finish()
 
-                if self.verbose: print("Kat file saved to '{0}'".format(newkatfile))
+        _stdout.seek(0)
+        _stderr.seek(0)
 
-            def _process_out_file(r, outfile):
-                if r.save_output:
-                    newoutfile = "{0}.out".format(base)
+        stdout = _stdout.read().decode('utf-8', 'replace')
+        stderr = _stderr.read().decode('utf-8', 'replace')
 
-                    cwd = os.path.os.getcwd()
-                    newoutfile = os.path.join(cwd,newoutfile)
+        _stderr.close()
+        _stdout.close()
 
-                    if os.path.isfile(newoutfile):
-                        os.remove(newoutfile)
+        rtn = self._finish_run(r, p.returncode, stdout, stderr, katfile, usePipe=True,
+                               getTraceData=getTraceData, save_kat=save_kat, kat_name=kat_name,
+                               save_output=save_output, binary_output=binary_output,
+                               keep_outfile=keep_outfile)
 
-                    os.rename(outfile, newoutfile)
+        if cache_key is not None:
+            cache.put(cache_key, rtn)
 
-                    r.outfile = newoutfile
-                    outfile = newoutfile
+        return rtn
 
-                    if self.verbose: print("Output data saved to '{0}'".format(newoutfile))
-                    
-                if hasattr(self, "x2axis") and self.noxaxis == False:
-                    [r.x, r.y, r.z, hdr] = self.readOutFile(outfile, binary_output)
+    async def _wait_async(self, r, pipe_name, p, ignore_lockloss=True, callback=None):
+        """
+        Reads the pykat pipe of the asyncio subprocess p until Finesse closes
+        it, calling callback(tag, value) for each line, then waits for
+        Finesse to finish.
+        """
+        import asyncio
 
-                    r.xlabel = hdr[0]
-                    r.ylabel = hdr[1]
-                    r.zlabels = [s.strip() for s in hdr[2:]]
-                else:
-                    [r.x, r.y, hdr] = self.readOutFile(outfile, binary_output)
+        _start = time.time()
 
-                    r.xlabel = hdr[0]
-                    r.ylabels = [s.strip() for s in hdr[1:]]
+        if sys.platform.startswith("linux"):
+            reader, transport = await _open_pykat_pipe_async(pipe_name, p)
+            _connected = time.time()
 
-            r.save_output = save_output
-            
-            if not self.multisig:
-                outfile = root[0] + ".out"
-                _process_out_file(r, outfile)
-                rtn = [r]
-            else:
-                multisigs = sorted({_.name for _ in self.signals.targets})
-                rtn = {}
-                
-                for sig in multisigs:
-                    rtn[sig] = copy.deepcopy(r)
-                    outfile = root[0] + "." + sig + ".out"
-                    _process_out_file(rtn[sig], outfile)
-                
-            katfile.close()
-            perfData = []
-
-            if sys.version > '3':
-                long = int
-
-            if self.__time_code:
-                perffile = open(root[0] + ".perf",'r')
+            if reader is not None:
+                try:
+                    while True:
+                        line = await reader.readline()
 
-                for l in perffile.readlines():
-                    vals = l.strip().split()
-                    perfData.append((vals[0], long(vals[1]), long(vals[2])))
-                    #perfData.append((vals[0], float(vals[1]), float(vals[2]), float(vals[3])))
+                        if not line:
+                            break
 
-                rtn.append(perfData)
+                        (tag, value) = self._read_pipe_line(r, line.decode("utf-8", "replace"), ignore_lockloss)
 
-            if getTraceData:
-                rtn.append(traceData)
+                        if callback is not None:
+                            callback(tag, value)
+                finally:
+                    transport.close()
 
-            if len(rtn) == 1:
-                return rtn[0]
-            else:
-                return rtn
-        except KeyboardInterrupt as ex:
-            pkex.printWarning("Keyboard interrupt caught, stopped simulation.")
-        except pkex.FinesseRunError as ex:
-            pykat.lastErrorKat = self
+            r.timings["connect"] = _connected - _start
+        else:
+            # Other platforms can't reliably wait on a pipe that Finesse hasn't
+            # connected to yet, so it is read in a thread instead
+            loop = asyncio.get_event_loop()
+            _connected = await loop.run_in_executor(None, self._read_pykat_pipe, r, pipe_name, p, ignore_lockloss, callback)
 
-            if rethrowExceptions:
-                raise ex
+        await p.wait()
+
+        r.timings["compute"] = time.time() - _connected
+
+    def run_stream(self, **kwargs):
+        """
+        Runs the current simulation in a background thread, yielding the
+        (tag, value) messages described in `run` as Finesse sends them, ending
+        with ("output", out) where out is what `run` returns:
+
+            for tag, value in kat.run_stream(binary_output=False):
+                if tag == "rows" and np.any(value[:, 1] > 1):
+                    break # stops Finesse
+                elif tag == "output":
+                    out = value
+
+        Closing the generator, or breaking out of the loop, stops Finesse at
+        its next message. Errors are raised by the generator. Keyword arguments
+        are passed to `run`.
+        """
+        messages = six.moves.queue.Queue()
+        stop = threading.Event()
+        result = {}
+
+        def _callback(tag, value):
+            messages.put((tag, value))
+            return stop.is_set()
+
+        def _run():
+            try:
+                result["out"] = self.run(callback=_callback, rethrowExceptions=True, **kwargs)
+            except BaseException as ex:
+                result["error"] = ex
+            finally:
+                messages.put(None)
+
+        thread = threading.Thread(target=_run)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            while True:
+                message = messages.get()
+
+                if message is None:
+                    break
+
+                yield message
+        finally:
+            stop.set()
+            thread.join()
+
+        if "error" in result:
+            raise result["error"]
+
+        yield ("output", result["out"])
+
+    def run_split(self, split, max_workers=None, **kwargs):
+        """
+        Runs the simulation by cutting the xaxis into `split` contiguous chunks,
+        each of which is run as a separate Finesse process at the same time. The
+        outputs are then merged into a single KatRun or KatRun2D with the same
+        layout as a serial run would give. For 2D runs the xaxis is split, each
+        chunk computing every x2axis point.
+
+        Each chunk shares its first xaxis point with the last point of the chunk
+        before it, so the chunks exactly reproduce the serial xaxis values. The
+        `chunks` attribute of the output lists which rows, [start, stop), of
+        the output each chunk produced along with the script it ran.
+
+        Lock commands and `retrace off` make each step depend on the steps before
+        it, so models using either cannot be split.
+
+        split       - Number of chunks to split the xaxis into, at most the number of xaxis steps
+        max_workers - Number of chunks to run at once, defaults to all of them
+        kwargs      - Passed on to `kat.run` for each chunk
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not hasattr(self, "xaxis") or self.noxaxis:
+            raise pkex.BasePyKatException("Only runs with an xaxis can be split")
+
+        if any(_.enabled for _ in self.getAll(pykat.commands.lock)):
+            raise pkex.BasePyKatException("Runs with lock commands cannot be split as each step depends on the previous one")
+
+        if self.retrace is not None and str(self.retrace).strip() == "off":
+            raise pkex.BasePyKatException("Runs with 'retrace off' cannot be split as the beam trace depends on the first step")
+
+        steps = self.xaxis.steps
+        split = min(int(split), steps)
+        lower, upper = self.xaxis.limits
+
+        def axis_value(i):
+            if i == 0:
+                return lower
+            elif i == steps:
+                return upper
+            elif self.xaxis.scale == "log":
+                return lower * (upper/lower)**(i/steps)
             else:
-                pkex.PrintError("Error from Finesse (See 'pykat.lastErrorKat' for kat object):", ex)
+                return lower + (upper-lower) * i/steps
 
-        except pkex.BasePyKatException as ex:
-            if rethrowExceptions:
-                raise ex
+        bounds = np.linspace(0, steps, split+1).round().astype(int)
+        kats = []
+
+        for i0, i1 in zip(bounds[:-1], bounds[1:]):
+            kat = self.deepcopy()
+            kat.verbose = False
+            kat.xaxis.limits = np.array([axis_value(i0), axis_value(i1)])
+            kat.xaxis.steps = int(i1 - i0)
+            kats.append(kat)
+
+        kwargs["rethrowExceptions"] = True
+
+        with ThreadPoolExecutor(max_workers=(max_workers or split)) as pool:
+            outs = list(pool.map(lambda kat: kat.run(**kwargs), kats))
+
+        if self.multisig:
+            return {sig: self._merge_split_runs([_[sig] for _ in outs]) for sig in outs[0]}
+        else:
+            return self._merge_split_runs(outs)
+
+    def _merge_split_runs(self, outs):
+        """
+        Merges the outputs of each chunk of a split run, dropping the first row
+        of each chunk after the first as it repeats the previous chunk's last.
+        """
+        first = outs[0]
+        r = first.__class__()
+
+        r.yaxis = first.yaxis
+        r.xlabel = first.xlabel
+        r.katVersion = first.katVersion
+        r.katPath = first.katPath
+        r.katScript = "".join(self.generateKatScript())
+        r.stdout = "".join(_.stdout for _ in outs)
+        r.stderr = "".join(_.stderr for _ in outs)
+        r.runtime = sum(_.runtime or 0 for _ in outs)
+        r.runDateTime = datetime.datetime.now()
+        r.chunks = []
+
+        xs = []
+        start = 0
+
+        for i, out in enumerate(outs):
+            skip = 0 if i == 0 else 1
+            xs.append(out.x[skip:])
+            r.chunks.append(run_chunk(start, start + len(out.x) - skip, out.katScript))
+            start += len(out.x) - skip
+
+        r.x = np.concatenate(xs)
+
+        if isinstance(r, KatRun2D):
+            r.y = first.y
+            r.ylabel = first.ylabel
+            r.zlabels = first.zlabels
+            r.z = np.concatenate([out.z[..., (0 if i == 0 else 1):] for i, out in enumerate(outs)], axis=-1)
+        else:
+            r.ylabels = first.ylabels
+            r.y = np.concatenate([out.y[(0 if i == 0 else 1):] for i, out in enumerate(outs)], axis=0)
+
+        return r
+
+    def sweep(self, params, mode="grid", max_workers=None, pool=None, **kwargs):
+        """
+        Runs this simulation for every combination of values of some of its
+        parameters and returns a SweepResult of the detector outputs:
+
+            result = kat.sweep({"ETMX.Rcx": np.linspace(2200, 2300, 11),
+                                "PRM.T": [0.01, 0.03]})
+
+            result["P_DC"].shape # (11, 2, len(kat.xaxis steps)+1)
+
+        params - Dictionary of "component.parameter" strings, or list of
+                 pairs of these or Param objects, and the values to run them
+                 at. Axes follow the order given, so use a list or
+                 OrderedDict on Python < 3.7.
+        mode   - "grid" runs every combination of the values, "zip" runs the
+                 i-th value of every parameter together, which must then
+                 all have the same number of values.
+        max_workers - Number of processes the runs are spread over
+        pool   - A pykat.parallel.KatPool to run on rather than making one
+
+        The kat script is generated once, with a placeholder for each swept
+        parameter that is swapped for its values, rather than copying this
+        kat object and generating its script for every point. Parameters
+        that are not written into the script directly, for example those
+        only used to compute other values, cannot be swept. This object is
+        left unchanged. Keyword arguments are passed to `kat.run`, and an
+        error in any run is raised.
+        """
+        from pykat.parallel import KatPool
+
+        start = time.time()
+
+        if mode not in ("grid", "zip"):
+            raise pkex.BasePyKatException("Sweep mode must be 'grid' or 'zip', not '{0}'".format(mode))
+
+        if self.multisig:
+            raise pkex.BasePyKatException("multisig simulations cannot be swept")
+
+        if isinstance(params, dict):
+            params = list(params.items())
+
+        names = []
+        targets = []
+        values = []
+
+        for key, value in params:
+            if isinstance(key, Param):
+                param = key
+                key = "{0}.{1}".format(param.owner.name, param.name)
             else:
-                pkex.PrintError("Error from pykat:", ex)
+                obj, _, name = str(key).rpartition(".")
+                param = getattr(self.__isObjectFromName(obj), name, None)
+
+                if not isinstance(param, Param):
+                    raise pkex.BasePyKatException("'{0}' is not a parameter of this kat object".format(key))
+
+            if any(param is _ for _ in targets):
+                raise pkex.BasePyKatException("'{0}' is swept more than once".format(key))
+
+            names.append(key)
+            targets.append(param)
+            values.append(np.atleast_1d(np.asarray(value, dtype=np.float64)))
+
+        if len(targets) == 0:
+            raise pkex.BasePyKatException("No parameters were given to sweep")
+
+        if mode == "grid":
+            shape = tuple(len(_) for _ in values)
+            points = np.ndindex(*shape)
+            dims = tuple(names)
+        else:
+            if len(set(len(_) for _ in values)) != 1:
+                raise pkex.BasePyKatException("Every parameter of a zip sweep must have the same number of values")
+
+            shape = (len(values[0]), )
+            points = ((i,)*len(values) for i in range(shape[0]))
+            dims = ("point", )
+
+        parts, order = self._sweep_template(targets, [_[0] for _ in values])
+        strings = [[repr(float(v)) for v in _] for _ in values]
+
+        def scripts():
+            script = list(parts)
+
+            for point in points:
+                for k, i in enumerate(order):
+                    script[2*k+1] = strings[i][point[i]]
+
+                yield "".join(script)
+
+        result = SweepResult(dims, OrderedDict(zip(names, values)), None)
+        result.timings["prepare"] = time.time() - start
+
+        _pool = pool or KatPool(max_workers=max_workers)
+        futures = []
+
+        try:
+            futures.extend(_pool.run(_, **kwargs) for _ in scripts())
+
+            for index, future in zip(np.ndindex(*shape), futures):
+                out = future.result()
+
+                if isinstance(out, Exception):
+                    raise out
+
+                if result.data is None:
+                    labels = out.ylabels if isinstance(out, KatRun) else out.zlabels
+                    detectors = list(OrderedDict((_.split()[0], None) for _ in labels))
+
+                    result.data = np.empty(shape, dtype=[(str(_), np.asarray(out[_]).dtype, np.shape(out[_])) for _ in detectors])
+                    result.x = out.x
+
+                    if isinstance(out, KatRun2D):
+                        result.y = out.y
+
+                for _ in result.data.dtype.names:
+                    result.data[_][index] = out[_]
+        except:
+            for _ in futures:
+                _.cancel()
+
+            raise
         finally:
-            if self.verbose:
-                print ("")
-                print ("Finished in {0:g} seconds".format(float(time.time() - start)))
+            if pool is None:
+                _pool.close()
+
+        result.timings["run"] = time.time() - start - result.timings["prepare"]
+
+        return result
+
+    def _sweep_template(self, params, values):
+        """
+        Generates the kat script with a placeholder for each parameter in
+        params, set temporarily to the matching value in values. Returns the
+        script split into a list that alternates between script text and
+        placeholders, and the index of the parameter for each placeholder.
+        """
+        tokens = ["$__sweep{0}__".format(i) for i in range(len(params))]
+        saved = []
+
+        try:
+            for token, param, value in zip(tokens, params, values):
+                saved.append(param.constantName if param.isConstant else param.value)
+
+                self.constants[token[1:]] = Constant(token[1:], value)
+                param.value = token
+
+            script = "".join(self.generateKatScript())
+        finally:
+            for token, param, value in zip(tokens, params, saved):
+                param.value = value
+                self.constants.pop(token[1:], None)
+
+        for token, param in zip(tokens, params):
+            if token not in script:
+                raise pkex.BasePyKatException("{0}.{1} is not written to the kat script so it cannot be swept".format(param.owner.name, param.name))
+
+        parts = re.split("(" + "|".join(re.escape(_) for _ in tokens) + ")", script)
+
+        return parts, [tokens.index(_) for _ in parts[1::2]]
 
     def __isObjectFromName(self, name):
         """
@@ -2525,22 +3803,24 @@ class kat(object):
                 if isinstance(obj, Component):
                     nodes = self.nodes.getComponentNodes(obj)
 
+                self.__type_index.clear()
+
                 if isinstance(obj, Component):
                     del self.__components[obj.name]
-                    self.__del_component(obj)
+                    del self.__dict__[obj.name]
                     self.nodes._removeComponent(obj)
 
                 elif isinstance(obj, Command):
                     if obj._Command__unique:
                         del self.__commands[obj.__class__.__name__]
+                        del self.__dict__[obj.__class__.__name__]
                     else:
                         del self.__commands[obj.name]
-
-                    self.__del_command(obj)
+                        del self.__dict__[obj.name]
 
                 elif isinstance(obj, Detector):
                     del self.__detectors[obj.name]
-                    self.__del_detector(obj)
+                    del self.__dict__[obj.name]
 
                 elif isinstance(obj, pykat.finesse.Signals):
                     obj.remove()
@@ -2680,7 +3960,6 @@ class kat(object):
                 if obj.name in self.__components :
                     raise pkex.BasePyKatException("A component with name '{0}' has already been added".format([obj.name]))
 
-                self.__components[obj.name] = obj
                 self.__add_component(obj)
 
             elif isinstance(obj, Detector):
@@ -2688,16 +3967,10 @@ class kat(object):
                 if obj.name in self.__detectors :
                         raise pkex.BasePyKatException("A detector '{0}' has already been added".format(obj.name))
 
-                self.__detectors[obj.name] = obj
                 self.__add_detector(obj)
 
             elif isinstance(obj, Command):
 
-                if obj._Command__unique:
-                    self.__commands[obj.__class__.__name__] = obj
-                else:
-                    self.__commands[obj.name] = obj
-
                 self.__add_command(obj)
 
             else:
@@ -2713,24 +3986,28 @@ class kat(object):
     def readOutFile(self, filename, binary_format=False):
         if binary_format:
             with open(filename,'rb') as outfile:
-                binary = outfile.read()
-                data_split = binary.split(b'\n', maxsplit=4)  
-                data = np.frombuffer(data_split[-1], dtype=np.float64)
-                
-                dims = data_split[1].strip().split(b',')[1].strip().split()
-                assert(dims[0] == b'binary:')
-                dims = [int(_) for _ in dims[1:]]
-                data = data.reshape(*dims)
-                
-                hdr = data_split[2].decode().replace('%','').replace('\n','').split(',')
-                
-                if len(data.shape) == 2:
-                    return (data[:, 0], data[:, 1:], hdr)
-                elif len(data.shape) == 3:
-                    return (data[:, 0, 0], data[0, :, 1], data[:, :, 2:].squeeze().T, hdr)
-                else:
-                    raise Exception("Unexpected output dimensions")
-                    
+                # The first four lines are text, the second giving the data
+                # dimensions and the third the column names
+                header = [outfile.readline() for _ in range(4)]
+                offset = outfile.tell()
+
+            dims = header[1].strip().split(b',')[1].strip().split()
+            assert(dims[0] == b'binary:')
+            dims = tuple(int(_) for _ in dims[1:])
+
+            # Map the data rather than reading it in, the arrays returned
+            # are read-only views of the file
+            data = np.memmap(filename, dtype=np.float64, mode='r', offset=offset, shape=dims)
+
+            hdr = header[2].decode().replace('%','').replace('\n','').split(',')
+
+            if len(data.shape) == 2:
+                return (data[:, 0], data[:, 1:], hdr)
+            elif len(data.shape) == 3:
+                return (data[:, 0, 0], data[0, :, 1], data[:, :, 2:].squeeze().T, hdr)
+            else:
+                raise Exception("Unexpected output dimensions")
+
         else:
             with open(filename,'r') as outfile:
                 # read first to lines to get to header line
@@ -2739,11 +4016,9 @@ class kat(object):
 
                 hdr = outfile.readline().replace('%','').replace('\n','').split(',')
 
-            data = np.loadtxt(filename, comments='%',skiprows=4)
+                outfile.readline()
 
-            # convert 1D arrays into 2D ones for simpler selection
-            if len(data.shape) == 1:
-                data = np.array([data])
+                data = _read_text_data(outfile)
 
             if hasattr(self, "x2axis") and self.noxaxis == False:
                 # need to parse 2D outputs slightly different as they are effectively 2D matrices
@@ -2834,7 +4109,10 @@ class kat(object):
                     out.append(obj + '\n')
 
                 elif isinstance(obj, Component) or isinstance(obj, Detector) or isinstance(obj, Command):
-                    txt = obj.getFinesseText()
+                    if isinstance(obj, Component):
+                        txt = obj._getCachedFinesseText()
+                    else:
+                        txt = obj.getFinesseText()
 
                     if txt != None:
                         if isinstance(txt,list):
@@ -2854,7 +4132,7 @@ class kat(object):
             objs = self.__blocks[key].contents
 
             if key != NO_BLOCK:
-                if np.size(objs)>0:
+                if len(objs) > 0:
                     out.append("\n")
                     out.append("%%% FTblock " + key + "\n")
                     writeBlock()
@@ -2867,13 +4145,13 @@ class kat(object):
 
 
             if key == NO_BLOCK:
-                if np.size(objs)>0:
+                if len(objs) > 0:
                     out.append("\n")
                     writeBlock()
 
         # now loop through all the nodes and get any gauss commands
-        for key in self.nodes.getNodes():
-            txt = self.nodes.getNodes()[key].getFinesseText()
+        for node in self.nodes.getNodes().values():
+            txt = node.getFinesseText()
 
             if txt != None:
                 if isinstance(txt,list):
@@ -2961,6 +4239,21 @@ class kat(object):
 
         return out
 
+    def scriptHash(self):
+        """
+        Returns the SHA1 hash, as a hex string, of the kat script made by
+        generateKatScript without its time stamp comment. kat objects with
+        the same hash describe the same model. The text of components is
+        cached between calls, so this is cheap to call after changing a few
+        parameters.
+        """
+        h = hashlib.sha1()
+
+        for line in self.generateKatScript()[1:]:
+            h.update(line.encode("utf-8"))
+
+        return h.hexdigest()
+
     def optivis(self):
         if not HAS_OPTIVIS:
             pkex.printWarning("Optivis is not installed")
@@ -3198,6 +4491,8 @@ class kat(object):
         """
         """
 
+        from multiprocessing import Process
+
         cmd = "\n".join(self.generateKatScript())
 
         return Process(target=f__lkat_process, args=(callback, cmd, kwargs))
@@ -3210,9 +4505,11 @@ class kat(object):
         from the beam tracing routine for each node and space components defined as well as cavity
         commands.
         """
-        if lkat_location is None:
+        if _find_lkat() is None:
             raise RuntimeError("Could not find shared library 'libkat', please install to a system location or copy to the same directory as this script")
 
+        from multiprocessing import Manager
+
         trace_info = Manager().dict()
 
         prev = self.maxtem
@@ -3236,26 +4533,13 @@ class kat(object):
             raise pkex.BasePyKatException("Argument is not of type Detector")
 
         name = det.name
-        fget = lambda self: self.__get_detector(name)
 
         if hasattr(self, name):
             raise pkex.BasePyKatException("There is something attached to the kat object already called `%s`" % name)
 
-        setattr(self.__class__, name, property(fget))
-        setattr(self, '__det_' + name, det)
-
-    def __del_detector(self, det):
-
-        if not isinstance(det, Detector):
-            raise pkex.BasePyKatException("Argument is not of type Detector")
-
-        name = det.name
-
-        delattr(self.__class__, name)
-        delattr(self, '__det_' + name)
-
-    def __get_detector(self, name):
-        return getattr(self, '__det_' + name)
+        self.__detectors[name] = det
+        self.__type_index.clear()
+        self.__dict__[name] = det
 
     def __add_command(self, com):
 
@@ -3270,26 +4554,9 @@ class kat(object):
         if hasattr(self, name):
             raise pkex.BasePyKatException("There is something attached to the kat object already called `%s`" % name)
 
-        fget = lambda self: self.__get_command(name)
-
-        setattr(self.__class__, name, property(fget))
-        setattr(self, '__com_' + name, com)
-
-    def __del_command(self, com):
-
-        if not isinstance(com, Command):
-            raise exceptions.ValueError("Argument is not of type Command")
-
-        if com._Command__unique:
-            name = com.__class__.__name__
-        else:
-            name = com.name
-
-        delattr(self.__class__, name)
-        delattr(self, '__com_' + name)
-
-    def __get_command(self, name):
-        return getattr(self, '__com_' + name)
+        self.__commands[name] = com
+        self.__type_index.clear()
+        self.__dict__[name] = com
 
     def __add_component(self, comp):
 
@@ -3301,21 +4568,21 @@ class kat(object):
         if hasattr(self, name):
             raise pkex.BasePyKatException("There is something attached to the kat object already called `%s`" % name)
 
-        fget = lambda self: self.__get_component(name)
-
-        setattr(self.__class__, name, property(fget))
-        setattr(self, '__comp_' + name, comp)
+        self.__components[name] = comp
+        self.__type_index.clear()
+        self.__dict__[name] = comp
 
-    def __del_component(self, comp):
-
-        if not isinstance(comp, Component):
-            raise pkex.BasePyKatException("Argument is not of type Component")
+    def __get_object(self, name):
+        # Components, detectors and commands are also stored in __dict__
+        # under their names, which makes them attributes, e.g. kat.ETMX,
+        # without needing a property on the class for each
+        d = self.__dict__
 
-        delattr(self.__class__, comp.name)
-        delattr(self, '__comp_' + comp.name)
+        for objects in ("_kat__components", "_kat__detectors", "_kat__commands"):
+            if objects in d and name in d[objects]:
+                return d[objects][name]
 
-    def __get_component(self, name):
-        return getattr(self, '__comp_' + name)
+        return None
 
     def _removeComments(self, string):
         """
@@ -3608,7 +4875,8 @@ class kat(object):
         components between each node and trace a beam along it.
         
         See pykat.plotting.beamtrace.plot_beam_trace for a version
-        which plots the Finesse eigenmodes.
+        which plots the Finesse eigenmodes, and kat.beamTracer for tracing
+        many beams or parameter values along the same path at once.
 
         You can trace through multiple bounces off of optics, e.g.
 
@@ -3720,7 +4988,8 @@ class kat(object):
                 params["gouy_ref"] = None # get a new reference
 
             if isinstance(comp, pykat.components.space):
-                z = np.linspace(0, comp.L.value, 1000)                
+                # only the Gouy phase at each end of the space is used
+                z = np.array([0, comp.L.value])
                 g = np.rad2deg(qin.gouy(z))
 
                 if params["gouy_ref"] is None:
@@ -3791,6 +5060,41 @@ class kat(object):
 
         return bt
 
+    def beamTracer(self, from_node, to_node, *args, **kwargs):
+        """
+        Returns a pykat.optics.trace.BeamTracer for the path beamTrace
+        would take between the nodes. The path is found once, after which
+        its trace method propagates arrays of beam parameters, with arrays
+        of values for parameters of the components on the path, all at once:
+
+            tracer = kat.beamTracer("nLaser", "nOMC")
+            out = tracer.trace(q_in, {"s1.L": np.linspace(1, 2, 1000)})
+            out["nOMC"]["w"] # beam radius at nOMC for each length
+
+        It returns arrays of q, beam radius, accumulated Gouy phase and ABCD
+        matrix at each node, rather than a BeamParam for each.
+
+        Parameters
+        ----------
+
+        from_node : str, Node
+            Name of a node (Or node objecct) to start the trace from
+        to_node : str, Node
+            Name of a node (Or node objecct) to end the trace at
+
+        Other Parameters
+        ----------------
+        *args: str, Node
+            Additional nodes to continue trace to
+        direction : str
+            'x' or 'y' for horizontal or vertical beam propagation, default 'x'
+        back_propagating: Boolean
+            Whether to propagate beam in reverse
+        """
+        from pykat.optics.trace import BeamTracer
+
+        return BeamTracer(self, from_node, to_node, *args, **kwargs)
+
 # Only print logo if in a notebook environment
 try:
     shell = get_ipython().__class__.__name__
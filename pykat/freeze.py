@@ -1,10 +1,189 @@
+import copy
+import operator
+import types
+import weakref
 import warnings
 
+import pykat.external.six as six
+
+# Types copy.deepcopy returns as they are, so they can be shared between
+# an object and its copy without calling it for every one
+_atomic = set((type(None), bool, int, float, complex, six.text_type, six.binary_type,
+               type, range, types.FunctionType, types.BuiltinFunctionType, weakref.ref) +
+              tuple(six.integer_types))
+
+def _deepcopy_list(l, memo):
+    result = memo.get(id(l))
+
+    if result is None:
+        result = memo[id(l)] = []
+
+        for v in l:
+            result.append(v if type(v) in _atomic else copy.deepcopy(v, memo))
+
+    return result
+
+def deepcopy_dict(d, memo):
+    """
+    Returns a deep copy of the dictionary d, usually an instance __dict__.
+    Immutable values are shared with the copy rather than passed through
+    copy.deepcopy, which is where most of the time copying a kat object
+    goes as they are the majority of every Param, Node and component's state.
+    """
+    result = {}
+
+    for k, v in six.iteritems(d):
+        if type(v) in _atomic:
+            result[k] = v
+        elif type(v) is list:
+            result[k] = _deepcopy_list(v, memo)
+        else:
+            result[k] = copy.deepcopy(v, memo)
+
+    return result
+
+class _Dead(object):
+    pass
+
+def _weakref(obj):
+    # a dead reference if the object had gone when it was pickled
+    return weakref.ref(_Dead() if obj is None else obj)
+
+def getstate_dict(d):
+    """
+    Returns the state to pickle for an object with instance __dict__ d.
+    Weak references, such as those from a Param to its owner, can't be
+    pickled so the objects they refer to are stored instead.
+    """
+    refs = dict((k, v()) for k, v in six.iteritems(d) if type(v) is weakref.ref)
+
+    if len(refs) == 0:
+        return d
+
+    state = d.copy()
+
+    for k in refs:
+        del state[k]
+
+    return (state, refs)
+
+def setstate_dict(d, state):
+    """
+    Fills in the instance __dict__ d from a state made by getstate_dict.
+    """
+    if type(state) is tuple:
+        state, refs = state
+
+        for k, v in six.iteritems(refs):
+            d[k] = _weakref(v)
+
+    d.update(state)
+
+# Marks a slot that hasn't been set
+_unset = object()
+
+def slot_names(cls):
+    """
+    Returns the names of every slot an instance of cls has, with private
+    names mangled as they are stored, leaving out __weakref__.
+    """
+    names = cls.__dict__.get("_slot_names")
+
+    if names is None:
+        names = []
+
+        for c in reversed(cls.__mro__):
+            slots = c.__dict__.get("__slots__", ())
+
+            if isinstance(slots, six.string_types):
+                slots = (slots,)
+
+            for s in slots:
+                if s in ("__weakref__", "__dict__"):
+                    continue
+
+                if s.startswith("__") and not s.endswith("__"):
+                    s = "_" + c.__name__.lstrip("_") + s
+
+                names.append(s)
+
+        names = tuple(names)
+        type.__setattr__(cls, "_slot_names", names)
+
+        # gets all the slots at once, attrgetter only gives a tuple for more than one
+        if len(names) > 1:
+            getter = operator.attrgetter(*names)
+        else:
+            getter = lambda obj: tuple(getattr(obj, k) for k in names)
+
+        type.__setattr__(cls, "_slot_getter", getter)
+
+    return names
+
+def slots_dict(obj):
+    """
+    Returns a dictionary of the slots that are set for an object using
+    __slots__, the equivalent of its __dict__.
+    """
+    values = ((k, getattr(obj, k, _unset)) for k in slot_names(type(obj)))
+
+    return dict((k, v) for k, v in values if v is not _unset)
+
+def deepcopy_slots(obj, memo):
+    """
+    Deep copies an object that uses __slots__ in the same way deepcopy_dict
+    does for ones with an instance __dict__.
+    """
+    cls = obj.__class__
+    result = cls.__new__(cls)
+    memo[id(obj)] = result
+    names = slot_names(cls)
+
+    try:
+        # quickest when every slot is set
+        values = cls.__dict__["_slot_getter"](obj)
+    except AttributeError:
+        values = [getattr(obj, k, _unset) for k in names]
+
+    for k, v in zip(names, values):
+        if type(v) in _atomic:
+            pass
+        elif type(v) is list:
+            v = _deepcopy_list(v, memo)
+        elif v is _unset:
+            continue
+        else:
+            v = copy.deepcopy(v, memo)
+
+        object.__setattr__(result, k, v)
+
+    return result
+
+def getstate_slots(obj):
+    """
+    getstate_dict for an object that uses __slots__.
+    """
+    return getstate_dict(slots_dict(obj))
+
+def setstate_slots(obj, state):
+    """
+    setstate_dict for an object that uses __slots__.
+    """
+    d = {}
+    setstate_dict(d, state)
+
+    for k, v in six.iteritems(d):
+        object.__setattr__(obj, k, v)
+
 def canFreeze(cls):
-    
+
+    # A class can still say how its attributes are set, which is then
+    # done after the frozen check below
+    setattr_ = cls.__dict__.get("__setattr__")
+
     def _freeze(self): self.__dict__["____FROZEN____"] = True
     def _unfreeze(self): self.__dict__["____FROZEN____"] = False
-    
+
     def frozensetattr(self, name, value):
         if "____FROZEN____" in self.__dict__ and self.__dict__["____FROZEN____"] and not hasattr(self, name):
             if hasattr(self, "name"):
@@ -13,13 +192,39 @@ def canFreeze(cls):
                 n = self.__name
             else:
                 n = self.__class__.__name__
-                
+
             warnings.warn("'%s' does not have attribute called '%s'" % (n, name), stacklevel=2)
-            
-        super(cls, self).__setattr__(name, value)
+
+        if setattr_ is None:
+            super(cls, self).__setattr__(name, value)
+        else:
+            setattr_(self, name, value)
+
+    def __deepcopy__(self, memo):
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        result.__dict__.update(deepcopy_dict(self.__dict__, memo))
+        return result
+
+    def __getstate__(self):
+        return getstate_dict(self.__dict__)
+
+    def __setstate__(self, state):
+        setstate_dict(self.__dict__, state)
 
     cls.__setattr__ = frozensetattr
     cls._freeze = _freeze
     cls._unfreeze = _unfreeze
-    
-    return cls
\ No newline at end of file
+
+    # Classes that don't say how to copy themselves get the cheaper
+    # default above rather than copy's generic reconstruction
+    if getattr(cls, "__deepcopy__", None) is None:
+        cls.__deepcopy__ = __deepcopy__
+
+    # and ones that don't say how to pickle themselves get one that
+    # can handle weak references
+    if getattr(cls, "__getstate__", None) in (None, getattr(object, "__getstate__", None)):
+        cls.__getstate__ = __getstate__
+        cls.__setstate__ = __setstate__
+
+    return cls
@@ -1,27 +1,46 @@
 from __future__ import print_function
 
 import pykat
+import pykat.cache
 import pykat.exceptions as pkex
 from pykat import isContainer
 import numpy as np
+import os
 import inspect
+import functools
+import warnings
 import math
+import time
 import six
 from copy import deepcopy
-from pandas import DataFrame
-from scipy.optimize import brute
-from scipy.optimize import fmin
-from scipy.interpolate import interp1d
-from scipy.optimize import minimize_scalar
-from scipy.optimize import minimize
-from scipy.special import comb
+from collections import OrderedDict
 
 
-
-class SensingMatrix(DataFrame):
+class SensingMatrix(object):
+    """
+    A pandas DataFrame of DOFs against detectors. pandas is only imported
+    when the first SensingMatrix is made, which then becomes an instance of
+    a DataFrame subclass that shares these methods.
+    """
+    _frame = None
+    
+    def __new__(cls, *args, **kwargs):
+        if SensingMatrix._frame is None:
+            from pandas import DataFrame
+            
+            SensingMatrix._frame = type("SensingMatrix", (SensingMatrix, DataFrame), {"__module__": __name__})
+        
+        if cls is SensingMatrix:
+            cls = SensingMatrix._frame
+        
+        return object.__new__(cls)
+    
+    def __reduce__(self):
+        return (SensingMatrix, (), self.__getstate__())
+    
     @property
     def _constructor(self):
-        return SensingMatrix
+        return type(self)
 
     def display(self):
         df = self
@@ -104,6 +123,61 @@ class SensingMatrix(DataFrame):
                 plt.savefig(filename)
             plt.show()
         
+
+def cached_make_kat(ifo, default_name="design"):
+    """
+    Decorator for the make_kat function of an interferometer, which lets the
+    kat object made be stored in and loaded from a pykat.cache.ModelCache.
+    The decorated function takes an extra `cache` argument, which is either
+    a ModelCache, False to not use a cache, or None to use the default cache
+    if one has been enabled with pykat.cache.enable_models().
+
+    ifo - name of the directory in pykat.ifo with the interferometer's kat files
+    default_name - kat file used when make_kat has no `name` argument
+    """
+    files = os.path.join(os.path.dirname(os.path.abspath(__file__)), ifo, "files")
+
+    def decorator(make_kat):
+        signature = inspect.signature(make_kat)
+
+        @functools.wraps(make_kat)
+        def wrapper(*args, **kwargs):
+            cache = kwargs.pop("cache", None)
+
+            if cache is None:
+                cache = pykat.cache.get_default_models()
+
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            arguments = dict(arguments.arguments)
+
+            # debug runs write files to the working directory, so are not cached
+            if cache is None or cache is False or arguments.get("debug"):
+                return make_kat(*args, **kwargs)
+
+            katfile = arguments.get("katfile") or os.path.join(files, arguments.get("name", default_name) + ".kat")
+
+            if not os.path.isfile(katfile):
+                return make_kat(*args, **kwargs)
+
+            key = cache.key(make_kat, [katfile], arguments)
+            kat = cache.get(key)
+
+            if kat is None:
+                kat = make_kat(*args, **kwargs)
+
+                try:
+                    cache.put(key, kat)
+                except Exception as ex:
+                    warnings.warn("Could not store the kat object in the model cache: {0}".format(ex))
+
+            return kat
+
+        return wrapper
+
+    return decorator
+
+
 def make_transparent(kat, _components):
     """
     Function to make certain mirror or beamsplitter objects transparent
@@ -192,10 +266,25 @@ def make_list_copy(_l):
         
     return _l[:] # copy the list, just to be save
 
-def scan_to_precision(DOF, target_precision, minmax="max", phi=0.0, precision=90.0, relative=False, debug=None, extra_cmds=None):
+def scan_to_precision(DOF, target_precision, minmax="max", phi=0.0, precision=90.0, relative=False, debug=None, extra_cmds=None,
+                      method="scan", steps=None, batch=None, stats=None):
     """
     Scans a DOF for a kat object to maximise or minimise the DOF's signal. 
     
+    The window phi-1.5*precision to phi+1.5*precision is first scanned
+    with `steps` steps. With method "scan" this is repeated around the
+    peak found, each time in a window 66 times smaller, until the step
+    size reaches the precision wanted. The "brent" and "golden" methods
+    instead bracket the best point of a coarse first scan and close in on
+    it with a PeakSearch. The coarse scan only finds the right peak if it
+    is the only one between two of its steps, which may not hold for
+    signals with sideband peaks.
+    
+    These methods compute fewer points than "scan" but do not need fewer
+    Finesse runs. To 1e-4 deg on a cavity resonance "scan" and "golden"
+    with its default batch both need about 4 runs, while "brent" and
+    "golden" with batch=1 need about 3 to 7 times as many, one point each.
+    
     DOF - DOF object of the kat object
     target_precision - how accurate to max/min to
     minmax - "max" or "min"
@@ -203,16 +292,496 @@ def scan_to_precision(DOF, target_precision, minmax="max", phi=0.0, precision=90
     precision - look in phi-precision to phi+precision for min/max
     debug - output extra information
     extra_cmds - Extra commands to include in simulation run
+    method - "scan", "brent" or "golden", see PeakSearch
+    steps - number of steps in each scan, by default 200 for "scan" and
+            16 for the first scan of "brent" and "golden"
+    batch - number of points each "golden" run computes, by default 128
+    stats - dictionary the number of Finesse runs and points used are added to
     
     Returns phi of min/max and precision reached
     """
-    while precision > target_precision * DOF.scale:
-        out = scan_DOF(DOF.kat, DOF, xlimits = [phi-1.5*precision, phi+1.5*precision], relative=relative, extra_cmds=extra_cmds)
-        phi, precision = find_peak(out, DOF.port.name, minmax=minmax, debug=debug)
-         
+    if steps is None:
+        steps = 200 if method == "scan" else 16
+    
+    if batch is None:
+        batch = 128 if method == "golden" else 1
+    
+    if method == "scan":
+        runs = 0
+        
+        while precision > target_precision * DOF.scale:
+            out = scan_DOF(DOF.kat, DOF, xlimits = [phi-1.5*precision, phi+1.5*precision], steps=steps, relative=relative, extra_cmds=extra_cmds)
+            phi, precision = find_peak(out, DOF.port.name, minmax=minmax, debug=debug)
+            runs += 1
+        
+        if stats is not None:
+            stats["runs"] = stats.get("runs", 0) + runs
+            stats["points"] = stats.get("points", 0) + runs * (steps + 1)
+            
+        return phi, precision
+    
+    elif method not in ("brent", "golden"):
+        raise pkex.BasePyKatException("method must be 'scan', 'brent' or 'golden'")
+    
+    def evaluate(x):
+        if len(x) == 1:
+            out = scan_DOF(DOF.kat, DOF, xlimits=[x[0], x[0]], steps=0, relative=relative, extra_cmds=extra_cmds)
+        else:
+            out = scan_DOF(DOF.kat, DOF, xlimits=[x[0], x[-1]], steps=len(x)-1, relative=relative, extra_cmds=extra_cmds)
+        
+        return np.atleast_1d(out[DOF.port.name])
+    
+    search = PeakSearch(evaluate, minmax=minmax, debug=debug)
+    
+    if precision > target_precision * DOF.scale:
+        search.scan(phi-1.5*precision, phi+1.5*precision, steps)
+        phi, precision = search.refine(target_precision * DOF.scale, method=method, batch=batch)
+    
+    if stats is not None:
+        stats["runs"] = stats.get("runs", 0) + search.runs
+        stats["points"] = stats.get("points", 0) + search.points
+        
     return phi, precision
 
 
+class PeakSearch(object):
+    """
+    Finds the maximum or minimum of a function of one variable, such as
+    the power as a DOF is tuned, computing as few points as possible.
+    
+    The function is called as evaluate(x) with an array of evenly spaced
+    points, so one Finesse run with a lin xaxis can compute all of them,
+    and returns the values at each. Every point computed is kept and
+    reused, and `runs` and `points` count the calls and points computed.
+    
+    A search starts with `scan`, which brackets the best point of an
+    evenly spaced scan, and is then narrowed down with `refine` using
+    either Brent's method, one point per run, or a golden section search.
+    A golden section search with batch > 1 computes that many evenly
+    spaced points in the bracket per run instead, narrowing it by a
+    factor of (batch+1)/2 each time. One point per run needs the fewest
+    points but the most runs.
+    
+    Example:
+        search = PeakSearch(lambda x: -(x - 1.2)**2)
+        search.scan(-10, 10, 20)
+        x, precision = search.refine(1e-6)
+        search.runs # how many times the function was called
+    """
+    
+    _golden = 0.3819660112501051
+    
+    def __init__(self, evaluate, minmax="max", debug=False):
+        if minmax not in ("max", "min"):
+            raise pkex.BasePyKatException("minmax must be 'max' or 'min'")
+        
+        self.evaluate = evaluate
+        self.minmax = minmax
+        self.debug = debug
+        self.x = np.array([])
+        self.y = np.array([])
+        self.runs = 0
+        self.points = 0
+        self.bracket = None
+        
+        self.__sign = -1 if minmax == "max" else 1
+    
+    def __call__(self, x):
+        """
+        Returns the function at the evenly spaced points x, only calling
+        `evaluate` if one or more of them has not been computed before.
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        known = np.isin(x, self.x)
+        
+        if not np.all(known):
+            y = np.real(np.asarray(self.evaluate(x), dtype=complex)).reshape(-1)
+            
+            if len(y) != len(x):
+                raise pkex.BasePyKatException("Expected {0} values from evaluate but got {1}".format(len(x), len(y)))
+            
+            self.runs += 1
+            self.points += len(x)
+            
+            if self.debug:
+                print("  run {0}: {1} points in [{2:.10g}, {3:.10g}]".format(self.runs, len(x), x[0], x[-1]))
+            
+            order = np.argsort(np.concatenate((self.x, x[~known])), kind="mergesort")
+            self.x = np.concatenate((self.x, x[~known]))[order]
+            self.y = np.concatenate((self.y, y[~known]))[order]
+        
+        return self.y[np.searchsorted(self.x, x)]
+    
+    def _cost(self, y):
+        return self.__sign * y
+    
+    @property
+    def best(self):
+        """The best (x, y) computed so far"""
+        i = np.argmin(self._cost(self.y))
+        return self.x[i], self.y[i]
+    
+    @property
+    def precision(self):
+        """How far the peak can be from the best point given the current bracket"""
+        a, x, b = self.bracket
+        return max(x - a, b - x)
+    
+    def _bracket(self, lower, upper):
+        """Brackets the best point computed between lower and upper by its neighbours"""
+        sel = (self.x >= lower) & (self.x <= upper)
+        x = self.x[sel]
+        i = np.argmin(self._cost(self.y[sel]))
+        self.bracket = (x[max(i-1, 0)], x[i], x[min(i+1, len(x)-1)])
+        return self.bracket
+    
+    def scan(self, lower, upper, steps):
+        """
+        Computes steps+1 evenly spaced points from lower to upper and
+        returns the bracket (a, x, b) of the best one.
+        """
+        if steps < 2:
+            raise pkex.BasePyKatException("A scan needs at least 2 steps to bracket a peak")
+        
+        self(np.linspace(lower, upper, int(steps)+1))
+        return self._bracket(lower, upper)
+        
+    def refine(self, tol, method="brent", batch=1):
+        """
+        Narrows the bracket found by `scan` until the peak is within tol
+        of the best point and returns that point and the precision reached.
+        
+        method - "brent" or "golden"
+        batch - number of points each golden section run computes
+        """
+        if self.bracket is None:
+            raise pkex.BasePyKatException("A scan is needed to bracket the peak before it is refined")
+            
+        if method == "brent":
+            self._brent(tol)
+        elif method == "golden":
+            if batch > 1:
+                self._k_section(tol, int(batch))
+            else:
+                self._golden_section(tol)
+        else:
+            raise pkex.BasePyKatException("method must be 'brent' or 'golden'")
+        
+        return self.bracket[1], self.precision
+    
+    def _f(self, x):
+        return self._cost(self(x)[0])
+    
+    def _golden_section(self, tol):
+        a, x, b = self.bracket
+        fx = self._f(x)
+        
+        while max(x - a, b - x) > tol:
+            if x - a > b - x:
+                u = x - self._golden * (x - a)
+            else:
+                u = x + self._golden * (b - x)
+            
+            fu = self._f(u)
+            
+            if fu < fx:
+                if u < x: b = x
+                else:     a = x
+                x, fx = u, fu
+            else:
+                if u < x: a = u
+                else:     b = u
+            
+            self.bracket = (a, x, b)
+        
+    def _k_section(self, tol, batch):
+        a, x, b = self.bracket
+        
+        while max(x - a, b - x) > tol:
+            self(np.linspace(a, b, batch+2)[1:-1])
+            a, x, b = self._bracket(a, b)
+        
+    def _brent(self, tol):
+        # Brent's method, as in Numerical Recipes, with an absolute tolerance
+        # and starting from the best point found so far
+        a, x, b = self.bracket
+        w = v = x
+        fx = fw = fv = self._f(x)
+        d = e = 0.0
+        tol1 = 0.5 * tol
+        tol2 = tol
+        
+        while max(x - a, b - x) > tol:
+            xm = 0.5 * (a + b)
+            parabolic = False
+            
+            if abs(e) > tol1:
+                r = (x - w) * (fx - fv)
+                q = (x - v) * (fx - fw)
+                p = (x - v) * q - (x - w) * r
+                q = 2.0 * (q - r)
+                
+                if q > 0: p = -p
+                
+                q = abs(q)
+                etemp = e
+                e = d
+                
+                if abs(p) < abs(0.5 * q * etemp) and p > q * (a - x) and p < q * (b - x):
+                    d = p / q
+                    u = x + d
+                    
+                    if u - a < tol2 or b - u < tol2:
+                        d = tol1 if xm >= x else -tol1
+                        
+                    parabolic = True
+            
+            if not parabolic:
+                e = (a - x) if x >= xm else (b - x)
+                d = self._golden * e
+            
+            u = x + d if abs(d) >= tol1 else x + (tol1 if xm >= x else -tol1)
+            fu = self._f(u)
+            
+            if fu <= fx:
+                if u >= x: a = x
+                else:      b = x
+                
+                v, w, x = w, x, u
+                fv, fw, fx = fw, fx, fu
+            else:
+                if u < x: a = u
+                else:     b = u
+                
+                if fu <= fw or w == x:
+                    v, w = w, u
+                    fv, fw = fw, fu
+                elif fu <= fv or v == x or v == w:
+                    v, fv = u, fu
+            
+            self.bracket = (a, x, b)
+    
+class PretuneStep(object):
+    """
+    One step of a pretune, see `pretune_pipeline`.
+    
+    A copy of the model has its locks removed, the `transparent` mirrors
+    made transparent and, if given, the beam splitter set to `BS_RTL`. The
+    DOF is then scanned with scan_to_precision to maximise or minimise its
+    signal. The tuning found is rounded to the pretune precision and
+    `digits` significant figures, has `offset` added and is applied to
+    the model.
+    
+    name - name of the step
+    DOF - name of the DOF of the IFO object to tune
+    requires - names of the steps whose tunings must be applied first
+    transparent - names of the mirrors to make transparent
+    BS_RTL - (R, T, L) to set the BS to, or None
+    minmax, phi, precision - passed to scan_to_precision
+    offset - added to the tuning found
+    digits - number of significant figures the tuning is rounded to
+    add - if True the tuning is added to the DOF's current tuning
+    description - what the step does, printed when it starts
+    """
+    def __init__(self, name, DOF, requires=(), transparent=(), BS_RTL=None, minmax="max", phi=0.0,
+                 precision=90.0, offset=0.0, digits=5, add=False, description=None):
+        self.name = name
+        self.DOF = DOF
+        self.requires = tuple(requires)
+        self.transparent = list(transparent)
+        self.BS_RTL = BS_RTL
+        self.minmax = minmax
+        self.phi = phi
+        self.precision = precision
+        self.offset = offset
+        self.digits = digits
+        self.add = add
+        self.description = description or "scanning %s" % name
+    
+    def __repr__(self):
+        return "<PretuneStep %s>" % self.name
+        
+    def scan(self, kat, pretune_precision, method="scan", debug=False):
+        """
+        Does the scan of this step on kat, which is changed, and returns
+        the tuning found, the precision reached and the scan's stats.
+        """
+        start = time.time()
+        
+        kat.removeBlock("locks", False)
+        
+        if self.transparent:
+            make_transparent(kat, self.transparent)
+            
+        if self.BS_RTL is not None:
+            kat.BS.setRTL(*self.BS_RTL)
+        
+        stats = {}
+        
+        phi, precision = scan_to_precision(getattr(kat.IFO, self.DOF), pretune_precision, minmax=self.minmax, phi=self.phi,
+                                           precision=self.precision, debug=debug, method=method, stats=stats)
+        
+        phi = round(phi/pretune_precision)*pretune_precision
+        phi = round_to_n(phi, self.digits) + self.offset
+        
+        stats["time"] = time.time() - start
+        
+        return phi, precision, stats
+        
+
+def _pretune_job(commands, pwd, IFO, step, *args):
+    """
+    Does the scan of a pretune step in a KatPool worker.
+    """
+    import pickle
+    
+    os.chdir(pwd)
+    
+    kat = pykat.finesse.kat()
+    kat.verbose = False
+    kat.parse(commands)
+    
+    kat.IFO = pickle.loads(IFO)
+    kat.IFO._IFO__kat = kat
+    
+    return step.scan(kat, *args)
+    
+
+def pretune_pipeline(kat, steps, pretune_precision=1.0e-4, verbose=False, debug=(), max_workers=1,
+                     resume=False, method="scan"):
+    """
+    Pretunes a model by doing each of the PretuneSteps given as soon as
+    the steps it requires are done. By default the scans are done one
+    after another in this process. With max_workers > 1, steps that do not
+    depend on each other, such as tuning each arm, are scanned at the same
+    time in a KatPool of that many processes, and max_workers=None uses
+    one per CPU. Starting the pool takes a few seconds, so this is only
+    worth it for models that take longer than that to scan.
+    
+    The result of each step is applied to kat and stored, as it finishes,
+    in kat.data["IFO.tunings"]["pretune"] with the tunings of the DOF's
+    optics, the precision reached, the Finesse runs used and how long it
+    took. If a pretune is stopped part way through, a copy or pickle of
+    kat, or the kat itself, can carry on from where it stopped by calling
+    this again with resume=True. The tunings of the steps already done
+    are then applied and only the others are scanned.
+    
+    Example:
+        steps = [
+            PretuneStep("ARMX", "preARMX", transparent=["PRM", "SRM", "ITMY", "ETMY"], BS_RTL=(0, 1, 0)),
+            PretuneStep("ARMY", "preARMY", transparent=["PRM", "SRM", "ITMX", "ETMX"], BS_RTL=(1, 0, 0)),
+            PretuneStep("MICH", "preMICH", requires=["ARMX", "ARMY"], transparent=["PRM", "SRM"],
+                        minmax="min", precision=30.0, add=True),
+        ]
+        
+        pretune_pipeline(kat, steps, verbose=True)
+        
+    kat - kat object with an IFO object
+    steps - list of PretuneSteps
+    pretune_precision - precision to tune to [deg]
+    verbose - print each step and a breakdown of how long each took
+    debug - names of the steps to show debug information for
+    max_workers - number of scans to run at the same time, None for the number of CPUs
+    resume - whether to use the tunings of the steps already done
+    method - method scan_to_precision uses, see PeakSearch
+    
+    Returns the pretune state stored in kat.data
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+    
+    IFO = kat.IFO
+    names = [_.name for _ in steps]
+    
+    if len(set(names)) != len(names):
+        raise pkex.BasePyKatException("Pretune step names must be unique")
+    
+    for step in steps:
+        for _ in step.requires:
+            if _ not in names:
+                raise pkex.BasePyKatException("Pretune step `%s` requires step `%s` which does not exist" % (step.name, _))
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    
+    tunings = kat.data.setdefault("IFO.tunings", {})
+    state = tunings.get("pretune")
+    
+    if not resume or state is None or state["precision"] != pretune_precision:
+        state = tunings["pretune"] = {"precision": pretune_precision, "steps": OrderedDict()}
+    
+    vprint(verbose, "-- pretuning interferometer to precision {0:2g} deg = {1:2g} m".format(pretune_precision, pretune_precision*kat.lambda0/360.0))
+    
+    done = set()
+    
+    for name, result in state["steps"].items():
+        if name in names:
+            vprint(verbose, "   {0} already tuned to {1}".format(name, result["phi"]))
+            IFO.apply_tunings(result["tunings"])
+            done.add(name)
+    
+    pending = [_ for _ in steps if _.name not in done]
+    running = {}
+    finished = []
+    pool = None
+    start = time.time()
+    
+    try:
+        while pending or running:
+            ready = [_ for _ in pending if all(r in done for r in _.requires)]
+            
+            if not ready and not running:
+                raise pkex.BasePyKatException("Pretune steps %s require each other" % ", ".join(_.name for _ in pending))
+                
+            if max_workers > 1 and (len(ready) > 1 or running):
+                if pool is None:
+                    from pykat.parallel import KatPool
+                    pool = KatPool(max_workers=max_workers)
+                
+                for step in ready[:max_workers-len(running)]:
+                    vprint(verbose, "   " + step.description)
+                    pending.remove(step)
+                    running[pool.run(kat, _pretune_job, step, pretune_precision, method, step.name in debug)] = step
+                
+                futures, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                results = [(running.pop(_), _.result()) for _ in futures]
+            else:
+                step = ready[0]
+                vprint(verbose, "   " + step.description)
+                pending.remove(step)
+                results = [(step, step.scan(kat.deepcopy(), pretune_precision, method, step.name in debug))]
+            
+            for step, (phi, precision, stats) in results:
+                DOF = getattr(IFO, step.DOF)
+                DOF.apply_tuning(phi, add=step.add)
+                
+                state["steps"][step.name] = {
+                    "phi": phi,
+                    "precision": precision,
+                    "tunings": dict((o, float(kat.components[o].phi)) for o in DOF.optics),
+                    "runs": stats.get("runs"),
+                    "time": stats["time"]
+                }
+                
+                done.add(step.name)
+                finished.append(step.name)
+                vprint(verbose, "   {0} found max/min at: {1} (precision = {2:2g})".format(step.name, phi, precision))
+    finally:
+        if pool is not None:
+            pool.close()
+    
+    if verbose:
+        print("   step       time [s]   runs")
+        
+        for name in finished:
+            result = state["steps"][name]
+            print("   {0:8s} {1:10.2f} {2:6d}".format(name, result["time"], result["runs"] or 0))
+            
+        print("   total    {0:10.2f}".format(time.time() - start))
+        print("   ... done")
+    
+    return state
+    
+
 def find_peak(out, detector, minmax='max', debug=False): 
     """
     Expects an output of a kat scan and find the max/min output on
@@ -284,15 +853,22 @@ def scan_optics_string(_optics, _factors, _varName='scan', target="phi", linlog=
     if linlog not in ["lin", "log"]: 
         raise pkex.BasePyKatException("linlog must be 'lin' or 'log'")
         
-    _tuneStr  = "var {} 0\n".format(_varName)
+    if axis==0:
+        # no xaxis, the variable is just set to the lower limit
+        _tuneStr  = "var {} {}\n".format(_varName, xlimits[0])
+    else:
+        _tuneStr  = "var {} 0\n".format(_varName)
+        
     _tuneStr += "set {0}re {0} re\n".format(_varName)
     
-    if axis==1:
+    if axis==0:
+        _tuneStr += "noxaxis\n"
+    elif axis==1:
         _tuneStr += "xaxis {} {} {} {} {} {}\n".format(_varName, 're', linlog, xlimits[0], xlimits[1], steps)
     elif (axis==2 or axis==3): 
         _tuneStr += "x{}axis {} {} {} {} {} {}\n".format(axis, _varName, 're', linlog, xlimits[0], xlimits[1], steps)
     else:
-        raise pkex.BasePyKatException("axis must be 1, 2 or 3")
+        raise pkex.BasePyKatException("axis must be 0, 1, 2 or 3")
 
     _putStr = ""
     
@@ -315,6 +891,22 @@ def scan_optics_string(_optics, _factors, _varName='scan', target="phi", linlog=
     #print()
     return _tuneStr
 
+def _frequency_axis(freqs):
+    """
+    Returns the (scale, lower, upper, steps) of an xaxis that steps through
+    the frequencies given, or None if they are not lin or log spaced.
+    """
+    if len(freqs) < 2:
+        return None
+    
+    for scale, values in (("lin", freqs), ("log", np.log(freqs))):
+        step = np.diff(values)
+        
+        if step[0] > 0 and np.allclose(step, step[0], rtol=1e-9, atol=0):
+            return scale, float(freqs[0]), float(freqs[-1]), len(freqs) - 1
+    
+    return None
+
 def scan_f_cmds(DOF, linlog="log", lower=10, upper=5000, steps=100):
     name = "_%s" % DOF.name
     cmds = DOF.fsig(name, 1)
@@ -341,7 +933,7 @@ def scan_DOF_cmds(DOF, xlimits=[-100, 100], steps=200, relative=False):
                               linlog="lin",
                               xlimits=xlimits,
                               steps=steps,
-                              axis=1,
+                              axis=(1 if steps else 0),
                               relative=relative)
 
 def scan_optic_cmds(self, optics, factors, xlimits=[-100, 100], steps=200,relative=False):
@@ -565,6 +1157,8 @@ def optimise_demod_phase(_kat, DOF, ports, minimise=False, debug=False):
     return rtn
     
 def mismatch_cavities(base, node):
+    from pandas import DataFrame
+    
     _kat = base.deepcopy()
     
     _kat.removeBlock("locks", False)
@@ -711,6 +1305,9 @@ def modematch(kat, components, cavs, node, verbose = False):
     out         - array with the new optimised values
     
     '''
+    from scipy.optimize import minimize
+    from scipy.special import comb
+    
     Nc = len(cavs)
     Np = len(components)
     kat1 = kat.deepcopy()
@@ -873,6 +1470,8 @@ def opt_demod_phase(cdata, x, xbounds=None, err_tol=1e-5, xatol=1e-9, isplot=Fal
     optical_gain  - The optical gain (slope of the error signal). The unit
                     depends on the unit of x.
     '''
+    from scipy.interpolate import interp1d
+    from scipy.optimize import brute, fmin, minimize_scalar
 
     if xbounds is None:
         xbounds = np.array([x[0],x[-1]])
@@ -1079,6 +1678,9 @@ def find_max_power(kat, scanstring, detector, P_tol=1e-4, isplot=False, isMax =
     Finds the maximum power in the detector, in the run defined by the
     kat object + scanstring
     '''
+    from scipy.interpolate import interp1d
+    from scipy.optimize import minimize_scalar
+    
     _kat = kat.deepcopy()
     _kat.parse(scanstring)
     out = _kat.run()
@@ -1266,6 +1868,14 @@ class IFO(object):
     
         To apply the lock drag to the object you need to extract the `lock` outputs and apply
         them to the model.
+        
+        Long drags can be split into `segments`, each run separately with the
+        state of the model updated by the one before, so progress is kept if
+        the lock is lost. If Finesse reports a lock failure in a segment it is
+        run again with twice as many steps, up to `max_refinements` times,
+        before giving up. With a `checkpoint` file the tunings and outputs are
+        saved after each segment and a drag that stopped can be carried on
+        from there with `resume=True` and the same arguments.
     
         Parameters
         ----------
@@ -1274,6 +1884,14 @@ class IFO(object):
         update_state : bool
             If True, the calling kat object's state will be updated with the
             final value of the lock drag
+        segments : int
+            Number of segments to split the lock drag into, None for one run
+        checkpoint : str
+            File to save the progress of a segmented lock drag to
+        resume : bool
+            If True and the checkpoint file exists, carry on from it
+        max_refinements : int
+            Number of times a segment which lost lock is retried with twice the steps
         *args : tuple(target, param, final_value)
             target      : Name of the component
             param       : Parameter to change
@@ -1281,15 +1899,31 @@ class IFO(object):
         **kwargs : dict
             Keyword arguments are passed to the `kat.run(**kwargs)` call.
             
+        Returns the output of the lock drag, with the outputs of each segment
+        joined and its xaxis going from 0 to 1 over the whole drag.
         """
-        if "update_state" not in kwargs:
-            update_state=True
-        else:
-            update_state=kwargs.pop('update_state')
-            
-        if hasattr(self, 'xaxis'): self.xaxis.remove()
-        if hasattr(self, 'x2axis'): self.x2axis.remove()
+        update_state = kwargs.pop('update_state', True)
+        segments = kwargs.pop('segments', None)
+        checkpoint = kwargs.pop('checkpoint', None)
+        resume = kwargs.pop('resume', False)
+        max_refinements = kwargs.pop('max_refinements', 3)
+        
+        if segments is None:
+            drag = self._lock_drag_segment(N, args, **kwargs)
+        
+            if update_state:
+                self.apply_lock_drag(drag, -1, *args)
+                
+            return drag
+        
+        IFO = self if update_state else self.kat.deepcopy().IFO
         
+        return IFO._lock_drag_segments(N, args, int(segments), checkpoint, resume, max_refinements, **kwargs)
+        
+    def _lock_drag_segment(self, N, args, **kwargs):
+        """
+        Runs a lock drag of N steps from the current state of the model.
+        """
         kat = self.kat.deepcopy()
         kat.parse("""
         var dummy 0
@@ -1302,13 +1936,87 @@ class IFO(object):
             put* {target} {attr} $LD{i}
             """.format(i=i, final=final, target=target, attr=attr))
 
-        drag = kat.run(**kwargs)
+        return kat.run(**kwargs)
     
-        if update_state:
-            self.apply_lock_drag(drag, -1, *args)
+    def _lock_drag_param(self, target, attr):
+        p = [_ for _ in self.kat.components[target]._params if _.name == attr]
+        
+        if len(p) != 1:
+            raise pkex.BasePyKatException("Could not find parameter {attr} for component {target}".format(attr=attr, target=target))
+        
+        return p[0]
+        
+    def _lock_drag_segments(self, N, args, segments, checkpoint, resume, max_refinements, **kwargs):
+        """
+        Does a lock drag in segments, see `lock_drag`.
+        """
+        import pickle
+        
+        if segments < 1:
+            raise pkex.BasePyKatException("A lock drag needs at least one segment")
+        
+        args = [tuple(_) for _ in args]
+        segment_args = [(target, attr, final / float(segments)) for target, attr, final in args]
+        steps = max(1, int(math.ceil(N / float(segments))))
+        
+        if resume and checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint, "rb") as f:
+                state = pickle.load(f)
+            
+            if (state["N"], state["args"], state["segments"]) != (N, args, segments):
+                raise pkex.BasePyKatException("Checkpoint {0} is for a different lock drag".format(checkpoint))
+            
+            self.apply_tunings(state["tunings"])
+            
+            for (target, attr), value in state["params"].items():
+                self._lock_drag_param(target, attr).value = value
+        else:
+            state = {"N": N, "args": args, "segments": segments, "outputs": [], "steps": []}
+        
+        callback = kwargs.pop("callback", None)
+        
+        def on_message(tag, value):
+            stop = callback is not None and callback(tag, value)
+            return bool(stop) or tag == "lock_fail"
+        
+        kwargs["callback"] = on_message
+        kwargs["rethrowExceptions"] = True
+        
+        for k in range(len(state["outputs"]), segments):
+            n = steps
+            
+            for attempt in range(max_refinements + 1):
+                try:
+                    out = self._lock_drag_segment(n, segment_args, **kwargs)
+                    break
+                except pkex.FinesseRunAborted as ex:
+                    if ex.tag != "lock_fail":
+                        raise
+                    
+                    pkex.printWarning("Lock lost at step {0} of {1} in segment {2} of the lock drag".format(ex.value, n, k+1))
+                    n *= 2
+            else:
+                raise pkex.BasePyKatException("Lock lost in segment {0} of the lock drag even with {1} steps".format(k+1, n // 2))
             
+            self.apply_lock_drag(out, -1, *segment_args)
+            
+            state["outputs"].append(out)
+            state["steps"].append(n)
+            state["tunings"] = self.get_tunings()
+            state["params"] = dict(((target, attr), float(self._lock_drag_param(target, attr).value)) for target, attr, final in args)
+            
+            if checkpoint is not None:
+                with open(checkpoint + ".tmp", "wb") as f:
+                    pickle.dump(state, f)
+                    
+                os.replace(checkpoint + ".tmp", checkpoint)
+        
+        outs = state["outputs"]
+        drag = self.kat._merge_split_runs(outs)
+        drag.x = np.concatenate([(k + out.x[(1 if k else 0):]) / segments for k, out in enumerate(outs)])
+        
         return drag
-
+    
     def apply_lock_drag(self, out, idx, *args):
     
         for i, (target, attr, final) in enumerate(args):
@@ -1459,7 +2167,55 @@ class IFO(object):
         DOFs: list of DOF names
         detectors: list of detector names
         frequency: frequency to compute sensing matrix at [Hz]
-        Returns: Pandas DataFrame
+        Returns: Pandas DataFrame of complex transfer functions
+        """
+        if not isContainer(DOFs): DOFs = [DOFs]
+        if not isContainer(detectors): detectors = [detectors]
+        
+        data = self.sensing_matrix_f(DOFs, detectors, frequency)[:, :, 0]
+        
+        return SensingMatrix(data, columns=detectors, index=DOFs)
+    
+    def _sensing_kat(self, DOFs, frequency):
+        """
+        Returns a copy of the model with every DOF signal applied, each under
+        its own fsig name so one multisig run gives each DOF its own output.
+        """
+        kat = self.kat.deepcopy()
+
+        kat.verbose = False
+        kat.noxaxis = True
+        kat.multisig = True
+        kat.yaxis = "re:im"
+        kat.removeBlock("locks", False)
+        kat.removeBlock("powers", False)
+        kat.removeBlock("errsigs", False)
+        
+        if hasattr(kat, "x2axis"): kat.x2axis.remove()
+        if hasattr(kat, "xaxis"): kat.xaxis.remove()
+        
+        for DOF in DOFs:
+            kat.parse( self.DOFs[DOF].fsig(fsig=frequency) )
+        
+        return kat
+    
+    def sensing_matrix_f(self, DOFs, detectors, freqs, split=None):
+        """
+        Computes the complex sensing matrix for a collection of DOFs and
+        detectors at one or more signal frequencies.
+        
+        All the DOF signals are applied in a single multisig run, which
+        gives one output per signal from one carrier solution. Frequencies
+        that are linearly or logarithmically spaced are computed in that
+        same run with an xaxis over the signal frequency, any others need
+        one run per frequency.
+        
+        DOFs: list of DOF names
+        detectors: list of detector names
+        freqs: frequency or array of frequencies [Hz]
+        split: number of Finesse processes to run at once, the xaxis is
+               split into this many chunks, see `kat.run_split`
+        Returns: complex array of shape (len(DOFs), len(detectors), len(freqs))
         """
         self.requires_detectors(detectors)
         self.requires_DOFs(DOFs)
@@ -1467,22 +2223,173 @@ class IFO(object):
         if not isContainer(DOFs): DOFs = [DOFs]
         if not isContainer(detectors): detectors = [detectors]
         
-        data = []
-
-        for DOF in DOFs:
-            kat = self.kat.deepcopy()
+        freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        
+        if freqs.ndim != 1 or freqs.size == 0:
+            raise pkex.BasePyKatException("freqs should be a frequency or a 1D array of frequencies")
+        
+        if np.any(freqs <= 0):
+            raise pkex.BasePyKatException("Signal frequencies must be greater than 0")
+        
+        kat = self._sensing_kat(DOFs, freqs[0])
+        names = [self.DOFs[DOF].name + "_fsig" for DOF in DOFs]
+        axis = _frequency_axis(freqs)
+        
+        if axis is not None:
+            kat.parse("xaxis {0} f {1} {2!r} {3!r} {4}".format(names[0], *axis))
+            runs = [(slice(None), kat)]
+        elif freqs.size == 1:
+            runs = [(0, kat)]
+        else:
+            runs = []
+            
+            for i, f in enumerate(freqs):
+                _kat = kat.deepcopy()
+                _kat.signals.f = f
+                runs.append((i, _kat))
+        
+        data = np.zeros((len(DOFs), len(detectors), freqs.size), dtype=complex)
+        
+        if split is not None and split > 1 and len(runs) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            
+            with ThreadPoolExecutor(max_workers=split) as pool:
+                outs = list(pool.map(lambda _: _[1].run(rethrowExceptions=True), runs))
+        else:
+            outs = [_kat.run(split=(split if axis else None), rethrowExceptions=True) for idx, _kat in runs]
+        
+        for (idx, _kat), out in zip(runs, outs):
+            for i, name in enumerate(names):
+                for j, det in enumerate(detectors):
+                    data[i, j, idx] = out[name][det]
+        
+        return data
     
-            kat.noxaxis = True
-            kat.yaxis = "re:im"
-            kat.removeBlock("locks", False)
-            kat.removeBlock("powers", False)
-            kat.removeBlock("errsigs", False)
+    def sensing_matrix_over_frequency(self, DOFs, detectors, f_array, split=None):
+        """
+        Computes the complex sensing matrix for a collection of DOFs and
+        detectors at each of the frequencies given, for example to design
+        control loops.
+        
+        See `sensing_matrix_f` for how the runs are done. The frequency
+        axis is cut into `split` chunks that are run at the same time,
+        which defaults to the number of CPUs.
+        
+        Example:
+            f = np.logspace(0, 4, 400)
+            sens = kat.IFO.sensing_matrix_over_frequency(DOFs, detectors, f)
+            
+            sens.tf("DARM", "AS_f2_I")  # transfer function over frequency
+            sens.at(100).display()      # SensingMatrix at 100Hz
+            
+        DOFs: list of DOF names
+        detectors: list of detector names
+        f_array: array of frequencies [Hz]
+        split: number of Finesse processes to run at once
+        Returns: SensingMatrixF
+        """
+        if not isContainer(DOFs): DOFs = [DOFs]
+        if not isContainer(detectors): detectors = [detectors]
+        
+        f_array = np.atleast_1d(np.asarray(f_array, dtype=float))
+        
+        if split is None:
+            import multiprocessing
+            split = multiprocessing.cpu_count()
+        
+        data = self.sensing_matrix_f(DOFs, detectors, f_array, split=split)
+        
+        return SensingMatrixF(data, DOFs, detectors, f_array)
     
-            kat.parse( self.DOFs[DOF].fsig(fsig=frequency) )
+class SensingMatrixF(object):
+    """
+    A sensing matrix over frequency, the complex transfer functions from
+    each DOF to each detector stored in `data` with the shape
+    (len(DOFs), len(detectors), len(frequencies)).
+    
+    Indexing with a DOF name gives the transfer functions from it to each
+    detector, with a (DOF, detector) pair the transfer function between
+    them. `at` gives the SensingMatrix at one frequency, whose display,
+    phase_reference and radar_plot methods can then be used.
+    """
+    def __init__(self, data, DOFs, detectors, frequencies):
+        self.data = np.asarray(data)
+        self.DOFs = list(DOFs)
+        self.detectors = list(detectors)
+        self.frequencies = np.asarray(frequencies)
+        
+        if self.data.shape != (len(self.DOFs), len(self.detectors), len(self.frequencies)):
+            raise pkex.BasePyKatException("Sensing matrix data has shape {0} but there are {1} DOFs, {2} detectors and {3} frequencies".format(self.data.shape, len(self.DOFs), len(self.detectors), len(self.frequencies)))
+    
+    def __repr__(self):
+        return "<SensingMatrixF {0} DOFs x {1} detectors x {2} frequencies>".format(*self.data.shape)
+    
+    @property
+    def shape(self): return self.data.shape
+    
+    def _DOF_index(self, DOF):
+        if DOF not in self.DOFs:
+            raise pkex.BasePyKatException("DOF `%s` is not in this sensing matrix" % DOF)
+        
+        return self.DOFs.index(DOF)
+        
+    def _detector_index(self, detector):
+        if detector not in self.detectors:
+            raise pkex.BasePyKatException("Detector `%s` is not in this sensing matrix" % detector)
+        
+        return self.detectors.index(detector)
+    
+    def frequency_index(self, f):
+        """
+        Returns the index of the frequency closest to f.
+        """
+        return int(np.argmin(np.abs(self.frequencies - f)))
+    
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.tf(*key)
+        else:
+            return self.data[self._DOF_index(key)]
     
-            data.append(kat.run()[detectors])
+    def tf(self, DOF, detector):
+        """
+        Returns the transfer function from the DOF to the detector over frequency.
+        """
+        return self.data[self._DOF_index(DOF), self._detector_index(detector)]
+    
+    def at(self, f):
+        """
+        Returns the SensingMatrix at the frequency closest to f.
+        """
+        return self.matrix(self.frequency_index(f))
     
-        return SensingMatrix(np.real(data), columns=detectors, index=DOFs)
+    def matrix(self, idx):
+        """
+        Returns the SensingMatrix for the idx-th frequency.
+        """
+        return SensingMatrix(self.data[:, :, idx], columns=self.detectors, index=self.DOFs)
+        
+    def phase_reference(self, DOF):
+        """
+        Returns a new SensingMatrixF with each detector's phase at every
+        frequency rotated so the DOF's transfer functions are real.
+        """
+        ref = np.angle(self[DOF])
+        return SensingMatrixF(self.data * np.exp(-1j * ref), self.DOFs, self.detectors, self.frequencies)
+    
+    def display(self, f):
+        """
+        Prints the SensingMatrix at the frequency closest to f.
+        """
+        print("f = %g Hz" % self.frequencies[self.frequency_index(f)])
+        self.at(f).display()
+        
+    def radar_plot(self, detector_I, detector_Q, f, **kwargs):
+        """
+        Makes the I-Q radar plot at the frequency closest to f, see
+        SensingMatrix.radar_plot for the other options.
+        """
+        return self.at(f).radar_plot(detector_I, detector_Q, **kwargs)
     
 class DOF(object):
     """
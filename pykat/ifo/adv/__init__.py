@@ -1146,6 +1146,7 @@ def assert_adv_ifo_kat(kat):
     if not isinstance(kat.IFO, ADV_IFO):
         raise pkex.BasePyKatException("\033[91mkat file is not an ADV_IFO compatiable kat\033[0m")
               
+@cached_make_kat("adv")
 def make_kat(name="avirgo_PR_OMC", katfile=None, verbose = False, debug=False, keepComments=False, preserveConstants=True):
     """
     Returns a kat object and fills in the kat.IFO property for storing
@@ -1166,6 +1167,8 @@ def make_kat(name="avirgo_PR_OMC", katfile=None, verbose = False, debug=False, k
     
     keepComments: If true it will keep the original comments from the file
     preserveComments: If true it will keep the const commands in the kat
+    cache: A pykat.cache.ModelCache to load the kat object from or store it in, False
+           to not use one, or None to use the default set by pykat.cache.enable_models()
     """
 
     # Pre-defined file-names
@@ -1531,92 +1534,50 @@ def scan_to_precision(kat, DOF, pretune_precision, minmax="max", phi=0.0, precis
     return phi, precision
     
     
-def pretune(_kat, pretune_precision=1.0e-4, verbose=False):
-    assert_adv_ifo_kat(_kat)
-
-    
-    
-    # This function needs to apply a bunch of pretunings to the original
-    # kat and associated IFO object passed in
+def pretune_steps(_kat):
+    """
+    Returns the PretuneSteps that `pretune` does: each arm is tuned for
+    maximum power on its own, then MICH for minimum power at the AS port,
+    then PRCL and, if there is a signal recycling cavity, SRCL.
+    """
     IFO = _kat.IFO
     m = IFO.mirrors
-
-    vprint(verbose,"-- pretuning interferometer to precision {0:2g} deg = {1:2g} m".format(pretune_precision,
-                                                                                           pretune_precision*_kat.lambda0/360.0))
     
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    vprint(verbose, "   scanning X arm (maximising power)")
+    steps = [
+        PretuneStep("ARMN", "preARMN", transparent=[m["PRM"], m["IY"], m["EY"]], BS_RTL=(0.0, 1.0, 0.0),
+                    precision=60.0, description="scanning X arm (maximising power)"),
+        PretuneStep("ARMW", "preARMW", transparent=[m["PRM"], m["IX"], m["EX"]], BS_RTL=(1.0, 0.0, 0.0),
+                    precision=60.0, description="scanning Y arm (maximising power)"),
+        PretuneStep("MICH", "preMICH", requires=["ARMN", "ARMW"], transparent=[m["PRM"]], minmax="min",
+                    precision=30, description="scanning MICH (minimising power)"),
+        PretuneStep("PRCL", "prePRCL", requires=["MICH"], transparent=([m["SRM"]] if IFO.isSRC else []),
+                    precision=60.0, description="scanning PRCL (maximising power)")
+    ]
     
-    make_transparent(kat, [m["PRM"]])
-    make_transparent(kat, [m["IY"], m["EY"]])
+    if IFO.isSRC:
+        steps.append(PretuneStep("SRCL", "preSRCL", requires=["PRCL"], phi=0, precision=10, offset=-90.0, digits=4,
+                                 description="scanning SRCL (maximising carrier power, then adding 90 deg)"))
     
-    kat.BS.setRTL(0.0, 1.0, 0.0) # set BS refl. for X arm
+    return steps
     
-    phi, precision = scan_to_precision(kat, IFO.preARMN, pretune_precision)
-    phi = round(phi/pretune_precision)*pretune_precision
-    phi = round_to_n(phi,5)
     
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
+def pretune(_kat, pretune_precision=1.0e-4, verbose=False, max_workers=1, resume=False, method="scan"):
+    """
+    Pretunes the arms, MICH, PRCL and SRCL of the model, see `pretune_steps`.
+    With max_workers > 1 the arms are tuned at the same time. See
+    pykat.ifo.pretune_pipeline for the options and how to resume a pretune.
+    """
+    assert_adv_ifo_kat(_kat)
     
-    IFO.preARMN.apply_tuning(phi)
-
-    vprint(verbose, "   scanning Y arm (maximising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    make_transparent(kat,[m["PRM"]])
-    make_transparent(kat,[m["IX"], m["EX"]])
-    kat.BS.setRTL(1.0,0.0,0.0) # set BS refl. for Y arm
-    phi, precision = scan_to_precision(kat, IFO.preARMW, pretune_precision)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preARMW.apply_tuning(phi)
-
-    vprint(verbose, "   scanning MICH (minimising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
+    state = pretune_pipeline(_kat, pretune_steps(_kat), pretune_precision, verbose=verbose,
+                             max_workers=max_workers, resume=resume, method=method)
     
-    make_transparent(kat,[m["PRM"]])
-    phi, precision = scan_to_precision(kat, IFO.preMICH, pretune_precision, minmax="min", precision=30)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preMICH.apply_tuning(phi, add=False)
-
-    vprint(verbose, "   scanning PRCL (maximising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    if IFO.isSRC:
-        make_transparent(kat,[m["SRM"]])
-    phi, precision = scan_to_precision(kat, IFO.prePRCL, pretune_precision)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.prePRCL.apply_tuning(phi)
-
-    if IFO.isSRC:
-        vprint(verbose, "   scanning SRCL (maximising carrier power, then adding 90 deg)")
-        kat = _kat.deepcopy()
-        kat.removeBlock("locks", False)
-
-        phi, precision = scan_to_precision(kat, IFO.preSRCL, pretune_precision, phi=0, precision = 10)
-        phi=round(phi/pretune_precision)*pretune_precision
-        phi=round_to_n(phi,4)-90.0
-
-        vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-        IFO.preSRCL.apply_tuning(phi)
-
     # Removing previously set DCoffset dictionary
     _kat.data['DCoffset'] = {}
     
-    vprint(verbose,"   ... done")
-
+    return state
     
 
-
 def pretune_status(_kat):
     assert_adv_ifo_kat(_kat)
     
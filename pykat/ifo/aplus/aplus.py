@@ -492,6 +492,7 @@ def assert_aplus_ifo_kat(kat):
     if not isinstance(kat.IFO, APLUS_IFO):
         raise pkex.BasePyKatException("\033[91mkat file is not an APLUS_IFO compatiable kat\033[0m")
               
+@cached_make_kat("aplus")
 def make_kat(katfile=None, verbose=False, debug=False,
              keepComments=False, preserveConstants=False):
     """
@@ -500,6 +501,8 @@ def make_kat(katfile=None, verbose=False, debug=False,
 
     keepComments: If true it will keep the original comments from the file
     preserveComments: If true it will keep the const commands in the kat
+    cache: A pykat.cache.ModelCache to load the kat object from or store it in, False
+           to not use one, or None to use the default set by pykat.cache.enable_models()
     """
     names = ['design']
     
@@ -658,147 +661,49 @@ def make_kat(katfile=None, verbose=False, debug=False,
     return kat
         
     
-def pretune(_kat, pretune_precision=1.0e-4, verbose=False, debug={}):
+def pretune_steps(_kat):
+    """
+    Returns the PretuneSteps that `pretune` does: each arm is tuned for
+    maximum power on its own, then MICH for minimum power at the AS port,
+    then PRCL and SRCL.
+    """
+    return [
+        PretuneStep("ARMX", "preARMX", transparent=["PRM", "SRM", "ITMY", "ETMY"], BS_RTL=(0.0, 1.0, 0.0),
+                    description="scanning X arm (maximising power)"),
+        PretuneStep("ARMY", "preARMY", transparent=["PRM", "SRM", "ITMX", "ETMX"], BS_RTL=(1.0, 0.0, 0.0),
+                    description="scanning Y arm (maximising power)"),
+        PretuneStep("MICH", "preMICH", requires=["ARMX", "ARMY"], transparent=["PRM", "SRM"], minmax="min",
+                    precision=30.0, add=True, description="scanning MICH (minimising power)"),
+        PretuneStep("PRCL", "prePRCL", requires=["MICH"], transparent=["SRM"],
+                    description="scanning PRCL (maximising power)"),
+        PretuneStep("SRCL", "preSRCL", requires=["PRCL"], phi=0, precision=90.0, offset=-90.0,
+                    description="scanning SRCL (maximising carrier power, then adding 90 deg)")
+    ]
+    
+    
+def pretune(_kat, pretune_precision=1.0e-4, verbose=False, debug={}, max_workers=1, resume=False, method="scan"):
+    """
+    Pretunes the arms, MICH, PRCL and SRCL of the model, see `pretune_steps`.
+    With max_workers > 1 the arms are tuned at the same time. See
+    pykat.ifo.pretune_pipeline for the options and how to resume a pretune.
+    """
     assert_aplus_ifo_kat(_kat)
     
-    # This function needs to apply a bunch of pretunings to the original
-    # kat and associated IFO object passed in
-    IFO = _kat.IFO
-    
-    vprint(verbose, "-- pretuning interferometer to precision {0:2g} deg = {1:2g} m".format(pretune_precision, pretune_precision*_kat.lambda0/360.0))
-    
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    vprint(verbose, "   scanning X arm (maximising power)")
-    
-    make_transparent(kat, ["PRM", "SRM"])
-    make_transparent(kat, ["ITMY", "ETMY"])
-    
-    kat.BS.setRTL(0.0, 1.0, 0.0) # set BS refl. for X arm
-    
-    phi, precision = scan_to_precision(kat.IFO.preARMX, pretune_precision)
-    phi = round(phi/pretune_precision)*pretune_precision
-    phi = round_to_n(phi,5)
-    
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    
-    IFO.preARMX.apply_tuning(phi)
-
-    vprint(verbose, "   scanning Y arm (maximising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    make_transparent(kat,["PRM","SRM"])
-    make_transparent(kat,["ITMX", "ETMX"])
-    kat.BS.setRTL(1.0,0.0,0.0) # set BS refl. for Y arm
-    phi, precision = scan_to_precision(kat.IFO.preARMY, pretune_precision)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preARMY.apply_tuning(phi)
-
-    vprint(verbose, "   scanning MICH (minimising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    make_transparent(kat,["PRM","SRM"])
-    phi, precision = scan_to_precision(kat.IFO.preMICH, pretune_precision, minmax="min", precision=30.0)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preMICH.apply_tuning(phi, add=True)
-
-    vprint(verbose, "   scanning PRCL (maximising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    make_transparent(kat,["SRM"])
-    phi, precision = scan_to_precision(kat.IFO.prePRCL, pretune_precision)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi, 5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.prePRCL.apply_tuning(phi)
-
-    vprint(verbose, "   scanning SRCL (maximising carrier power, then adding 90 deg)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    phi, precision = scan_to_precision(kat.IFO.preSRCL, pretune_precision, phi=0, precision=90.0, debug=("SRCL" in debug))
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi, 5) - 90.0
-    
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preSRCL.apply_tuning(phi)
-    
-    vprint(verbose,"   ... done")
+    return pretune_pipeline(_kat, pretune_steps(_kat), pretune_precision, verbose=verbose, debug=debug,
+                            max_workers=max_workers, resume=resume, method=method)
     
 
-def pretune_2(_kat, pretune_precision=1.0e-4, verbose=False, debug={}):
+def pretune_2(_kat, pretune_precision=1.0e-4, verbose=False, debug={}, max_workers=1, resume=False, method="scan"):
     """
     This will pretune the arms and PRC cavities. This should be used in conjunction with the
     pretune_SRCL function after the DC offset has been set.
     """
     assert_aplus_ifo_kat(_kat)
     
-    # This function needs to apply a bunch of pretunings to the original
-    # kat and associated IFO object passed in
-    IFO = _kat.IFO
-    
-    vprint(verbose, "-- pretuning interferometer to precision {0:2g} deg = {1:2g} m".format(pretune_precision, pretune_precision*_kat.lambda0/360.0))
-    
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    vprint(verbose, "   scanning X arm (maximising power)")
+    steps = [_ for _ in pretune_steps(_kat) if _.name != "SRCL"]
     
-    make_transparent(kat, ["PRM", "SRM"])
-    make_transparent(kat, ["ITMY", "ETMY"])
-    
-    kat.BS.setRTL(0.0, 1.0, 0.0) # set BS refl. for X arm
-    
-    phi, precision = scan_to_precision(kat, IFO.preARMX, pretune_precision)
-    phi = round(phi/pretune_precision)*pretune_precision
-    phi = round_to_n(phi,5)
-    
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    
-    IFO.preARMX.apply_tuning(phi)
-
-    vprint(verbose, "   scanning Y arm (maximising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    make_transparent(kat,["PRM","SRM"])
-    make_transparent(kat,["ITMX", "ETMX"])
-    kat.BS.setRTL(1.0,0.0,0.0) # set BS refl. for Y arm
-    phi, precision = scan_to_precision(kat, IFO.preARMY, pretune_precision)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preARMY.apply_tuning(phi)
-
-    vprint(verbose, "   scanning MICH (minimising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    
-    make_transparent(kat,["PRM","SRM"])
-    phi, precision = scan_to_precision(kat, IFO.preMICH, pretune_precision, minmax="min", precision=30.0)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi,5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.preMICH.apply_tuning(phi, add=True)
-
-    vprint(verbose, "   scanning PRCL (maximising power)")
-    kat = _kat.deepcopy()
-    kat.removeBlock("locks", False)
-    make_transparent(kat,["SRM"])
-    phi, precision = scan_to_precision(kat, IFO.prePRCL, pretune_precision)
-    phi=round(phi/pretune_precision)*pretune_precision
-    phi=round_to_n(phi, 5)
-    vprint(verbose, "   found max/min at: {} (precision = {:2g})".format(phi, precision))
-    IFO.prePRCL.apply_tuning(phi)
-    
-    vprint(verbose, "   ... done")
+    return pretune_pipeline(_kat, steps, pretune_precision, verbose=verbose, debug=debug,
+                            max_workers=max_workers, resume=resume, method=method)
     
     
 def pretune_SRCL(_kat, verbose=False, debug=False):
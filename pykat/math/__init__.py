@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.integrate import newton_cotes
 
 def newton_weights(x, newtonCotesOrder):
     """
@@ -10,6 +9,8 @@ def newton_weights(x, newtonCotesOrder):
     If the order Newton-Cotes order specified does not produce a rule that fits
     into len(x), the order is decremented and that is used to fill gaps that do no fit.
     """
+    from scipy.integrate import newton_cotes
+    
     # ensure we have a 1xN array
     x = np.array(x).squeeze()
     
@@ -4,7 +4,6 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import numpy as np
-import scipy.special
 
 def jacobi(n,a,b,x):
   """
@@ -23,6 +22,7 @@ def jacobi(n,a,b,x):
   function does not.
   Andreas Freise 15.05.2016
   """
+  import scipy.special
 
   P=0.0
   for s in np.arange(0,n+1):
@@ -18,49 +18,82 @@ if USE_GUI:
 import pykat.exceptions as pkex
 import pykat.external.six as six
 
-from pykat.freeze import canFreeze
+from pykat.freeze import canFreeze, deepcopy_dict
 from pykat.components import Component, NodeGaussSetter
 from pykat.detectors import BaseDetector as Detector
 from pykat.optics.gaussian_beams import BeamParam
 from copy import deepcopy
+from collections import deque, OrderedDict
+
+def _mirror_transmits(comp):
+    if comp.T.value is None:
+        return 1 - comp.R.value - comp.L.value > 0
+    else:
+        return comp.T.value > 0
+
+def _bs_reflects(comp):
+    if comp.R.value is None:
+        return 1 - comp.T.value - comp.L.value != 0
+    else:
+        return comp.R.value != 0
+
+def _bs_transmits(comp):
+    if comp.T.value is None:
+        return 1 - comp.R.value - comp.L.value != 0
+    else:
+        return comp.T.value != 0
+
+def _component_links(comp, nodes):
+    """
+    Returns, for each node of comp in order, the nodes a beam entering comp
+    there can leave it from, as pairs of a function saying if it can go that
+    way, or None if it always can, and the index of the node it leaves from.
+    None is returned for components a path can't be found through.
+    """
+    if isinstance(comp, pykat.components.beamSplitter):
+        return (((_bs_reflects, 1), (_bs_transmits, 2)),
+                ((_bs_reflects, 0), (_bs_transmits, 3)),
+                ((_bs_reflects, 3), (_bs_transmits, 0)),
+                ((_bs_reflects, 2), (_bs_transmits, 1)))
+    elif isinstance(comp, pykat.components.mirror):
+        return (((_mirror_transmits, 1),), ((_mirror_transmits, 0),))
+    elif isinstance(comp, pykat.components.dbs):
+        return (((None, 2),), ((None, 0),), ((None, 3),), ((None, 1),))
+    elif isinstance(comp, pykat.components.laser):
+        # a beam can't go any further at a laser
+        return ((),) * len(nodes)
+    elif len(nodes) == 2:
+        return (((None, 1),), ((None, 0),))
+    else:
+        return None
 
-id___ = 0
-    
 class NodeNetwork(object):
     
-    def __new__(cls, *args, **kwargs):
-        # This creates an instance specific class for the component
-        # this enables us to add properties to instances rather than
-        # all classes
-        global id___
-        id___ += 1
-        cnew_name = str("%s.%s_%i" % (cls.__module__, cls.__name__, id___))
-        
-        cnew = type(cnew_name, (cls,), {})
-        
-        #return object.__new__(cnew, *args, **kwargs)
-        return object.__new__(cnew)
-
+    # Number of paths getComponentsBetween keeps
+    max_cached_paths = 256
+    
     def __init__(self, kat):
         self.__nodes = {}
         self.__kat = kat
         self.__nodeComponents = {} # dictionary of tuples containing which components are connected to a node
         self.__componentNodes = {} # dictionary of tuples containing which nodes are connected to a given component
         self.__componentCallback = {}
+        self.__links = {} # which nodes a beam can go between through each component
+        self.__paths = OrderedDict() # paths found by getComponentsBetween
         self.__node_id = 1
     
     def __deepcopy__(self, memo):
-        """
-        When deep copying a kat object we need to take into account
-        the instance specific properties.
-        """
-        
-        # Here we create a copy of this object based of the base class
-        # of this one, otherwise we're making a copy of a copy of a copy...
-        result = self.__class__.__new__(self.__class__.__base__)
-        result.__dict__ = deepcopy(self.__dict__, memo)
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        result.__dict__ = deepcopy_dict(self.__dict__, memo)
         
         return result
+    
+    def __setattr__(self, name, value):
+        if name in self.__dict__.get("_NodeNetwork__nodes", ()):
+            raise AttributeError("can't set attribute '{0}', it is a node in the simulation".format(name))
+        
+        super(NodeNetwork, self).__setattr__(name, value)
                 
     @property
     def kat(self): return self.__kat
@@ -87,6 +120,8 @@ class NodeNetwork(object):
         
         self.__componentNodes[comp.id] = tuple(list)
         self.__componentCallback[comp.id] = change_callback
+        self.__links[comp.id] = _component_links(comp, list)
+        self.__paths.clear()
         
         change_callback()
     
@@ -143,6 +178,8 @@ class NodeNetwork(object):
         self.__componentNodes[comp.id] = tuple(comp_nodes)
         del comp_nodes
         
+        self.__paths.clear()
+        
         # if old node is no longer connected to anything then delete it
         if node_old.components.count(None) == 2:
             self.removeNode(node_old)
@@ -176,28 +213,6 @@ class NodeNetwork(object):
         
         if do_callback: self.__componentCallback[comp.id]()
     
-    def __update_nodes_properties(self):
-        # check if any node setters have already been added. If so we
-        # need to remove them. This function should get called if the nodes
-        # are updated, either by some function call or the GUI
-        key_rm = [k for k in self.__dict__ if k.startswith("__node_", 0, 7)]
-
-        # now we have a list of which to remove
-        for key in key_rm:
-            ns = self.__dict__[key]
-            name = str(ns.name)
-            
-            if '__node_' + name in self.__dict__:
-                delattr(self, '__node_' + name)
-            
-            if name in self.__class__.__dict__:
-                delattr(self.__class__, name)
-        
-        # Now re-add them pointing to the recent nodes
-        for node in self.__nodes:
-            if not self.__nodes[node].isDump:
-                self.__add_node_attr(self.__nodes[node])
-         
     def createNode(self, node_name):
         """
         This creates a new node object. It won't be connected to anything or added to a
@@ -222,9 +237,12 @@ class NodeNetwork(object):
             self.__nodeComponents[n.id] = (None, None)
             
             if not n.isDump:
-                self.__add_node_attr(n) # add node as a member of this object, e.g. kat.nodes.n
                 self.__nodes[node_name] = n
                 
+                # add node as a member of this object, e.g. kat.nodes.n
+                if node_name not in self.__dict__ and not hasattr(type(self), node_name):
+                    self.__dict__[node_name] = n
+                
             
             return n
     
@@ -249,6 +267,8 @@ class NodeNetwork(object):
                
         del self.__componentCallback[comp.id]
         del self.__componentNodes[comp.id]
+        del self.__links[comp.id]
+        self.__paths.clear()
         
     def removeNode(self, node):
         """
@@ -285,10 +305,13 @@ class NodeNetwork(object):
             raise pkex.BasePyKatException("Cannot remove a node which is attached to detectors still")
         
         if not isinstance(node, DumpNode):
-            self.__remove_node_attr(node)
             del self.__nodes[node.name] 
             
+            if self.__dict__.get(node.name) is node:
+                del self.__dict__[node.name]
+            
         del self.__nodeComponents[node.id]
+        self.__paths.clear()
         
     def hasNode(self, name):
         ""
@@ -315,29 +338,6 @@ class NodeNetwork(object):
         """
         return self.__nodeComponents[node.id]
     
-    def __add_node_attr(self, node):
-
-        if not isinstance(node, Node):
-            raise pkex.BasePyKatException("Argument is not of type Node")
-        
-        name = node.name
-        fget = lambda self: self.__get_node_attr(name)
-        
-        setattr(self.__class__, name, property(fget))
-        setattr(self, '__node_' + name, node)                   
-    
-    def __remove_node_attr(self, node):
-        if not isinstance(node, Node):
-            kat.nodes.replaceNode(kat.bs1, "n1", kat.nodes.createNode("test1"))
-        
-        name = node.name
-        
-        delattr(self, '__node_' + name)
-        delattr(self.__class__, name)
-        
-    def __get_node_attr(self, name):
-        return getattr(self, '__node_' + name)        
-        
     def __getitem__(self, value):
         if str(value) in self.__nodes:
             return self.__nodes[str(value)]
@@ -347,169 +347,66 @@ class NodeNetwork(object):
     def __contains__(self, value):
         return value in self.__nodes
     
-    def __nodeSearch(self, fnode, currcomp, branches, tnode, searched=None):
+    def __findPath(self, fn, tn, checks):
         """
-        fnode: From node (Start)
-        currcomp: Current component
-        branches: List of branches not yet explored
-        tnode: To node (Goal)
+        Searches breadth first for the shortest path a beam can take from
+        node fn to node tn, returning a list of (component, from node, to
+        node). Beam splitters that don't reflect or transmit, and mirrors
+        that don't transmit, are not passed through. Each of these checks
+        is added to checks so a cached path can be checked again later.
         """
-        
-        if fnode in searched:
-            #already checked this node, stop us going around in circles
-            branches[-1][0] = True
-            return False 
-            
-        elif fnode == tnode:
-            branches[-1][0] = True
-            branches[-1][1] = True
-            return True # Hurrah, we have found a path to the node
-        elif fnode.isDump:
-            branches[-1][0] = True
-            return False # if the current node is a dump, we need to check another branch
+        # Each state is a component and the node the beam enters it at,
+        # mapped to the state it came from. A beam can pass a node in both
+        # directions but each state is only searched once
+        queue = deque()
+        previous = {}
 
-        nextnode = None
+        for comp in fn.components:
+            if comp is not None:
+                previous[(fn, comp)] = None
+                queue.append((fn, comp))
 
-        searched[fnode] = True
-        
-        
-        if isinstance(currcomp, pykat.components.beamSplitter):
-            # if we get to a beamsplitter then we need to 
-            # create new branches to search: the rfelected
-            # and transmitted
-            
-            # set this branch as searched
-            branches[-1][0] = True
-            # add two new ones
-            
-            if fnode == currcomp.nodes[0]:
-                rn = currcomp.nodes[1]
-                tn = currcomp.nodes[2]
-            elif fnode == currcomp.nodes[1]:
-                rn = currcomp.nodes[0]
-                tn = currcomp.nodes[3]
-            elif fnode == currcomp.nodes[2]:
-                rn = currcomp.nodes[3]
-                tn = currcomp.nodes[0]
-            elif fnode == currcomp.nodes[3]:
-                rn = currcomp.nodes[2]
-                tn = currcomp.nodes[1]
-            else:
-                raise pkex.BasePyKatException("Node not attached in path find to BS")
-            
-            # Don't reflect or transmit if the BS doesn't
-            if currcomp.R.value is None:
-                _R = 1 - currcomp.T.value - currcomp.L.value
-            else:
-                _R = currcomp.R.value
-                
-            if currcomp.T.value is None:
-                _T = 1 - currcomp.R.value - currcomp.L.value
-            else:
-                _T = currcomp.T.value
-            
-            if _R == 0:
-                rn = None
-            
-            if _T == 0:
-                tn = None
-            
-            if tn is tnode or rn is tnode:
-                branches[-1][0] = True
-                branches[-1][1] = True
-                branches[-1][-1].append(currcomp)
-                return True
-            else:   
-                if tn is not None:
-                    nextcomp = None
-            
-                    if tn.components[0] == currcomp:
-                        nextcomp = tn.components[1]
-                    elif tn.components[1] == currcomp:
-                        nextcomp = tn.components[0]
-            
-                    if nextcomp is not None:
-                        branches.append([False, False, tn, nextcomp, [currcomp]])
-            
-                if rn is not None:
-                    nextcomp = None
-            
-                    if rn.components[0] == currcomp:
-                        nextcomp = rn.components[1]
-                    elif rn.components[1] == currcomp:
-                        nextcomp = rn.components[0]
-            
-                    if nextcomp is not None:
-                        branches.append([False, False, rn, nextcomp, [currcomp]])
-            
-                return False
-        elif isinstance(currcomp, pykat.components.mirror):
-            if currcomp.T.value is None:
-                _T = 1 - currcomp.R.value - currcomp.L.value 
-            else:
-                _T = currcomp.T.value 
-                
-            if _T > 0:
-                if currcomp.nodes[0] == fnode:
-                    nextnode = currcomp.nodes[1]
-                elif currcomp.nodes[1] == fnode:
-                    nextnode = currcomp.nodes[0]
-                else:
-                    raise pkex.BasePyKatException("Unexpeceted condition")
-                
-        elif isinstance(currcomp, pykat.components.dbs):
-            if currcomp.nodes[0] == fnode:
-                nextnode = currcomp.nodes[2]
-            elif currcomp.nodes[1] == fnode:
-                nextnode = currcomp.nodes[0]
-            elif currcomp.nodes[2] == fnode:
-                nextnode = currcomp.nodes[3]
-            elif currcomp.nodes[3] == fnode:
-                nextnode = currcomp.nodes[1]
-            else:
-                raise pkex.BasePyKatException("Unexpeceted condition")
-            
-        elif isinstance(currcomp, pykat.components.laser):
-            # if we are at a laser then we can't go any further
-            # and it isn;t this node as we checked before
-            branches[-1][0] = True
-            return False
-        elif len(currcomp.nodes) == 2:
-            if currcomp.nodes[0] == fnode:
-                nextnode = currcomp.nodes[1]
-            elif currcomp.nodes[1] == fnode:
-                nextnode = currcomp.nodes[0]
-            else:
-                raise pkex.BasePyKatException("Unexpeceted condition")
-        else:
-            raise pkex.BasePyKatException("Did not handle component {0} correctly, has more or less than 2 nodes.".format(currcomp))
-        
-        if nextnode is None:
-            branches[-1][0] = True
-            return False
-        elif nextnode == tnode:
-            branches[-1][0] = True
-            branches[-1][1] = True
-            branches[-1][-1].append(currcomp)
-            return True
-        else:
-            # Now we have the next node, we need the next component
-            if nextnode.components[0] == currcomp:
-                nextcomp = nextnode.components[1]
-            elif nextnode.components[1] == currcomp:
-                nextcomp = nextnode.components[0]
-            else:
-                raise pkex.BasePyKatException("Unexpeceted condition")
+        while len(queue) > 0:
+            state = queue.popleft()
+            node, comp = state
 
-            if nextcomp is None:
-                branches[-1][0] = True
-                return False
-            
-            branches[-1][-1].append(currcomp)
-            
-            return self.__nodeSearch(nextnode, nextcomp, branches, tnode, searched)
+            if node.isDump:
+                continue
+
+            nodes = self.__componentNodes[comp.id]
+            links = self.__links[comp.id]
+
+            if links is None:
+                raise pkex.BasePyKatException("Did not handle component {0} correctly, has more or less than 2 nodes.".format(comp))
+
+            for passes, i in links[nodes.index(node)]:
+                if passes is not None:
+                    result = passes(comp)
+                    checks.append((passes, comp, result))
+
+                    if not result:
+                        continue
+
+                nextnode = nodes[i]
+
+                if nextnode is tn:
+                    path = [(comp, node, tn)]
+
+                    while previous[state] is not None:
+                        state, to_node = previous[state], state[0]
+                        path.append((state[1], state[0], to_node))
+
+                    return path[::-1]
+
+                comps = self.__nodeComponents[nextnode.id]
+                nextcomp = comps[1] if comps[0] is comp else comps[0]
+
+                if nextcomp is not None and (nextnode, nextcomp) not in previous:
+                    previous[(nextnode, nextcomp)] = state
+                    queue.append((nextnode, nextcomp))
+
+        return []
 
-            
     def getComponentsBetween(self, from_node, to_node, getNodes=False):
         """
         This function will trace the path between the two nodes specified and return a list
@@ -517,6 +414,11 @@ class NodeNetwork(object):
         
         if getNodes is True a list of node pairs will be returned along with components. Each
         element contains the direction the trace has undergone, e.g. (from, to).
+
+        The shortest path is returned when there is more than one. Paths are
+        cached until components or nodes are added, removed or reconnected,
+        and a cached path is only used if the beam splitters and mirrors it
+        passed would still reflect or transmit the same.
         """
         
         if isinstance(from_node, six.string_types):
@@ -540,106 +442,29 @@ class NodeNetwork(object):
         if to_node.name not in self.__nodes:
             raise pkex.BasePyKatException("Node {0} cannot be found in this kat object".format(to_node))
         
-            
-            
         fn = self.__nodes[from_node.name]
         tn = self.__nodes[to_node.name]
         
-        found = False
-        
-        for comp in fn.components:
-            if found:
-                break
-            else:
-                found = False
-                
-            branches = []
-            
-            #print("Trying", comp)
-            
-            if comp is not None:
-                branches.append([False, False, fn, comp, []])
-        
-            searched = dict()
-        
-            #print(branches)
-            #i=0
-            while len(branches) > 0 and branches[-1][1] != True:
-                #print(i)
-                #j=0
-            
-                if len(branches) == 0:
-                    raise Exception("Could not find path between %s and %s" % (from_node, to_node))
-                
-                while len(branches) > 0 and branches[-1][0] == False:
-                    branch = branches[-1]
-                    #print("START", j)
-                    #print(branch)
-            
-                    found = self.__nodeSearch(branch[2], branch[3], branches, tn, searched)
-                    
-                    if not found:
-                        if len(branches) > 0 and branches[-1][0] != False:            
-                            branches.pop()
-                            #print("DEL", j)
-                    else:
-                        #print("FOUND", to_node)    
-                        found = True
-                        break
-                        
-                    #print("END", j)
-                
-                    #j+=1
+        key = (fn.id, tn.id)
+        cached = self.__paths.pop(key, None)
 
-                if len(branches) > 0 and branches[-1][1] != True:
-                    while len(branches) > 0 and branches[-1][0] == True:
-                        branches.pop()
-                        #print("DEL",i)
-            
-                #i += 1
+        if cached is None or not all(passes(comp) == result for passes, comp, result in cached[1]):
+            checks = []
+            cached = (self.__findPath(fn, tn, checks), checks)
 
-                
-        comps = []
-        
-        if len(branches) > 0  and branches[-1][0] == True and branches[-1][1] == True:
-            # select the branches that form the path from node to node
-            br = [b for b in branches if b[0] == True]
-        
-            for b in br:
-                comps.extend(b[-1])
-        
-        
-        if getNodes:
-            nodes = []
+        # most recently used paths are kept last
+        self.__paths[key] = cached
 
-            nc  = set([from_node])
-            end = to_node
+        while len(self.__paths) > self.max_cached_paths:
+            self.__paths.popitem(last=False)
 
-            for i in range(len(comps)):
-                n = set(comps[i].nodes)
-                
-                overlap = n & nc
-                others = n - nc
-    
-                if len(overlap) == 1:
-                    nodes.append(overlap.pop())
-        
-                    nc = others
-                else:
-                    raise pkex.BasePyKatException("No overlap in nodes between {} and {}".format(nc, n))
-    
-                if end in n:
-                    nodes.append(end)
-                    break
-            
-            _nodes = []
-            
-            for i in range(len(nodes)-1):
-                _nodes.append((nodes[i], nodes[i+1]))
-                
-            return tuple(comps), tuple(_nodes)
+        path = cached[0]
+        comps = tuple(comp for comp, _, _ in path)
+
+        if getNodes:
+            return comps, tuple((a, b) for _, a, b in path)
         else:
-            return tuple(comps)
+            return comps
     
 @canFreeze
 class Node(object):
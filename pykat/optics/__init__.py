@@ -1 +1,11 @@
-import pykat.optics.knm
\ No newline at end of file
+import sys
+
+def __getattr__(name):
+    if name == "knm":
+        import pykat.optics.knm
+        return pykat.optics.knm
+    
+    raise AttributeError("module 'pykat.optics' has no attribute '{0}'".format(name))
+
+if sys.version_info < (3, 7): # no lazy module attributes
+    import pykat.optics.knm
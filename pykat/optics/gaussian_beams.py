@@ -10,10 +10,18 @@ import copy
 import warnings
 import cmath
 from math import factorial
-from scipy.special import hermite
 from pykat.math.jacobi import jacobi
 from pykat.SIfloat import SIfloat
 
+def hermite(n):
+    """
+    Returns the Hermite polynomial of order n, see scipy.special.hermite.
+    scipy is only imported when this is first used.
+    """
+    from scipy.special import hermite
+    
+    return hermite(n)
+
 
 class BeamParam(object):
     """
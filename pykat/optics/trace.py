@@ -0,0 +1,395 @@
+"""
+Traces Gaussian beams along a path through a kat object for many beam
+parameters and parameter values at once, for example when trying many
+geometries in mode matching design.
+
+The path between the nodes is found once when making a BeamTracer, then
+each trace propagates arrays of q values through it using batched 2x2 ABCD
+matrices, with parameters of the components along the path swept over
+arrays of values:
+
+    tracer = kat.beamTracer("nLaser", "nOMC")
+    result = tracer.trace(q_in, {"s1.L": np.linspace(1, 2, 1000),
+                                 "lens1.f": 0.5})
+
+    result.w[-1]         # beam radius at nOMC for each length of s1
+    result["nOMC"]["q"]  # or the q values there
+
+The results follow kat.beamTrace, which traces a single beam and keeps a
+BeamParam for every node.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import math
+import numpy as np
+import pykat.external.six as six
+import pykat.exceptions as pkex
+
+from pykat.param import Param
+from pykat.optics.gaussian_beams import BeamParam
+
+def _n(node, value):
+    # refractive index at a node, from the space attached to it
+    n = node.n
+    return value(n) if isinstance(n, Param) else n
+
+def _Rc(comp, direction, value):
+    Rc = value(comp.Rcx if direction == "x" else comp.Rcy)
+    return np.inf if Rc is None else Rc
+
+def _matrix(A, B, C, D):
+    """
+    Returns an array of ABCD matrices, with the shape A, B, C and D
+    broadcast to followed by (2, 2).
+    """
+    A, B, C, D = np.broadcast_arrays(*(np.asarray(_, dtype=float) for _ in (A, B, C, D)))
+
+    M = np.empty(A.shape + (2, 2))
+    M[..., 0, 0] = A
+    M[..., 0, 1] = B
+    M[..., 1, 0] = C
+    M[..., 1, 1] = D
+
+    return M
+
+def _lensing(C):
+    return _matrix(1, 0, C, 1)
+
+def _space_abcd(comp, a, b, direction, value):
+    if a is b:
+        return None
+
+    return _matrix(1, value(comp.L) / value(comp.n), 0, 1)
+
+def _lens_abcd(comp, a, b, direction, value):
+    if a is b:
+        return None
+
+    f = value(comp.f)
+
+    if f is None:
+        p = np.asarray(value(comp.p), dtype=float)
+
+        with np.errstate(divide="ignore"):
+            f = np.where(p == 0, np.inf, 1 / p)
+
+    return _lensing(-1 / np.asarray(f, dtype=float))
+
+def _mirror_abcd(comp, a, b, direction, value):
+    n1, n2 = comp.nodes[0], comp.nodes[1]
+    Rc = _Rc(comp, direction, value)
+
+    if a is n1 and b is n1:
+        return _lensing(-2 * _n(n1, value) / Rc)
+    elif a is n1 and b is n2:
+        return _lensing((_n(n2, value) - _n(n1, value)) / Rc)
+    elif a is n2 and b is n1:
+        return _lensing((_n(n1, value) - _n(n2, value)) / -Rc)
+    elif a is n2 and b is n2:
+        return _lensing(-2 * _n(n2, value) / -Rc)
+    else:
+        return None
+
+def _bs_refl(n, Rc, alpha, direction):
+    c = np.cos(np.deg2rad(alpha))
+
+    if direction == "x":
+        return _lensing(-2 * n / (Rc * c))
+    else:
+        return _lensing(-2 * n * c / Rc)
+
+def _bs_trans(n1, n2, Rc, alpha, direction):
+    alpha = np.deg2rad(alpha)
+    c1 = np.cos(alpha)
+    c2 = np.cos(np.arcsin(n1 / n2 * np.sin(alpha)))
+
+    if direction == "x":
+        return _matrix(c2 / c1, 0, (n2 * c2 - n1 * c1) / (c1 * c2) / Rc, c1 / c2)
+    else:
+        return _lensing((n2 * c2 - n1 * c1) / Rc)
+
+def _bs_abcd(comp, a, b, direction, value):
+    nodes = comp.nodes
+    ends = (nodes.index(a) if a in nodes else None, nodes.index(b) if b in nodes else None)
+
+    Rc = _Rc(comp, direction, value)
+    n1 = _n(nodes[0], value)
+    n2 = _n(nodes[3], value)
+    alpha1 = value(comp.alpha)
+
+    if ends in ((0, 1), (1, 0)):
+        return _bs_refl(n1, Rc, alpha1, direction)
+    elif ends in ((2, 3), (3, 2)):
+        return _bs_refl(n2, -Rc, alpha1, direction)
+    elif ends in ((0, 2), (1, 3)):
+        return _bs_trans(n1, n2, Rc, alpha1, direction)
+    elif ends in ((2, 0), (3, 1)):
+        alpha2 = np.rad2deg(np.arcsin(np.sin(np.deg2rad(alpha1)) * n1 / n2))
+        return _bs_trans(n2, n1, -Rc, alpha2, direction)
+    else:
+        return None
+
+# Functions giving the batched ABCD matrices of each type of component,
+# made when first needed as pykat.components imports this package
+_abcd_functions = {}
+
+def _abcd_function(comp):
+    if len(_abcd_functions) == 0:
+        import pykat.components as c
+
+        _abcd_functions.update({
+            c.space: _space_abcd,
+            c.lens: _lens_abcd,
+            c.mirror: _mirror_abcd,
+            c.beamSplitter: _bs_abcd,
+        })
+
+    return _abcd_functions.get(type(comp))
+
+def trace_path(kat, nodes):
+    """
+    Returns the components a beam passes through going from the first node
+    to the last via any others, as a list of (component, from node, to node).
+    A node given twice in a row means the beam reflects off the component
+    there. This is the path kat.beamTrace takes.
+    """
+    import pykat.components
+
+    nodes = [kat.nodes[_] if isinstance(_, six.string_types) else _ for _ in nodes]
+    nodes = [getattr(_, "node", _) for _ in nodes] # NodeGaussSetter
+
+    steps = []
+
+    for i, (a, b) in enumerate(zip(nodes[:-1], nodes[1:])):
+        if a is b:
+            # find the reflection at this node from the component
+            path = [_ for _ in a.components if _ is not None and not isinstance(_, pykat.components.space)][:1]
+            pairs = ((a, b),)
+        else:
+            path, pairs = kat.nodes.getComponentsBetween(a, b, True)
+
+        if len(path) == 0 or len(pairs) == 0:
+            raise pkex.BasePyKatException("Could not find path between %s and %s" % (a.name, b.name))
+
+        if i > 0:
+            # join this part of the path to the last, for example by
+            # reflecting back off the component it ended at
+            start = pairs[0][0]
+            other = (set(start.components) - set([path[0]])).pop()
+
+            if str(other) != str(steps[-1][0]):
+                if other.ABCD(start, start) is None:
+                    raise pkex.BasePyKatException("Beam cannot be physically traced from %s and back to itself at %s to continue the trace." % (start.name, other.name))
+
+                steps.append((other, start, start))
+
+        steps.extend((comp, f, t) for comp, (f, t) in zip(path, pairs))
+
+    return steps
+
+class BeamTracer(object):
+    """
+    Traces beams along a fixed path through a kat object, see
+    kat.beamTracer. The path is found when this is made, so adding,
+    removing or reconnecting components on it afterwards needs a new one.
+    Parameter values are read from the kat object at each trace.
+
+    kat : kat object
+    from_node, to_node, *nodes : names of the nodes, or Node objects, to
+        trace through, as for kat.beamTrace
+    direction : 'x' or 'y' for horizontal or vertical beam propagation
+    back_propagating : If True the inverse of each ABCD matrix is used
+    """
+
+    def __init__(self, kat, from_node, to_node, *nodes, **kwargs):
+        self.kat = kat
+        self.direction = kwargs.pop("direction", "x").lower()
+        self.back_propagating = kwargs.pop("back_propagating", False)
+
+        if len(kwargs) > 0:
+            raise pkex.BasePyKatException("Unknown arguments: {0}".format(", ".join(kwargs)))
+
+        self.steps = tuple(trace_path(kat, (from_node, to_node) + nodes))
+
+        self.__params = {}
+
+        for comp, _, _ in self.steps:
+            for p in comp._params:
+                self.__params[id(p)] = p
+
+            # refractive indices of the spaces either side of an optic
+            for node in comp.nodes:
+                if isinstance(node.n, Param):
+                    self.__params[id(node.n)] = node.n
+
+    @property
+    def components(self):
+        """Names of the components on the path, in the order traced."""
+        return tuple(comp.name for comp, _, _ in self.steps)
+
+    @property
+    def nodes(self):
+        """Names of the nodes the trace passes, one before and after each component."""
+        return (self.steps[0][1].name,) + tuple(t.name for _, _, t in self.steps)
+
+    def _param(self, key):
+        if isinstance(key, six.string_types):
+            if key.count(".") != 1:
+                raise pkex.BasePyKatException("'{0}' should name a parameter like 'component.parameter'".format(key))
+
+            comp, name = key.split(".")
+            key = getattr(self.kat.components[comp], name)
+
+        if id(key) not in self.__params:
+            raise pkex.BasePyKatException("{0} is not a parameter of a component on the traced path".format(key))
+
+        return key
+
+    def trace(self, q_in, variations=None, wavelength=None):
+        """
+        Traces the beam parameters q_in, a complex value, BeamParam or
+        array of complex values, along the path and returns a TraceResult.
+
+        variations gives the parameters to change from their values in the
+        kat object, as for kat.sweep: a dictionary of "component.parameter"
+        strings, or list of pairs of these or Param objects, and the values
+        or arrays of values to use. q_in and all the values are broadcast
+        together, so
+
+            tracer.trace(q, {"s1.L": L[:, None], "m1.Rcx": Rc[None, :]})
+
+        traces a grid of lengths and curvatures. The wavelength is that of
+        q_in if it is a BeamParam, otherwise kat.lambda0.
+        """
+        if wavelength is None:
+            wavelength = q_in.wavelength if isinstance(q_in, BeamParam) else self.kat.lambda0
+
+        if isinstance(q_in, BeamParam):
+            q_in = q_in.q
+
+        if isinstance(variations, dict):
+            variations = list(variations.items())
+
+        values = {}
+
+        for key, v in variations or ():
+            values[id(self._param(key))] = np.asarray(v, dtype=float)
+
+        def value(param):
+            v = values.get(id(param))
+            return param.value if v is None else v
+
+        shape = np.broadcast(np.asarray(q_in), *values.values()).shape if len(values) > 0 else np.shape(q_in)
+
+        q = np.broadcast_to(np.asarray(q_in, dtype=complex), shape)
+        total = np.broadcast_to(np.eye(2), shape + (2, 2))
+        gouy = np.zeros(shape)
+        z = np.zeros(shape)
+
+        qs = [q]
+        abcds = [total]
+        gouys = [gouy]
+        zs = [z]
+        ns = [_n(self.steps[0][1], value)]
+
+        for comp, a, b in self.steps:
+            func = _abcd_function(comp)
+
+            if func is None:
+                M = comp.ABCD(a, b, direction=self.direction)
+
+                if any(id(p) in values for p in comp._params):
+                    raise pkex.BasePyKatException("Parameters of {0} can't be varied as its ABCD matrix can't be made for arrays of values".format(comp.name))
+
+                M = None if M is None else np.asarray(M, dtype=float)
+            else:
+                M = func(comp, a, b, self.direction, value)
+
+            if M is None:
+                raise pkex.BasePyKatException("{0} has no ABCD matrix from {1} to {2}".format(comp.name, a.name, b.name))
+
+            if self.back_propagating:
+                M = np.linalg.inv(M)
+
+            n1 = _n(a, value)
+            n2 = _n(b, value)
+
+            A, B, C, D = M[..., 0, 0], M[..., 0, 1], M[..., 1, 0], M[..., 1, 1]
+            q_out = n2 * (A * q / n1 + B) / (C * q / n1 + D)
+
+            if func is _space_abcd:
+                L = value(comp.L)
+                gouy = gouy + np.rad2deg(np.arctan2(q.real + L, q.imag) - np.arctan2(q.real, q.imag))
+                z = z + L
+
+            total = np.matmul(M, total)
+            q = q_out
+
+            qs.append(q)
+            abcds.append(total)
+            gouys.append(gouy)
+            zs.append(z)
+            ns.append(n2)
+
+        return TraceResult(self.nodes, self.components, qs, abcds, gouys, zs, ns, wavelength)
+
+class TraceResult(object):
+    """
+    Results of BeamTracer.trace. The values are arrays with one entry for
+    the start of the trace and one after each component, so the first axis
+    matches `nodes`, followed by the shape of the traced beams:
+
+        q     : complex beam parameters
+        w     : beam radii
+        gouy  : Gouy phase accumulated along the path in degrees
+        z     : distance along the path
+        abcd  : accumulated ABCD matrix, with two extra axes for the matrix
+
+    `components` names the component passed between each node and the
+    next. Indexing with a node name gives a dictionary of these values at
+    the last time the trace passed that node.
+    """
+
+    def __init__(self, nodes, components, q, abcd, gouy, z, n, wavelength):
+        self.nodes = nodes
+        self.components = components
+        self.wavelength = wavelength
+        self.q = np.array(q)
+        self.abcd = np.array(abcd)
+        self.gouy = np.array(gouy)
+        self.z = np.array(z)
+        self.n = np.array([np.broadcast_to(_, self.q.shape[1:]) for _ in n], dtype=float)
+
+    @property
+    def shape(self):
+        """Shape of the traced beams."""
+        return self.q.shape[1:]
+
+    @property
+    def w(self):
+        return np.abs(self.q) * np.sqrt(self.wavelength / (self.n * math.pi * self.q.imag))
+
+    @property
+    def w0(self):
+        return np.sqrt(self.q.imag * self.wavelength / (self.n * math.pi))
+
+    @property
+    def q_out(self): return self.q[-1]
+
+    def index(self, node):
+        """Index along the first axis of the last time the trace passed node."""
+        node = getattr(node, "name", node)
+
+        if node not in self.nodes:
+            raise pkex.BasePyKatException("Node {0} is not on the traced path".format(node))
+
+        return len(self.nodes) - 1 - self.nodes[::-1].index(node)
+
+    def __getitem__(self, node):
+        i = self.index(node)
+
+        return {"q": self.q[i], "w": self.w[i], "gouy": self.gouy[i], "z": self.z[i], "abcd": self.abcd[i]}
@@ -24,29 +24,38 @@ Contact at ddb@star.sr.bham.ac.uk
 @author: Daniel Brown
 """
 
-import IPython
-
-# former syntax depreciated since ipython 4:
-if IPython.version_info[0] <= 3:
-    from IPython.parallel import Client
-else:
-    from ipyparallel import Client
-    
 import sys
 import os
+import pickle
+import threading
 
 from pykat.external.progressbar import ProgressBar, ETA, Percentage, Bar
 
-def _run(commands, pwd, IFO, **kwargs):
+def _Client(**kwargs):
+    import IPython
+
+    # former syntax depreciated since ipython 4:
+    if IPython.version_info[0] <= 3:
+        from IPython.parallel import Client
+    else:
+        from ipyparallel import Client
+
+    return Client(**kwargs)
+
+def _run(commands, pwd, IFO, verbose=True, **kwargs):
     import os
     os.chdir(pwd)
     
     import pykat
 
     kat = pykat.finesse.kat()
+    kat.verbose = verbose
     kat.parse(commands)
     
     if IFO is not None: # update kat object for IFO to use
+        if isinstance(IFO, bytes):
+            IFO = pickle.loads(IFO)
+
         kat.IFO = IFO
         kat.IFO._IFO__kat = kat
     
@@ -91,7 +100,7 @@ class parakat(object):
     """
     
     def __init__(self, **kwargs):
-        self._rc = Client(**kwargs)
+        self._rc = _Client(**kwargs)
         self._lview = self._rc.load_balanced_view()
         self._lview.block = False
         self._results = []
@@ -137,4 +146,208 @@ class parakat(object):
     
     def close(self):
         self._rc.close()
+
+
+_worker_tempdir = None
+
+def _pool_job(root, func, *args, **kwargs):
+    """
+    Runs func in a KatPool worker. On its first job the worker makes a working
+    directory inside root, used for the temporary files of every kat run in
+    it and removed when the worker exits.
+    """
+    global _worker_tempdir
+    
+    if _worker_tempdir is None:
+        import shutil
+        import tempfile
+        from multiprocessing.util import Finalize
+        
+        _worker_tempdir = tempfile.mkdtemp(prefix="pykat-", dir=root)
+        tempfile.tempdir = _worker_tempdir
+        
+        # workers exit without running atexit functions but do run these
+        Finalize(None, shutil.rmtree, args=(_worker_tempdir, True), exitpriority=10)
+    
+    return func(*args, **kwargs)
+
+def _detach_IFO(kat):
+    """
+    Returns the kat script and a pickled copy of the IFO object, if any,
+    for sending to another process.
+    """
+    if not hasattr(kat, "generateKatScript"):
+        return str(kat), None
+
+    kat_IFO = None
+
+    if hasattr(kat, 'IFO') and hasattr(kat.IFO, "_IFO__kat"):
+        kat.IFO._IFO__kat = None # can't pickle stored kat
+
+        try:
+            kat_IFO = pickle.dumps(kat.IFO)
+        finally:
+            kat.IFO._IFO__kat = kat
+
+    return "".join(kat.generateKatScript()), kat_IFO
+
+
+class KatPool(object):
+    """
+    Runs kat objects in parallel on the local machine using a pool of worker
+    processes, without needing an ipython cluster.
+    
+    Either kat objects or strings of kat script can be submitted:
+    
+        with KatPool(max_workers=8) as pool:
+            for kat in kats:
+                pool.run(kat)
+            
+            outs = pool.getResults()
+    
+    The list 'outs' contains the KatRun or KatRun2D objects in the order the
+    kats were submitted. Use `as_completed()` instead to process each result
+    as soon as it is ready. As with parakat, if a job fails its exception is
+    returned in place of its output rather than being raised.
+    
+    max_workers - Number of worker processes, defaults to the number of CPUs
+    max_pending - Maximum number of jobs queued or running at once. When this
+                  many are outstanding `run` blocks until one finishes, so very
+                  large batches do not hold every script in memory at once.
+                  Defaults to four times the number of workers.
+    timeout     - Default per-job timeout in seconds. A Finesse process still
+                  running after this long is killed and a FinesseTimeout is
+                  returned for that job.
+    verbose     - Whether workers print their usual Finesse progress output
+    tempdir     - Directory in which each worker makes the working directory
+                  it keeps for its Finesse input, output and pipe files.
+                  Defaults to /dev/shm where available, so these stay in
+                  memory, otherwise the system temporary directory.
+    
+    Workers are started once and kept for the life of the pool, so pykat is
+    only imported once per worker rather than for each job. The `timings`
+    of each output show how long each run spent preparing, spawning
+    Finesse, connecting to its pipe, computing and reading outputs.
+    
+    Jobs that have not started yet can be stopped with `cancel()`. Running
+    jobs always complete or are stopped by their timeout.
+    """
+    
+    def __init__(self, max_workers=None, max_pending=None, timeout=None, verbose=False, tempdir=None, mp_context=None):
+        from concurrent.futures import ProcessPoolExecutor
+        
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        
+        if max_pending is None:
+            max_pending = 4 * max_workers
         
+        if tempdir is None and os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+            tempdir = "/dev/shm"
+            
+        if mp_context is None:
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+        
+        self._tempdir = tempdir
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._timeout = timeout
+        self._verbose = verbose
+        self._results = []
+        self._run_count = 0
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+        
+    def run(self, kat, func=None, *args, **kwargs):
+        """
+        Submits a kat object, or string of kat script, to be run. Extra
+        keyword arguments are passed to `kat.run`. Returns a
+        concurrent.futures.Future for this job.
+        """
+        if func is None:
+            func = _run
+            kwargs.setdefault("verbose", self._verbose)
+            
+            if self._timeout is not None:
+                kwargs.setdefault("timeout", self._timeout)
+                
+        commands, kat_IFO = _detach_IFO(kat)
+        
+        self._slots.acquire()
+        
+        try:
+            future = self._pool.submit(_pool_job, self._tempdir, func, commands, os.getcwd(), kat_IFO, *args, **kwargs)
+        except:
+            self._slots.release()
+            raise
+            
+        future.add_done_callback(lambda f: self._slots.release())
+        
+        self._results.append(future)
+        self._run_count += 1
+        
+        return future
+    
+    def _get(self, future, timeout):
+        from concurrent.futures import CancelledError
+        
+        try:
+            return future.result(timeout=timeout)
+        except CancelledError as ex:
+            return ex
+        
+    def getResults(self, timeout=None):
+        """
+        Waits for and returns the outputs of all submitted jobs in the order
+        they were submitted. Cancelled jobs return a CancelledError.
+        
+        timeout - Total time in seconds to wait for before a
+                  concurrent.futures.TimeoutError is raised
+        """
+        from concurrent.futures import wait
+        
+        done, not_done = wait(self._results, timeout=timeout)
+        
+        if len(not_done) > 0:
+            from concurrent.futures import TimeoutError
+            raise TimeoutError("{0} of {1} jobs did not finish in time".format(len(not_done), len(self._results)))
+        
+        return [self._get(_, None) for _ in self._results]
+    
+    def as_completed(self, timeout=None):
+        """
+        Yields (index, output) for each submitted job as they finish, where
+        index is the position of the job in the submission order.
+        
+        timeout - Total time in seconds to wait for before a
+                  concurrent.futures.TimeoutError is raised
+        """
+        from concurrent.futures import as_completed
+        
+        index = {f: i for i, f in enumerate(self._results)}
+        
+        for f in as_completed(index, timeout=timeout):
+            yield index[f], self._get(f, None)
+            
+    def cancel(self):
+        """
+        Cancels all submitted jobs that have not yet started running. Returns
+        the number of jobs cancelled.
+        """
+        return sum(f.cancel() for f in self._results)
+    
+    def clear(self):
+        del(self._results)
+        self._results = []
+        self._run_count = 0
+        
+    def close(self, wait=True):
+        if not wait:
+            self.cancel()
+            
+        self._pool.shutdown(wait=wait)
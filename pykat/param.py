@@ -7,7 +7,13 @@ import abc
 import pykat.exceptions as pkex
 import weakref
 
-from pykat.freeze import canFreeze
+import pykat.external.six as six
+
+from pykat.freeze import deepcopy_slots, getstate_slots, setstate_slots
+
+# Types of values that can never name a constant, so setting a parameter
+# to one doesn't need it converting to a string to check
+_plain_types = frozenset((float, int, bool, complex) + tuple(six.integer_types))
 
 class putable(object):
     """
@@ -19,6 +25,10 @@ class putable(object):
     """
     __metaclass__ = abc.ABCMeta
     
+    # The slots for the attributes set below are made by the classes that use
+    # this, see Param, as only one base class can have non-empty __slots__
+    __slots__ = ()
+    
     def __init__(self, component_name, parameter_name, isPutable=True):
         self._parameter_name = parameter_name
         self._component_name = component_name
@@ -46,6 +56,11 @@ class putable(object):
         
         if var is not None:
             self._putter.register(self)
+            
+        self._changed()
+    
+    def _changed(self):
+        pass
         
     # def _getPutFinesseText(self):
     #     rtn = []
@@ -74,6 +89,8 @@ class putter(object):
     object.
     """
     
+    __slots__ = ("_put_name", "put_count", "_isPutter", "putees", "__owner", "__weakref__")
+    
     def __init__(self, put_name, owner, isPutter=True):
         self._put_name = put_name
         self.put_count = 0
@@ -86,6 +103,15 @@ class putter(object):
     def _updateOwner(self, newOwner):
         del self.__owner
         self.__owner = weakref.ref(newOwner)
+    
+    def __deepcopy__(self, memo):
+        return deepcopy_slots(self, memo)
+    
+    def __getstate__(self):
+        return getstate_slots(self)
+    
+    def __setstate__(self, state):
+        setstate_slots(self, state)
         
     def clearPuts(self):
         import copy
@@ -98,6 +124,7 @@ class putter(object):
             
         self.put_count += 1
         self.putees.append(toput)
+        self._changed()
     
     def unregister(self, item):
         if not self._isPutter:
@@ -105,6 +132,10 @@ class putter(object):
             
         self.put_count -= 1
         self.putees.remove(item)
+        self._changed()
+    
+    def _changed(self):
+        pass
         
     @property
     def owner(self): return self.__owner()
@@ -142,11 +173,23 @@ class putter(object):
         
         return rtn
         
-@canFreeze
 class Param(putable, putter):
+    """
+    A parameter of a component, detector or command. There are many of
+    these in a model so they use __slots__ rather than an instance __dict__,
+    which also means attributes a parameter doesn't have can't be set.
+    """
+
+    __slots__ = ("_name", "_registered", "_owner", "_isTunable", "_canFsig", "_isConst",
+                 "_constName", "_value", "__fsig_name", "__fsig_name_options",
+                 # for putable
+                 "_parameter_name", "_component_name", "_putter", "_alt", "_isPutable")
+
+    # Incremented whenever the value of a constant changes, so that Finesse
+    # text made using parameters set by constants knows to be remade
+    constant_changes = 0
 
     def __init__(self, name, owner, value, canFsig=False, fsig_name=None, fsig_name_options=[], isPutable=True, isPutter=True, isTunable=True, var_name=None, register=True):
-        self._unfreeze()
         self._name = name
         self._registered = register
         self._owner = weakref.ref(owner)
@@ -155,6 +198,8 @@ class Param(putable, putter):
         self._canFsig = False
         self._isConst = False
         self._constName = None
+        self.__fsig_name = None
+        self.__fsig_name_options = None
         
         if self._registered:
             self._owner()._register_param(self)
@@ -185,9 +230,17 @@ class Param(putable, putter):
         putable.__init__(self, owner.name, name, isPutable)
 
         self.value = value
-        
-        self._freeze()
     
+    def _changed(self):
+        """
+        Called when anything the Finesse text of this parameter or its owner
+        depends on changes, so that the text the owner has cached is remade
+        """
+        owner = self._owner()
+
+        if owner is not None:
+            owner.__dict__.pop("_finesse_text", None)
+
     def __repr__(self):
         return "<%s (%s.%s=%s) at %s>" % (self.__class__.__name__, self.owner.name, self._name, self.value, hex(id(self)))
            
@@ -228,32 +281,41 @@ class Param(putable, putter):
         
     @property
     def value(self):
-        if self._owner().removed:
-            raise pkex.BasePyKatException("{0} has been removed from the simulation".format(self._owner().name))
+        owner = self._owner()
+        
+        if owner.removed:
+            raise pkex.BasePyKatException("{0} has been removed from the simulation".format(owner.name))
+        elif self._isConst:
+            if self._constName[1:] not in owner._kat.constants:
+                raise pkex.BasePyKatException("Parameter {}.{} could not find a Finesse constant called `{}`".format(owner.name, self.name, self._constName))
+            return owner._kat.constants[self._constName[1:]].value
         else:
-            if self._isConst:
-                if self._constName[1:] not in self.owner._kat.constants:
-                    raise pkex.BasePyKatException("Parameter {}.{} could not find a Finesse constant called `{}`".format(self.owner.name, self.name, self._constName))
-                return self.owner._kat.constants[self._constName[1:]].value
-            else:
-                return self._value
+            return self._value
     
     @value.setter
     def value(self, value):
-        if self._owner().removed:
-            raise pkex.BasePyKatException("{0} has been removed from the simulation".format(self._owner().name))
+        owner = self._owner()
+        
+        if owner.removed:
+            raise pkex.BasePyKatException("{0} has been removed from the simulation".format(owner.name))
+        
+        if type(value) in _plain_types:
+            isConst = False
         else:
             v = str(value)
-            
             # signal frequency constant is internal to finesse so handled like a usual value
-            if v.startswith('$') and v not in ("$fs", "$mfs"):
-                self._isConst = True
-                self._constName = value
-                self._value = None
-            else:
-                self._isConst = False
-                self._constName = None
-                self._value = value
+            isConst = v.startswith('$') and v not in ("$fs", "$mfs")
+            
+        if isConst:
+            self._isConst = True
+            self._constName = value
+            self._value = None
+        else:
+            self._isConst = False
+            self._constName = None
+            self._value = value
+            
+        owner.__dict__.pop("_finesse_text", None)
     
     def __str__(self):
         if self._owner().removed:
@@ -295,10 +357,7 @@ class Param(putable, putter):
         Should only be called by the __deepcopy__ component method to ensure things
         are kept up to date.
         """
-        self._unfreeze()
-        del self._owner
         self._owner = weakref.ref(newOwner)
-        self._freeze()
         
     def _onOwnerRemoved(self):
         #if this param can be put somewhere we need to check if it is
@@ -317,6 +376,7 @@ class Param(putable, putter):
                 print ("Removing put from {0} {1} to {2} {3}".format(self._putter.owner.name, self._putter.name, self.owner.name, self.name))
                 self._putter.put_count -= 1
                 self._putter.putees.remove(self)
+                self._putter._changed()
                 self._putter = None
        
        
@@ -381,6 +441,9 @@ class AttrParam(Param):
     
     If the value pf the parameter is not 0 the attr command will be printed.
     """
+    
+    __slots__ = ()
+    
     def getFinesseText(self):
         if self._owner().removed:
             raise pkex.BasePyKatException("{0} has been removed from the simulation".format(self._owner().name))
@@ -0,0 +1,65 @@
+"""
+Compares tracing a beam for many lengths of a space with kat.beamTrace,
+setting the length and tracing once for each, against a single
+kat.beamTracer trace over all of them. Making the kat object needs Finesse
+to be installed.
+
+    python bench_beam_trace.py [number of lengths]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+import numpy as np
+import pykat
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+try:
+    kat = pykat.finesse.kat()
+except pykat.exceptions.BasePyKatException as ex:
+    raise SystemExit("Could not make a kat object: {0}".format(ex))
+
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n0
+s s1 1 n0 n1
+lens f1 0.5 n1 n2
+s s2 1 n2 n3
+m m1 0.5 0.5 0 n3 n4
+attr m1 Rc -2
+s s3 1 1.44 n4 n5
+bs bs1 0.5 0.5 0 30 n5 n6 n7 n8
+s s4 1 n7 n9
+lens f2 0.3 n9 n10
+s s5 1 n10 n11
+""")
+
+q_in = pykat.BeamParam(w0=1e-3, z=0)
+L = np.linspace(0.5, 1.5, N)
+
+t0 = time.time()
+w_loop = []
+
+for _ in L:
+    kat.s2.L = _
+    w_loop.append(kat.beamTrace(q_in, "n0", "n11").data["n11"]["q"].w)
+
+t_loop = time.time() - t0
+
+t0 = time.time()
+tracer = kat.beamTracer("n0", "n11")
+t_path = time.time() - t0
+
+t0 = time.time()
+out = tracer.trace(q_in, {"s2.L": L})
+t_trace = time.time() - t0
+
+assert(np.allclose(w_loop, out["n11"]["w"]))
+
+print("{0} lengths, {1} components".format(N, len(tracer.steps)))
+print("beamTrace loop  {0:10.2f} ms".format(t_loop * 1e3))
+print("beamTracer path {0:10.2f} ms".format(t_path * 1e3))
+print("beamTracer      {0:10.2f} ms".format(t_trace * 1e3))
+print("speed up        {0:10.1f}x".format(t_loop / t_trace))
@@ -0,0 +1,53 @@
+"""
+Measures how long kat.generateKatScript and kat.scriptHash take on the
+aLIGO design model when one parameter changes between calls, as in an
+optimisation loop, against making the whole script from scratch. Making
+the model needs Finesse to be installed.
+
+    python bench_generate_script.py [repeats]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+import pykat
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+try:
+    from pykat.ifo import aligo
+
+    kat = aligo.make_kat("design")
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+def change():
+    kat.ETMX.phi += 1e-3
+
+def from_scratch():
+    change()
+
+    for c in kat.components.values():
+        c.__dict__.pop("_finesse_text", None)
+
+    kat.generateKatScript()
+
+def incremental():
+    change()
+    kat.generateKatScript()
+
+def script_hash():
+    change()
+    kat.scriptHash()
+
+print("{0} components, {1} lines".format(len(kat.components), len(kat.generateKatScript())))
+
+t_scratch = min(timeit.repeat(from_scratch, number=repeats, repeat=5)) / repeats
+t_incr = min(timeit.repeat(incremental, number=repeats, repeat=5)) / repeats
+t_hash = min(timeit.repeat(script_hash, number=repeats, repeat=5)) / repeats
+
+print("from scratch    {0:8.3f} ms".format(t_scratch * 1e3))
+print("incremental     {0:8.3f} ms".format(t_incr * 1e3))
+print("scriptHash      {0:8.3f} ms".format(t_hash * 1e3))
+print("speed up        {0:8.1f}x".format(t_scratch / t_incr))
@@ -0,0 +1,58 @@
+"""
+Compares the ways of getting a changed model back to how it was: copying
+the kat object with kat.deepcopy, and taking and restoring a kat.snapshot.
+
+The aLIGO design model is used, which needs Finesse to be installed.
+
+    python bench_kat_copy.py [repeats]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+import pykat
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+def best_of(func, n=5):
+    times = []
+
+    for _ in range(n):
+        t0 = time.time()
+
+        for _ in range(repeats):
+            func()
+
+        times.append((time.time() - t0) / repeats)
+
+    return min(times)
+
+try:
+    from pykat.ifo import aligo
+
+    kat = aligo.make_kat("design")
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+print("{0} components, {1} detectors, {2} commands".format(len(kat.components), len(kat.detectors), len(kat.commands)))
+
+def change(kat):
+    kat.ETMX.phi += 1
+    kat.ITMX.Rcx = 1900
+    kat.maxtem = 2
+
+def with_copy():
+    _kat = kat.deepcopy()
+    change(_kat)
+
+def with_snapshot():
+    with kat.snapshot():
+        change(kat)
+
+t_copy = best_of(with_copy)
+t_snap = best_of(with_snapshot)
+
+print("kat.deepcopy    {0:8.2f} ms".format(t_copy * 1e3))
+print("kat.snapshot    {0:8.2f} ms".format(t_snap * 1e3))
+print("speed up        {0:8.1f}x".format(t_copy / t_snap))
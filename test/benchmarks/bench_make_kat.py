@@ -0,0 +1,53 @@
+"""
+Compares making the pykat.ifo models with their make_kat functions to
+loading them from a pykat.cache.ModelCache, which is kept in a temporary
+directory. Making kat objects needs Finesse to be installed.
+
+    python bench_make_kat.py [repeats]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+import shutil
+import tempfile
+import pykat
+import pykat.cache
+
+from pykat.ifo import aligo, adv, voyager, aplus
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+def best_of(func, n=repeats):
+    times = []
+
+    for _ in range(n):
+        t0 = time.time()
+        func()
+        times.append(time.time() - t0)
+
+    return min(times)
+
+try:
+    pykat.finesse.kat()
+except pykat.exceptions.BasePyKatException as ex:
+    raise SystemExit("Could not make a kat object: {0}".format(ex))
+
+tmp = tempfile.mkdtemp()
+
+try:
+    cache = pykat.cache.ModelCache(tmp)
+
+    print("{0:10} {1:>10} {2:>10} {3:>10}".format("", "make (ms)", "load (ms)", "speed up"))
+
+    for ifo in (aligo, adv, voyager, aplus):
+        t_make = best_of(lambda: ifo.make_kat(cache=False))
+
+        ifo.make_kat(cache=cache)
+        t_load = best_of(lambda: ifo.make_kat(cache=cache))
+
+        name = ifo.__name__.split(".")[-1]
+        print("{0:10} {1:10.1f} {2:10.1f} {3:9.1f}x".format(name, t_make * 1e3, t_load * 1e3, t_make / t_load))
+finally:
+    shutil.rmtree(tmp)
@@ -0,0 +1,125 @@
+"""
+Compares ways of making the objects in a container attributes named after
+them, like kat.ETMX or kat.nodes.nX:
+
+    class   - pykat's old approach, every container gets its own class made
+              with type() that a property per object is added to
+    lookup  - a __getattr__ that looks the name up in a dictionary of the
+              objects, only called once normal attribute lookup has failed
+    dict    - pykat's current approach, the objects are stored in the
+              instance __dict__ under their names, which normal attribute
+              lookup finds first
+
+For each the time and memory to make containers holding objects, and the
+time to get an attribute, are measured. Then the same is done for kat
+objects made from a chain of mirrors, which needs Finesse to be installed.
+Running this on a version of pykat using the old approach gives the
+numbers to compare with for kat objects.
+
+    python bench_named_attributes.py [containers] [objects]
+"""
+
+from __future__ import print_function
+
+import sys
+import copy
+import time
+import timeit
+import tracemalloc
+import pykat
+
+containers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+objects = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+class ClassContainer(object):
+    def __new__(cls):
+        return object.__new__(type(cls.__name__ + "_", (cls,), {}))
+
+    def add(self, name, obj):
+        setattr(self.__class__, name, property(lambda self: self.__dict__["__obj_" + name]))
+        self.__dict__["__obj_" + name] = obj
+
+class LookupContainer(object):
+    def __init__(self):
+        self._objects = {}
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["_objects"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def add(self, name, obj):
+        self._objects[name] = obj
+
+class DictContainer(object):
+    def __init__(self):
+        self._objects = {}
+
+    def add(self, name, obj):
+        self._objects[name] = obj
+        self.__dict__[name] = obj
+
+def measure(make):
+    # timed without tracing memory as that slows it down
+    t0 = time.time()
+    made = [make() for _ in range(containers)]
+    t = time.time() - t0
+
+    del made
+
+    tracemalloc.start()
+    made = [make() for _ in range(containers)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return made, t, size
+
+def fill(cls):
+    c = cls()
+
+    for i in range(objects):
+        c.add("m%i" % i, i)
+
+    return c
+
+print("{0} containers of {1} objects".format(containers, objects))
+print("{0:8} {1:>10} {2:>10} {3:>12}".format("", "make (ms)", "MB", "getattr (ns)"))
+
+for name, cls in (("class", ClassContainer), ("lookup", LookupContainer), ("dict", DictContainer)):
+    made, t, size = measure(lambda: fill(cls))
+    c = made[-1]
+    t_get = min(timeit.repeat(lambda: c.m50, number=10000, repeat=5)) / 10000
+
+    print("{0:8} {1:10.1f} {2:10.2f} {3:12.0f}".format(name, t*1e3, size/1e6, t_get*1e9))
+
+    del made
+
+script = "l l1 1 0 n0\n" + "".join("s s{0} 1 n{1} n{2}\nm m{0} 0.5 0.5 0 n{2} n{3}\n".format(i, 2*i, 2*i+1, 2*i+2) for i in range(objects))
+
+try:
+    base = pykat.finesse.kat()
+except pykat.exceptions.BasePyKatException as ex:
+    raise SystemExit("Could not make a kat object: {0}".format(ex))
+
+base.verbose = False
+base.parse(script)
+
+n = max(1, containers // 20)
+
+made, t, size = measure(lambda: copy.deepcopy(base))
+t_get = min(timeit.repeat(lambda: base.m50.n101, number=10000, repeat=5)) / 10000
+
+print()
+print("{0} copies of a kat object with {1} components".format(containers, len(base.components)))
+print("{0:8} {1:>10} {2:>10} {3:>12}".format("", "copy (ms)", "MB", "getattr (ns)"))
+print("{0:8} {1:10.1f} {2:10.2f} {3:12.0f}".format("kat", t*1e3/containers, size/1e6, t_get*1e9))
+
+t0 = time.time()
+
+for _ in range(n):
+    k = pykat.finesse.kat()
+    k.verbose = False
+    k.parse(script)
+
+print("parse {0:.1f} ms".format((time.time() - t0) * 1e3 / n))
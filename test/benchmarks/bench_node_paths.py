@@ -0,0 +1,45 @@
+"""
+Times NodeNetwork.getComponentsBetween on the aLIGO design model for
+random pairs of nodes, the first time each path is searched for and when
+it is looked up again, as kat.beamTrace and plot_beam_trace do. Making the
+model needs Finesse to be installed.
+
+    python bench_node_paths.py [number of pairs]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+import random
+import pykat
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+try:
+    from pykat.ifo import aligo
+
+    kat = aligo.make_kat("design")
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+names = sorted(kat.nodes.getNodes())
+rnd = random.Random(0)
+pairs = [tuple(rnd.sample(names, 2)) for _ in range(N)]
+
+kat.nodes.max_cached_paths = 2 * N
+
+def search():
+    t0 = time.time()
+
+    for a, b in pairs:
+        kat.nodes.getComponentsBetween(a, b, getNodes=True)
+
+    return (time.time() - t0) / N
+
+t_first = search()
+t_cached = search()
+
+print("{0} nodes, {1} pairs".format(len(names), N))
+print("first search    {0:8.1f} us".format(t_first * 1e6))
+print("cached          {0:8.1f} us".format(t_cached * 1e6))
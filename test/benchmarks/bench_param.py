@@ -0,0 +1,59 @@
+"""
+Measures getting and setting parameter values, SIfloat on plain values,
+deep copying the aLIGO design model and the memory its parameters use.
+Making the model needs Finesse to be installed.
+
+    python bench_param.py [repeats]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+import tracemalloc
+import pykat
+
+from pykat.SIfloat import SIfloat
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+try:
+    from pykat.ifo import aligo
+
+    kat = aligo.make_kat("design", cache=False)
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+param = kat.ETMX.phi
+
+def get():
+    param.value
+
+def set():
+    param.value = 1.0
+
+def si_float():
+    SIfloat(1.0)
+
+def si_string():
+    SIfloat("10k")
+
+def best(func, number=repeats):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+params = [p for c in kat.components.values() for p in c._params]
+
+print("{0} parameters".format(len(params)))
+print("get value       {0:8.3f} us".format(best(get) * 1e6))
+print("set value       {0:8.3f} us".format(best(set) * 1e6))
+print("SIfloat(1.0)    {0:8.3f} us".format(best(si_float) * 1e6))
+print("SIfloat('10k')  {0:8.3f} us".format(best(si_string) * 1e6))
+print("deepcopy        {0:8.3f} ms".format(best(kat.deepcopy, 10) * 1e3))
+
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+copies = [kat.deepcopy() for _ in range(5)]
+used = (tracemalloc.get_traced_memory()[0] - before) / len(copies)
+tracemalloc.stop()
+
+print("model copy      {0:8.1f} kB".format(used / 1024))
@@ -0,0 +1,66 @@
+"""
+Measures how fast kat.parse reads the kat files shipped with pykat.ifo, in
+lines per second, with constants replaced and with them preserved. Making
+kat objects needs Finesse to be installed.
+
+    python bench_parse.py [repeats]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import glob
+import time
+import pykat
+import pykat.ifo
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+files = sorted(glob.glob(os.path.join(os.path.dirname(pykat.ifo.__file__), "*", "files", "*.kat")))
+
+def parse(script, **kwargs):
+    kat = pykat.finesse.kat()
+    kat.verbose = False
+    kat.parse(script, **kwargs)
+
+def best_of(func, n=repeats):
+    times = []
+
+    for _ in range(n):
+        t0 = time.time()
+        func()
+        times.append(time.time() - t0)
+
+    return min(times)
+
+try:
+    pykat.finesse.kat()
+except pykat.exceptions.BasePyKatException as ex:
+    raise SystemExit("Could not make a kat object: {0}".format(ex))
+
+print("{0:48} {1:>6} {2:>12} {3:>12}".format("file", "lines", "lines/s", "preserved"))
+
+total_lines = 0
+total_time = {False: 0, True: 0}
+
+for filename in files:
+    with open(filename) as f:
+        script = f.read()
+
+    lines = len(script.splitlines())
+    total_lines += lines
+
+    t = {}
+
+    for preserve in (False, True):
+        t[preserve] = best_of(lambda: parse(script, preserveConstants=preserve))
+        total_time[preserve] += t[preserve]
+
+    name = os.path.relpath(filename, os.path.dirname(pykat.ifo.__file__))
+    print("{0:48} {1:6} {2:12.0f} {3:12.0f}".format(name, lines, lines / t[False], lines / t[True]))
+
+print()
+
+for preserve in (False, True):
+    print("all files, preserveConstants={0!s:5}: {1:8.0f} lines/s".format(preserve, total_lines / total_time[preserve]))
@@ -0,0 +1,38 @@
+"""
+Measures how long aligo.pretune takes on the aLIGO design model with the
+steps done one after another, with batched golden section scans, and
+with independent steps such as the arms done at the same time. Prints
+the Finesse runs and the time each step took. Needs Finesse to be
+installed.
+
+    python bench_pretune.py [max_workers]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+import pykat
+
+max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+try:
+    from pykat.ifo import aligo
+
+    base = aligo.make_kat("design")
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+base.verbose = False
+
+for name, kwargs in (("serial", dict(max_workers=1)),
+                     ("serial, golden", dict(max_workers=1, method="golden")),
+                     ("parallel", dict(max_workers=max_workers))):
+    kat = base.deepcopy()
+
+    start = time.time()
+    state = aligo.pretune(kat, **kwargs)
+    t = time.time() - start
+
+    print("{0:16s} {1:8.2f} s  {2:3d} runs  {3}".format(name, t, sum(v["runs"] for v in state["steps"].values()),
+          "  ".join("{0} {1:.2f} s".format(k, v["time"]) for k, v in state["steps"].items())))
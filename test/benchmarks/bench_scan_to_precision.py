@@ -0,0 +1,44 @@
+"""
+Measures how many Finesse runs and points scan_to_precision needs with
+each of its methods to find the X arm resonance of the aLIGO design model
+to a precision of 1e-4 deg, as aligo.pretune does, and how long it takes.
+"brent" and "golden" are run with a fine first scan of 200 steps and with
+their default coarse scan. They compute fewer points than "scan", but
+only golden with its default batch does so without needing more runs.
+Needs Finesse to be installed.
+
+    python bench_scan_to_precision.py
+"""
+
+from __future__ import print_function
+
+import time
+import pykat
+
+from pykat.ifo import make_transparent, scan_to_precision
+
+try:
+    from pykat.ifo import aligo
+
+    base = aligo.make_kat("design")
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+base.verbose = False
+
+kat = base.deepcopy()
+kat.removeBlock("locks", False)
+make_transparent(kat, ["PRM", "SRM"])
+make_transparent(kat, ["ITMY", "ETMY"])
+kat.BS.setRTL(0.0, 1.0, 0.0)
+
+for method, steps, batch in (("scan", None, None),
+                             ("brent", 200, None), ("golden", 200, 1),
+                             ("brent", None, None), ("golden", None, 1), ("golden", None, None)):
+    stats = {}
+    start = time.time()
+    phi, precision = scan_to_precision(kat.IFO.preARMX, 1e-4, method=method, steps=steps, batch=batch, stats=stats)
+    t = time.time() - start
+
+    print("{0:6s} steps {1:7s} batch {2:7s}: phi = {3:12.6f} ({4:.1e})  {5:3d} runs  {6:4d} points  {7:6.2f} s".format(
+          method, str(steps or "default"), str(batch or "default"), phi, precision, stats["runs"], stats["points"], t))
@@ -0,0 +1,88 @@
+"""
+Measures IFO.sensing_matrix on the aLIGO design model, which applies every
+DOF signal in one multisig run, against running Finesse once per DOF with
+a fresh copy of the model each time, and over a range of frequencies.
+Needs Finesse to be installed.
+
+    python bench_sensing_matrix.py [repeats]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+import numpy as np
+import pykat
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+try:
+    from pykat.ifo import aligo
+
+    kat = aligo.make_kat("design")
+except (ImportError, pykat.exceptions.BasePyKatException) as ex:
+    raise SystemExit("Could not make the aLIGO model: {0}".format(ex))
+
+kat.verbose = False
+
+DOFs = ["DARM", "CARM", "PRCL", "SRCL", "MICH"]
+
+detectors = [
+    kat.IFO.REFL_f1.add_transfer('I'),
+    kat.IFO.REFL_f1.add_transfer('Q'),
+    kat.IFO.REFL_f2.add_transfer('I'),
+    kat.IFO.REFL_f2.add_transfer('Q'),
+    kat.IFO.POP_f2.add_transfer('I'),
+    kat.IFO.POP_f2.add_transfer('Q'),
+    kat.IFO.AS_f2.add_transfer('I'),
+    kat.IFO.AS_f2.add_transfer('Q'),
+    kat.IFO.AS_DC.add_transfer()
+]
+
+def per_DOF():
+    data = []
+
+    for DOF in DOFs:
+        _kat = kat.deepcopy()
+        _kat.noxaxis = True
+        _kat.yaxis = "re:im"
+        _kat.removeBlock("locks", False)
+        _kat.removeBlock("powers", False)
+        _kat.removeBlock("errsigs", False)
+        _kat.parse(kat.IFO.DOFs[DOF].fsig(fsig=1))
+        data.append(_kat.run()[detectors])
+
+    return np.array(data)
+
+def multisig():
+    return kat.IFO.sensing_matrix(DOFs, detectors, 1).values
+
+freqs = np.logspace(0, 3, 50)
+
+def per_frequency():
+    return [multisig() for f in freqs]
+
+def over_frequency():
+    return kat.IFO.sensing_matrix_f(DOFs, detectors, freqs)
+
+def over_frequency_split():
+    return kat.IFO.sensing_matrix_over_frequency(DOFs, detectors, freqs)
+
+def best(func, number=repeats):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+t_loop = best(per_DOF)
+t_multi = best(multisig)
+
+print("{0} DOFs, {1} detectors".format(len(DOFs), len(detectors)))
+print("run per DOF     {0:8.1f} ms".format(t_loop * 1e3))
+print("multisig        {0:8.1f} ms".format(t_multi * 1e3))
+print("speed up        {0:8.1f}x".format(t_loop / t_multi))
+
+t_f_loop = best(per_frequency, 1)
+t_f = best(over_frequency)
+
+print("{0} frequencies".format(len(freqs)))
+print("run per freq    {0:8.1f} ms".format(t_f_loop * 1e3))
+print("xaxis over f    {0:8.1f} ms".format(t_f * 1e3))
+print("split xaxis     {0:8.1f} ms".format(best(over_frequency_split) * 1e3))
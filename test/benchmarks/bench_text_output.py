@@ -0,0 +1,74 @@
+"""
+Compares reading Finesse text output files with kat.readOutFile against
+np.loadtxt, which pykat used before.
+
+The output file is made by running the aLIGO design model with a long xaxis
+and every power and amplitude detector of its IFO outputs. Without Finesse
+installed a synthetic file of the same size is used instead.
+
+    python bench_text_output.py [steps]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pykat
+
+steps = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+def best_of(func, n=3):
+    times = []
+
+    for _ in range(n):
+        t0 = time.time()
+        func()
+        times.append(time.time() - t0)
+
+    return min(times)
+
+try:
+    from pykat.ifo import aligo
+
+    kat = aligo.make_kat()
+    kat.verbose = False
+
+    ports = [kat.IFO.POW_X, kat.IFO.POW_Y, kat.IFO.AS_DC, kat.IFO.POW_BS, kat.IFO.REFL_f1, kat.IFO.POP_f1, kat.IFO.AS_f2]
+    kat.parse("\n".join(cmd for p in ports for cmd in p.get_signal_cmds(quad="I")))
+    kat.parse("xaxis ETMX phi lin -1 1 {0}".format(steps))
+
+    out = kat.run(binary_output=False, keep_outfile=True)
+    filename = out.outfile
+    print("Using aLIGO output with {0} outputs".format(len(out.ylabels)))
+except (ImportError, pykat.exceptions.BasePyKatException):
+    data = np.random.randn(steps+1, 20)
+    fd, filename = tempfile.mkstemp(suffix=".out")
+    os.close(fd)
+    np.savetxt(filename, data, fmt="%.15g", header="\n\nx, a\n", comments="%")
+    kat = None
+    print("Finesse not found, using synthetic output")
+
+def read_new():
+    if kat is not None:
+        return kat.readOutFile(filename)
+
+    # same as kat.readOutFile but without needing a kat object
+    with open(filename) as f:
+        for _ in range(4):
+            f.readline()
+
+        return pykat.finesse._read_text_data(f)
+
+print("File size {0:.1f} MB, {1} rows".format(os.path.getsize(filename)/1e6, steps+1))
+
+t_old = best_of(lambda: np.loadtxt(filename, comments='%', skiprows=4))
+t_new = best_of(read_new)
+
+print("np.loadtxt       {0:8.3f} s".format(t_old))
+print("kat.readOutFile  {0:8.3f} s".format(t_new))
+print("speed up         {0:8.1f}x".format(t_old/t_new))
+
+os.remove(filename)
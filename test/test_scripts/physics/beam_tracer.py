@@ -0,0 +1,85 @@
+# Checks the vectorised kat.beamTracer gives the same beam parameters, Gouy
+# phases and ABCD matrices as kat.beamTrace, for single beams and for
+# arrays of parameter values
+from __future__ import print_function
+
+import numpy as np
+import pykat
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n0
+s s1 1000 n0 n1
+bs m1 1 0 0 10 n1 n2 dump dump
+s s2 1000 n2 n3
+lens f1 800 n3 n4
+s s3 500 1.44 n4 n5
+m m2 0.5 0.5 0 n5 n6
+attr m2 Rc -700
+s s4 2000 n6 n7
+bs bs1 0.5 0.5 0 30 n7 n8 n9 n10
+attr bs1 Rc 1500
+s s5 100 n9 n11
+""")
+
+bp = pykat.BeamParam(w0=1e-3, z=-100)
+
+def compare(T, out, i=()):
+    for node in T.data:
+        if node in ("components", "nodes") or node in kat.components:
+            continue
+
+        assert(np.allclose(T.data[node]["q"].q, out[node]["q"][i]))
+        assert(np.allclose(T.data[node]["q"].w, out[node]["w"][i]))
+        assert(np.allclose(T.data[node]["gouy"], out[node]["gouy"][i]))
+
+    assert(np.allclose(T.abcd, out.abcd[-1][i]))
+
+for direction in ("x", "y"):
+    for nodes in (("n0", "n11"), ("n0", "n7", "n8"), ("n11", "n4")):
+        T = kat.beamTrace(bp, *nodes, direction=direction)
+        tracer = kat.beamTracer(*nodes, direction=direction)
+        compare(T, tracer.trace(bp))
+
+        assert(tracer.components == tuple(T.data["components"]))
+
+# reflecting back off m2
+T = kat.beamTrace(bp, "n0", "n5", "n1")
+out = kat.beamTracer("n0", "n5", "n1").trace(bp)
+compare(T, out)
+assert("m2" in out.components and out.nodes[-1] == "n1")
+
+# arrays of parameter values are the same as tracing each one
+tracer = kat.beamTracer("n0", "n11")
+L = np.linspace(400, 600, 5)
+Rc = np.array([-600, -800])
+f = np.linspace(700, 900, 3)
+
+out = tracer.trace(bp, [(kat.s3.L, L[:, None, None]), ("m2.Rcx", Rc[None, :, None]), ("f1.f", f)])
+assert(out.shape == (5, 2, 3))
+
+kat1 = kat.deepcopy()
+
+for i in range(len(L)):
+    for j in range(len(Rc)):
+        for k in range(len(f)):
+            kat1.s3.L = L[i]
+            kat1.m2.Rcx = Rc[j]
+            kat1.f1.f = f[k]
+            compare(kat1.beamTrace(bp, "n0", "n11"), out, (i, j, k))
+
+# and for arrays of beam parameters
+q = bp.q + np.array([0, 10, 20])
+out = tracer.trace(q, wavelength=bp.wavelength)
+
+for i, _ in enumerate(q):
+    compare(kat.beamTrace(pykat.BeamParam(q=_), "n0", "n11"), out, i)
+
+try:
+    tracer.trace(bp, {"l1.P": [1, 2]})
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+print("PASSED")
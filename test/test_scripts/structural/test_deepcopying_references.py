@@ -13,17 +13,17 @@ kat0.parse("pd1 o1 1 0 n1")
 kat1 = deepcopy(kat0)
 
 assert(kat0 != kat1)
-assert(kat0.__class__ != kat1.__class__)
+assert(kat0.__class__ is kat1.__class__)
 
 assert(kat0.m1 != kat1.m1)
-assert(kat0.m1.__class__ != kat1.m1.__class__)
+assert(kat0.m1.__class__ is kat1.m1.__class__)
 
 assert(kat0.m1.n0 != kat1.m1.n0)
 assert(kat0.m1.n0.node != kat1.m1.n0.node)
 assert(kat0.nodes.n0 != kat1.nodes.n0)
 
 assert(kat0.o1 != kat1.o1)
-assert(kat0.o1.__class__ != kat1.o1.__class__)
+assert(kat0.o1.__class__ is kat1.o1.__class__)
 
 assert(kat0.m1.phi.owner == kat0.m1)
 assert(kat1.m1.phi.owner == kat1.m1)
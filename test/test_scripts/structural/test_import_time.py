@@ -0,0 +1,42 @@
+"""
+Test file to ensure importing pykat and its finesse module does not import
+heavy optional dependencies, which are only needed by parts of pykat that
+are imported when used. The import time is printed to track regressions.
+"""
+
+import os
+import sys
+import subprocess
+import pykat
+
+heavy = ["scipy", "matplotlib", "pandas", "IPython", "h5py", "multiprocessing"]
+
+code = """
+import sys
+import pykat
+import pykat.finesse
+print(",".join(_ for _ in {0!r} if _ in sys.modules))
+""".format(heavy)
+
+env = dict(os.environ)
+env["PYTHONPATH"] = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(pykat.__file__))), env.get("PYTHONPATH", "")])
+
+cmd = [sys.executable]
+
+if sys.version_info >= (3, 7):
+    cmd += ["-X", "importtime"]
+
+p = subprocess.Popen(cmd + ["-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+out, err = p.communicate()
+
+assert(p.returncode == 0)
+
+imported = out.decode().strip()
+
+assert(imported == ""), "importing pykat.finesse imported " + imported
+
+for line in err.decode().splitlines():
+    if line.startswith("import time:") and line.split("|")[-1].strip() in ("pykat", "pykat.finesse"):
+        print("Cumulative import time of {0}: {1} us".format(line.split("|")[-1].strip(), line.split("|")[1].strip()))
+
+print("PASSED")
@@ -0,0 +1,43 @@
+"""
+Test file to ensure kat objects and kat scripts run in a local process pool
+give the same outputs, in the right order, as running them directly
+"""
+
+import pykat
+import numpy as np
+from pykat.parallel import KatPool
+
+code = """
+l l1 1 0 n1
+s s1 1 n1 n2
+m m1 0.5 0.5 0 n2 n3
+pd P n3
+xaxis m1 phi lin 0 180 10
+"""
+
+kats = []
+
+for i in range(4):
+    kat = pykat.finesse.kat()
+    kat.verbose = False
+    kat.parse(code)
+    kat.l1.P = i + 1
+    kats.append(kat)
+
+with KatPool(max_workers=2, max_pending=2) as pool:
+    for kat in kats:
+        pool.run(kat)
+    
+    pool.run("".join(kats[-1].generateKatScript()))
+    
+    outs = pool.getResults()
+    completed = sorted(i for i, _ in pool.as_completed())
+
+assert(completed == list(range(5)))
+
+for kat, out in zip(kats, outs):
+    assert(np.allclose(out["P"], kat.run()["P"]))
+
+assert(np.allclose(outs[-1]["P"], outs[-2]["P"]))
+
+print("PASSED")
@@ -0,0 +1,109 @@
+"""
+Test file to ensure a lock drag split into segments gives the same final
+state as a single run, runs a segment again with more steps when the lock
+is lost, and can be resumed from its checkpoint file
+"""
+
+import os
+import tempfile
+import numpy as np
+import pykat
+import pykat.ifo as ifo
+import pykat.exceptions as pkex
+
+class IFO(ifo.IFO):
+    feedback = []
+
+    def apply_lock_feedback(self, out, idx=None):
+        self.feedback.append(len(out.x))
+
+def make_kat():
+    kat = pykat.finesse.kat()
+    kat.verbose = False
+    kat.parse("""
+    l L0 1 0 n0
+    s s0 1 n0 n1
+    m M1 0.9 0.1 0 n1 n2
+    s s1 1 n2 n3
+    m M2 0.9 0.1 0 n3 n4
+    pd P n4
+    """)
+
+    kat.IFO = IFO(kat, [], ["M1", "M2"])
+    return kat
+
+# lock is lost in any segment starting past 5 deg run with less than 20 steps
+_run = pykat.finesse.kat.run
+runs = []
+
+def run(self, *args, **kwargs):
+    start = float(self.M1.phi)
+    runs.append((start, self.xaxis.steps))
+    callback = kwargs.get("callback")
+
+    if callback is not None and start >= 5 and self.xaxis.steps < 20:
+        if callback("lock_fail", 1):
+            raise pkex.FinesseRunAborted("lock_fail", 1)
+
+    return _run(self, *args, **kwargs)
+
+pykat.finesse.kat.run = run
+
+kat = make_kat()
+drag = kat.IFO.lock_drag(20, ("M1", "phi", 10), ("M2", "phi", -4))
+assert(np.isclose(float(kat.M1.phi), 10) and np.isclose(float(kat.M2.phi), -4))
+assert(len(drag.x) == 21)
+
+# 4 segments of 5 steps, the last two lose lock and are run with 20 steps
+del runs[:]
+kat = make_kat()
+drag = kat.IFO.lock_drag(20, ("M1", "phi", 10), ("M2", "phi", -4), segments=4)
+
+assert(np.isclose(float(kat.M1.phi), 10) and np.isclose(float(kat.M2.phi), -4))
+assert([_[1] for _ in runs] == [5, 5, 5, 10, 20, 5, 10, 20])
+assert(np.allclose([_[0] for _ in runs], [0, 2.5, 5, 5, 5, 7.5, 7.5, 7.5]))
+assert(IFO.feedback[-4:] == [6, 6, 21, 21])
+
+assert(len(drag.x) == 5 + 5 + 20 + 20 + 1)
+assert(drag.x[0] == 0 and drag.x[-1] == 1)
+assert(np.all(np.diff(drag.x) > 0))
+assert(np.isclose(drag.x[5], 0.25) and np.isclose(drag.x[10], 0.5))
+assert(drag.y.shape == (len(drag.x), 1))
+assert([(_.start, _.stop) for _ in drag.chunks] == [(0, 6), (6, 11), (11, 31), (31, 51)])
+
+# update_state=False leaves the model alone
+kat = make_kat()
+kat.IFO.lock_drag(20, ("M1", "phi", 10), segments=4, update_state=False)
+assert(float(kat.M1.phi) == 0)
+
+# giving up keeps the segments done in the checkpoint to resume from
+checkpoint = os.path.join(tempfile.mkdtemp(), "drag.pkl")
+
+kat = make_kat()
+
+try:
+    kat.IFO.lock_drag(20, ("M1", "phi", 10), segments=4, checkpoint=checkpoint, max_refinements=1)
+    assert(False)
+except pkex.BasePyKatException as ex:
+    assert("segment 3" in str(ex))
+
+assert(os.path.exists(checkpoint))
+assert(np.isclose(float(kat.M1.phi), 5))
+
+del runs[:]
+kat = make_kat()
+drag = kat.IFO.lock_drag(20, ("M1", "phi", 10), segments=4, checkpoint=checkpoint, resume=True)
+
+assert(np.isclose(float(kat.M1.phi), 10))
+assert(runs[0] == (5, 5))
+assert(len(drag.x) == 51)
+
+try:
+    make_kat().IFO.lock_drag(10, ("M1", "phi", 10), segments=4, checkpoint=checkpoint, resume=True)
+    assert(False)
+except pkex.BasePyKatException:
+    pass
+
+pykat.finesse.kat.run = _run
+
+print("PASSED")
@@ -0,0 +1,71 @@
+"""
+Test file to ensure kat.getAll and the outputs of KatRun and KatRun2D give
+the right objects and columns after the model or labels change
+"""
+
+import numpy as np
+import pykat
+
+from pykat.finesse import KatRun, KatRun2D
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n0
+s s1 1 n0 n1
+m m1 0.9 0.1 0 n1 n2
+s s2 1 n2 n3
+m m2 0.9 0.1 0 n3 n4
+pd P n4
+cav c1 m1 n2 m2 n3
+""")
+
+mirrors = kat.getAll(pykat.components.mirror)
+assert([_.name for _ in mirrors] == ["m1", "m2"])
+assert(kat.getAll(pykat.components.mirror) is mirrors)
+assert(kat.getAll(pykat.components.mirror, "name") == ("m1", "m2"))
+assert(len(kat.getAll(pykat.components.Component)) == 5)
+assert(kat.getAll(pykat.commands.cavity) == (kat.c1,))
+
+kat.parse("m m3 0.9 0.1 0 n4 n5")
+assert(kat.getAll(pykat.components.mirror, "name") == ("m1", "m2", "m3"))
+
+kat.remove(kat.m1)
+assert(kat.getAll(pykat.components.mirror, "name") == ("m2", "m3"))
+
+kat1 = kat.deepcopy()
+assert(all(_ is getattr(kat1, _.name) for _ in kat1.getAll(pykat.components.mirror)))
+
+out = KatRun()
+out.yaxis = "abs:deg"
+out.x = np.arange(3)
+out.y = np.arange(15.0).reshape(3, 5)
+out.ylabels = ["P", "A (abs)", "A (deg)", "B", "C"]
+
+assert("A" in out and "P" in out and "D" not in out)
+assert(np.all(out["P"] == out.y[:, 0]))
+assert(np.allclose(out["A"], out.y[:, 1] * np.exp(1j*np.pi*out.y[:, 2]/180)))
+assert(out[["P", "B"]].shape == (2, 3))
+
+out.ylabels = ["D", "P", "A (abs)", "A (deg)", "B"]
+assert("D" in out and "C" not in out)
+assert(np.all(out["P"] == out.y[:, 1]))
+
+try:
+    out["C"]
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+out2 = KatRun2D()
+out2.yaxis = "re:im"
+out2.z = np.arange(12.0).reshape(3, 2, 2)
+out2.zlabels = ["P", "A (re)", "A (im)"]
+
+assert(np.all(out2["P"] == out2.z[0]))
+assert(np.all(out2["A"] == out2.z[1] + 1j*out2.z[2]))
+
+out2.zlabels = ["A (re)", "A (im)", "P"]
+assert(np.all(out2["P"] == out2.z[2]))
+
+print("PASSED")
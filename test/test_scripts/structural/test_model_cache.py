@@ -0,0 +1,70 @@
+"""
+Test file to ensure the kat objects made by pykat.ifo make_kat functions
+can be pickled and are cached, and that the cache notices when the kat
+file changes
+"""
+
+import os
+import shutil
+import pickle
+import tempfile
+import pykat
+import pykat.cache
+
+from pykat.ifo import aligo, adv, voyager, aplus
+
+for ifo in (aligo, adv, voyager, aplus):
+    kat = ifo.make_kat()
+    kat1 = pickle.loads(pickle.dumps(kat))
+
+    assert(kat1.generateKatScript()[1:] == kat.generateKatScript()[1:])
+    assert(kat1.IFO.kat is kat1)
+
+tmp = tempfile.mkdtemp()
+
+try:
+    cache = pykat.cache.ModelCache(os.path.join(tmp, "models"))
+
+    kat = aligo.make_kat(cache=cache)
+    kat1 = aligo.make_kat(cache=cache)
+
+    assert(cache.hits == 1 and cache.misses == 1)
+    assert(kat1 is not kat)
+    assert(kat1.generateKatScript()[1:] == kat.generateKatScript()[1:])
+
+    # the cached object should work just like one that was made
+    assert(kat1.ETMX.phi.owner is kat1.ETMX)
+    assert(kat1.IFO.DARM.kat is kat1)
+    assert(kat1.ETMX.nETMX1.node is kat1.nodes.nETMX1)
+
+    kat1.nodes.replaceNode(kat1.ETMX, kat1.ETMX.nETMXs1, kat1.nodes.createNode("nETMX_new"))
+    assert(hasattr(kat1.ETMX, "nETMX_new"))
+
+    kat1.ETMX.phi = 10
+    kat2 = kat1.deepcopy()
+    assert(kat2.ETMX.phi == 10 and kat2.ETMX.phi.owner is kat2.ETMX)
+
+    aligo.make_kat(use_RF_DARM_lock=True, cache=cache)
+    assert(cache.misses == 2)
+
+    # changing the kat file gives a new entry
+    katfile = os.path.join(tmp, "design.kat")
+    shutil.copy(os.path.join(os.path.dirname(aligo.__file__), "files", "design.kat"), katfile)
+
+    kat = aligo.make_kat(katfile=katfile, cache=cache)
+    assert(kat.maxtem != 3)
+
+    with open(katfile, "a") as f:
+        f.write("\nmaxtem 3\n")
+
+    kat = aligo.make_kat(katfile=katfile, cache=cache)
+    assert(kat.maxtem == 3)
+    assert(cache.misses == 4 and cache.hits == 1)
+    assert(cache.stats()["entries"] == 4)
+
+    aligo.make_kat(cache=False)
+    assert(cache.misses == 4 and cache.hits == 1)
+finally:
+    shutil.rmtree(tmp)
+
+print("PASSED")
@@ -0,0 +1,71 @@
+"""
+Test file to ensure objects in a kat object are reachable as attributes
+named after them, e.g. kat.m1, kat.m1.n1 and kat.nodes.n1, and that these
+are kept up to date as objects are added, removed and copied
+"""
+
+import pykat
+
+kat = pykat.finesse.kat()
+
+kat.parse("""
+l l1 1 0 n0
+s s1 1 n0 n1
+m m1 0.5 0.5 0 n1 n2
+pd1 o1 10 0 n2
+cav c1 m1 n1 m1 n2
+xaxis m1 phi lin 0 1 10
+""")
+
+assert(kat.m1 is kat.components["m1"])
+assert(kat.o1 is kat.detectors["o1"])
+assert(kat.xaxis is kat.commands["xaxis"])
+assert(kat.nodes.n1 is kat.nodes.getNodes()["n1"])
+assert(kat.m1.n1.node is kat.nodes.n1)
+assert(not hasattr(kat, "m2"))
+assert(not hasattr(kat.nodes, "n3"))
+
+assert(kat.getAll(pykat.components.mirror) == (kat.m1,))
+assert(kat.getAll(pykat.commands.cavity, "name") == ("c1",))
+
+# attributes for objects can't be replaced
+for obj, name in ((kat, "m1"), (kat.m1, "n1"), (kat.nodes, "n1")):
+    try:
+        setattr(obj, name, None)
+        assert(False)
+    except AttributeError:
+        pass
+
+# demodulation attributes follow the number of demodulations
+kat.o1.f1 = "1k"
+assert(kat.o1.f1 == 1000)
+assert(isinstance(kat.o1.f1, pykat.param.Param))
+assert(not hasattr(kat.o1, "f2"))
+
+kat.o1.num_demods = 2
+kat.o1.f2 = 20
+assert(kat.o1.f2 == 20)
+
+kat.o1.num_demods = 1
+assert(not hasattr(kat.o1, "phase2"))
+
+kat.nodes.replaceNode(kat.m1, kat.m1.n2, kat.nodes.createNode("n3"))
+
+assert(hasattr(kat.m1, "n3") and not hasattr(kat.m1, "n2"))
+assert(hasattr(kat.nodes, "n3"))
+
+kat.remove(kat.o1)
+kat.parse("pd1 o1 20 0 n3")
+assert(kat.o1.f1 == 20)
+
+kat1 = kat.deepcopy()
+
+assert(kat1.m1 is not kat.m1 and kat1.m1 is kat1.components["m1"])
+assert(kat1.m1.n3.node is kat1.nodes.n3)
+
+kat1.remove(kat1.m1)
+
+assert(not hasattr(kat1, "m1"))
+assert(hasattr(kat, "m1"))
+
+print("PASSED")
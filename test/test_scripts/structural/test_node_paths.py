@@ -0,0 +1,77 @@
+"""
+Test file to ensure NodeNetwork.getComponentsBetween finds the shortest
+path through beam splitters, and that cached paths are not used after the
+network or the reflectivities along them change
+"""
+
+import pykat
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n0
+s s0 1 n0 n1
+bs bs1 0.5 0.5 0 45 n1 n2 n3 n4
+s sx 1 n3 nx1
+m mx 0.9 0.1 0 nx1 nx2
+s sy 1 n2 ny1
+m my 1 0 0 ny1 ny2
+s sout 1 n4 nout
+""")
+
+def path(a, b):
+    comps, nodes = kat.nodes.getComponentsBetween(a, b, getNodes=True)
+
+    assert(len(comps) == len(nodes))
+
+    for comp, (f, t) in zip(comps, nodes):
+        assert(f in comp.nodes and t in comp.nodes)
+
+    for (_, t), (f, _) in zip(nodes[:-1], nodes[1:]):
+        assert(t is f)
+
+    return [_.name for _ in comps]
+
+assert(path("n0", "nx2") == ["s0", "bs1", "sx", "mx"])
+assert(path("n0", "nx2") == ["s0", "bs1", "sx", "mx"])
+assert(path("n0", "ny1") == ["s0", "bs1", "sy"])
+assert(path("nx2", "n0") == ["mx", "sx", "bs1", "s0"])
+
+# mirrors only transmit, so my blocks the path
+assert(path("n0", "ny2") == [])
+
+kat.my.R = 0.5
+kat.my.T = 0.5
+assert(path("n0", "ny2") == ["s0", "bs1", "sy", "my"])
+
+# a beam splitter that doesn't transmit
+kat.bs1.R = 1
+kat.bs1.T = 0
+assert(path("n0", "nx2") == [])
+assert(path("n0", "ny2") == ["s0", "bs1", "sy", "my"])
+
+kat.bs1.T = 0.5
+kat.bs1.R = 0.5
+assert(path("n0", "nx2") == ["s0", "bs1", "sx", "mx"])
+
+# changing the network
+kat.parse("s sz 1 nz1 nz2")
+kat.nodes.replaceNode(kat.sx, "nx1", "nz1")
+kat.nodes.replaceNode(kat.mx, "nx1", "nz2")
+assert(path("n0", "nx2") == ["s0", "bs1", "sx", "sz", "mx"])
+
+kat.remove(kat.sz)
+assert(path("n0", "nx2") == [])
+
+# only the most recently used paths are kept
+kat.nodes.max_cached_paths = 2
+
+for a, b in (("n0", "n2"), ("n0", "n3"), ("n0", "n4"), ("n0", "n2")):
+    path(a, b)
+
+assert(len(kat.nodes._NodeNetwork__paths) == 2)
+
+kat1 = kat.deepcopy()
+assert(kat1.nodes.getComponentsBetween("n0", "n2")[1] is kat1.bs1)
+
+print("PASSED")
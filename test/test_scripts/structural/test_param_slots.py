@@ -0,0 +1,74 @@
+"""
+Test file to ensure parameters, which use __slots__, still copy, pickle and
+update the Finesse text of their owner, and that SIfloat gives the same
+values for plain numbers and strings as for arrays
+"""
+
+import copy
+import pickle
+import numpy as np
+import pykat
+
+from pykat.SIfloat import SIfloat, convertToFloat
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n0
+s s1 1 n0 n1
+m m1 0.9 0.1 0 n1 n2
+attr m1 Rc 10
+pd P n2
+xaxis m1 phi lin 0 10 10
+""")
+
+p = kat.m1.phi
+assert(not hasattr(p, "__dict__"))
+
+try:
+    p.not_an_attribute = 1
+    assert(False)
+except AttributeError:
+    pass
+
+p.value = 10
+assert(p == 10 and type(p.value) is int)
+assert("m m1 0.9 0.1 10 n1 n2" in "".join(kat.generateKatScript()))
+
+p.value = "$x1"
+assert(p.isConstant and p.constantName == "$x1")
+
+p.value = "$fs"
+assert(not p.isConstant and p.value == "$fs")
+
+p.value = 1.5
+kat.m1.Rcx.value = 20.0
+assert(kat.m1.phi.fsig_name == "phase")
+
+for k in (kat.deepcopy(), pickle.loads(pickle.dumps(kat))):
+    assert(k.m1.phi == 1.5 and k.m1.phi.owner is k.m1)
+    assert(k.m1.Rcx == 20.0 and k.m1.Rcx.owner is k.m1)
+    assert(k.xaxis.x.owner is k.xaxis)
+    assert(k.generateKatScript()[1:] == kat.generateKatScript()[1:])
+
+# putting to a parameter changes the text of the one put from
+kat.parse("put m1 phi $x1")
+assert(kat.m1.phi._putter is kat.xaxis.x and kat.xaxis.x.put_count == 1)
+assert(any(l.startswith("put m1 phi $x1") for l in kat.generateKatScript()))
+
+kat.m1.phi.put(None)
+assert(kat.xaxis.x.put_count == 0)
+
+for v in (1, 1.5, True, np.float64(2), "1k", " 2m", "-3e-2", [3]):
+    assert(np.allclose(SIfloat(v), np.vectorize(convertToFloat)(np.array(v))))
+
+assert(SIfloat("$fs") == "$fs" and SIfloat("$x") == "$x" and SIfloat(None) is None)
+assert((SIfloat([1, "2k"]) == np.array([1, 2e3])).all())
+
+try:
+    SIfloat("1x")
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+print("PASSED")
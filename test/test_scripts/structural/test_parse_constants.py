@@ -0,0 +1,81 @@
+"""
+Test file to ensure constants are replaced where they are used in a kat
+script and that each command is parsed into the right kind of object
+"""
+
+import pykat
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+
+kat.parse("""
+const L 10
+const Lx 20
+const R 0.5
+l l1 1 0 n0
+s s1 $L n0 n1
+s s2 $Lx n1 n2
+bs1 bs1 $R 0 0 0 n2 n3 n4 n5
+m1 m1 $R 0 0 n3 n6
+dbs FI n6 n7 n8 n9
+pd1 P $L 0 n7
+pdtype P Z-dir
+qnoisedS Q 1 $L 0 n7
+tf2 sus 1 0 {} {}
+maxtem off
+phase 2
+lambda 1550n
+trace 2
+set x s1 L
+func y = $x+$L
+put s2 L $y
+noxaxis
+gnuterm no
+""")
+
+assert(kat.s1.L == 10)
+assert(kat.s2.L == 20)
+assert(kat.bs1.T == 0.5)
+assert(kat.m1.T == 0.5)
+assert(kat.P.f1 == 10)
+assert(kat.P.pdtype == "Z-dir")
+assert(kat.Q.f1 == 10)
+assert(kat.y.value == "$x+10.0")
+assert(kat.s2.L.isPutter)
+
+assert(isinstance(kat.bs1, pykat.components.beamSplitter))
+assert(isinstance(kat.m1, pykat.components.mirror))
+assert(isinstance(kat.FI, pykat.components.dbs))
+assert(isinstance(kat.Q, pykat.detectors.qnoised))
+assert(isinstance(kat.sus, pykat.commands.tf2))
+
+assert(kat.maxtem == -1)
+assert(kat.phase == 2)
+assert(kat.lambda0 == 1550e-9)
+assert(kat.trace == 2)
+assert(kat.noxaxis)
+
+# constants can be kept instead and changed later
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+const L 10
+l l1 1 0 n0
+s s1 $L n0 n1
+""", preserveConstants=True)
+
+assert(kat.s1.L.isConstant)
+kat.constants["L"].value = 30
+assert(kat.s1.L.value == 30)
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+const L 10
+l l1 1 0 n0
+s s1 $L n0 n1
+""", useConstants={"L": 40})
+
+assert(kat.s1.L == 40)
+
+print("PASSED")
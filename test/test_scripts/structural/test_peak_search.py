@@ -0,0 +1,123 @@
+"""
+Test file to ensure PeakSearch finds maxima and minima to the precision
+asked for with each of its methods, reuses the points it has computed,
+and that scan_to_precision can use it
+"""
+
+import numpy as np
+import pykat
+import pykat.ifo as ifo
+
+x0 = 12.3456789
+
+def lorentzian(x):
+    return 1 / (1 + ((x - x0) / 0.2)**2)
+
+calls = []
+
+def evaluate(x):
+    calls.append(np.array(x))
+    # points are always evenly spaced so one lin xaxis can compute them
+    if len(x) > 2:
+        assert(np.allclose(np.diff(x), x[1] - x[0]))
+    return lorentzian(x)
+
+for method, batch in (("brent", 1), ("golden", 1), ("golden", 8)):
+    for minmax, sign in (("max", 1), ("min", -1)):
+        del calls[:]
+        search = ifo.PeakSearch(lambda x: sign * evaluate(x), minmax=minmax)
+        a, x, b = search.scan(-135, 135, 200)
+        assert(a < x0 < b)
+
+        x, precision = search.refine(1e-4, method=method, batch=batch)
+        assert(precision <= 1e-4)
+        assert(abs(x - x0) <= precision)
+        assert(search.runs == len(calls))
+        assert(search.points == sum(len(_) for _ in calls))
+        assert(search.best[0] == x)
+
+        # points computed one at a time are never computed twice
+        if batch == 1:
+            assert(len(np.unique(np.concatenate(calls))) == search.points)
+
+        # the first scan is rerun from the points already computed
+        runs = search.runs
+        search.scan(-135, 135, 200)
+        assert(search.runs == runs)
+
+        if method == "brent":
+            assert(search.runs < 20)
+
+# a coarse scan brackets the peak and large batches need few runs
+search = ifo.PeakSearch(lorentzian)
+a, x, b = search.scan(-135, 135, 16)
+assert(a < x0 < b)
+
+x, precision = search.refine(1e-4, method="golden", batch=128)
+assert(abs(x - x0) <= precision <= 1e-4)
+assert(search.runs <= 4)
+
+for args in ((1e-4, "newton"),):
+    try:
+        search.refine(*args)
+        assert(False)
+    except pykat.exceptions.BasePyKatException:
+        pass
+
+try:
+    ifo.PeakSearch(evaluate).refine(1e-4)
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+# scan_to_precision through Finesse
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l L0 1 0 n0
+s s0 1 n0 n1
+m M1 0.9 0.1 0 n1 n2
+""")
+
+IFO = ifo.IFO(kat, [], [])
+IFO.P = ifo.Output(IFO, "P", "n2")
+IFO.M1 = ifo.DOF(IFO, "M1", IFO.P, "", "M1", 1, 1.0)
+IFO.update()
+
+runs = []
+_run = pykat.finesse.kat.run
+
+def run(self, *args, **kwargs):
+    runs.append("".join(self.generateKatScript()))
+    return _run(self, *args, **kwargs)
+
+pykat.finesse.kat.run = run
+
+for method in ("brent", "golden"):
+    del runs[:]
+    stats = {}
+    phi, precision = ifo.scan_to_precision(IFO.M1, 1e-3, method=method, steps=50, batch=1, stats=stats)
+    assert(precision <= 1e-3)
+    assert(stats["runs"] == len(runs))
+    assert("xaxis scan re lin -135 135 50" in runs[0])
+    # single points are run without an xaxis
+    assert(all("noxaxis" in _ for _ in runs[1:]))
+
+# golden defaults to a coarse first scan and runs of 128 points
+del runs[:]
+stats = {}
+phi, precision = ifo.scan_to_precision(IFO.M1, 1e-3, method="golden", stats=stats)
+assert(precision <= 1e-3)
+assert("xaxis scan re lin -135 135 16" in runs[0])
+assert(all(" 127\n" in _ for _ in runs[1:]))
+assert(stats["points"] == 17 + 128 * (stats["runs"] - 1))
+
+try:
+    ifo.scan_to_precision(IFO.M1, 1e-3, method="newton")
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+pykat.finesse.kat.run = _run
+
+print("PASSED")
@@ -0,0 +1,107 @@
+"""
+Test file to ensure pretune_pipeline does each PretuneStep after the steps
+it requires, stores the tunings found in kat.data so a pretune can be
+resumed, and gives the same tunings when independent steps run in a pool
+"""
+
+import pickle
+import pykat
+import pykat.ifo as ifo
+
+from pykat.ifo import PretuneStep, pretune_pipeline
+
+def make_kat():
+    kat = pykat.finesse.kat()
+    kat.verbose = False
+    kat.parse("""
+    l L0 1 0 n0
+    s s0 1 n0 n1
+    m M1 0.9 0.1 0 n1 n2
+    s s1 1 n2 n3
+    m M2 0.9 0.1 0 n3 n4
+    s s2 1 n4 n5
+    m M3 0.9 0.1 0 n5 n6
+    """)
+
+    kat.IFO = ifo.IFO(kat, [], ["M1", "M2", "M3"])
+    kat.IFO.P1 = ifo.Output(kat.IFO, "P1", "n2")
+    kat.IFO.P2 = ifo.Output(kat.IFO, "P2", "n4")
+    kat.IFO.P3 = ifo.Output(kat.IFO, "P3", "n6")
+    kat.IFO.D1 = ifo.DOF(kat.IFO, "D1", kat.IFO.P1, "", "M1", 1, 1.0)
+    kat.IFO.D2 = ifo.DOF(kat.IFO, "D2", kat.IFO.P2, "", "M2", 1, 1.0)
+    kat.IFO.D3 = ifo.DOF(kat.IFO, "D3", kat.IFO.P3, "", ["M1", "M3"], [1, -1], 1.0)
+    kat.IFO.update()
+
+    return kat
+
+steps = [
+    PretuneStep("C", "D3", requires=["A", "B"], transparent=["M2"], minmax="min", precision=30.0, add=True),
+    PretuneStep("A", "D1", transparent=["M2", "M3"]),
+    PretuneStep("B", "D2", transparent=["M3"], offset=-90.0, digits=4),
+]
+
+scripts = []
+_run = pykat.finesse.kat.run
+
+def run(self, *args, **kwargs):
+    scripts.append("".join(self.generateKatScript()))
+    return _run(self, *args, **kwargs)
+
+pykat.finesse.kat.run = run
+
+kat = make_kat()
+state = pretune_pipeline(kat, steps, 1e-3, max_workers=1, method="brent")
+
+assert(kat.data["IFO.tunings"]["pretune"] is state)
+assert(list(state["steps"]) == ["A", "B", "C"])
+assert(sum(_["runs"] for _ in state["steps"].values()) == len(scripts))
+assert(float(kat.M2.phi) == state["steps"]["B"]["phi"])
+assert(state["steps"]["C"]["tunings"] == {"M1": float(kat.M1.phi), "M3": float(kat.M3.phi)})
+
+# each step scans a copy with its mirrors made transparent
+assert(all(" 0.0 1.0 " in _ for _ in scripts))
+assert(float(kat.M2.R) == 0.9)
+
+tuned = dict((_, float(kat.components[_].phi)) for _ in ("M1", "M2", "M3"))
+
+# resuming only scans the steps not done yet
+kat = make_kat()
+pretune_pipeline(kat, steps[1:], 1e-3, max_workers=1, method="brent")
+kat = pickle.loads(pickle.dumps(kat))
+
+del scripts[:]
+state = pretune_pipeline(kat, steps, 1e-3, max_workers=1, method="brent", resume=True)
+
+assert(list(state["steps"]) == ["A", "B", "C"])
+assert(len(scripts) == state["steps"]["C"]["runs"])
+assert(all("m M2 0.0 1.0" in _ and "m M3 0.9" in _ for _ in scripts))
+assert(dict((_, float(kat.components[_].phi)) for _ in tuned) == tuned)
+
+# resuming with everything done changes nothing
+del scripts[:]
+pretune_pipeline(kat, steps, 1e-3, max_workers=1, method="brent", resume=True)
+assert(len(scripts) == 0)
+assert(dict((_, float(kat.components[_].phi)) for _ in tuned) == tuned)
+
+# without resume every step is done again
+pretune_pipeline(kat.deepcopy(), steps, 1e-3, max_workers=1, method="brent")
+assert(len(scripts) > 0)
+
+pykat.finesse.kat.run = _run
+
+# A and B are scanned at the same time in a pool
+kat = make_kat()
+state = pretune_pipeline(kat, steps, 1e-3, max_workers=2, method="brent")
+assert(list(state["steps"])[-1] == "C")
+assert(dict((_, float(kat.components[_].phi)) for _ in tuned) == tuned)
+
+for bad in ([PretuneStep("A", "D1", requires=["B"]), PretuneStep("B", "D2", requires=["A"])],
+            [PretuneStep("A", "D1", requires=["X"])],
+            [PretuneStep("A", "D1"), PretuneStep("A", "D2")]):
+    try:
+        pretune_pipeline(make_kat(), bad, 1e-3, max_workers=1, method="brent")
+        assert(False)
+    except pykat.exceptions.BasePyKatException:
+        pass
+
+print("PASSED")
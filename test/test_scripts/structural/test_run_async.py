@@ -0,0 +1,81 @@
+"""
+Test file to ensure kat objects run concurrently with run_async give the
+same outputs as running them directly
+"""
+
+import os
+import logging
+import asyncio
+import pykat
+import numpy as np
+
+code = """
+l l1 1 0 n1
+s s1 1 n1 n2
+m m1 0.5 0.5 0 n2 n3
+pd P n3
+xaxis m1 phi lin 0 180 10
+"""
+
+kats = []
+
+for i in range(4):
+    kat = pykat.finesse.kat()
+    kat.verbose = False
+    kat.parse(code)
+    kat.l1.P = i + 1
+    kats.append(kat)
+
+async def main():
+    sem = asyncio.Semaphore(2)
+
+    async def run(kat):
+        async with sem:
+            return await kat.run_async()
+
+    # every run finishes before the loop is closed, even if one fails
+    return await asyncio.gather(*(run(kat) for kat in kats), return_exceptions=True)
+
+loop = asyncio.new_event_loop()
+
+try:
+    outs = loop.run_until_complete(main())
+finally:
+    loop.close()
+
+for kat, out in zip(kats, outs):
+    assert(not isinstance(out, Exception)), out
+    assert(np.allclose(out["P"], kat.run()["P"]))
+
+# a run whose coroutine is closed, rather than cancelled, stops Finesse
+# and removes its files without awaiting anything
+kat = kats[0].deepcopy()
+kat.xaxis.steps = 100000
+
+removed = []
+_remove_run_files = pykat.finesse._remove_run_files
+
+def remove_run_files(katfile):
+    removed.append(katfile.name)
+    _remove_run_files(katfile)
+
+pykat.finesse._remove_run_files = remove_run_files
+
+# the task left pending is expected here
+logging.getLogger("asyncio").setLevel(logging.CRITICAL)
+
+loop = asyncio.new_event_loop()
+
+try:
+    coro = kat.run_async()
+    task = loop.create_task(coro)
+    loop.run_until_complete(asyncio.sleep(0.05))
+    assert(not task.done())
+    coro.close()
+finally:
+    loop.close()
+    pykat.finesse._remove_run_files = _remove_run_files
+
+assert(len(removed) == 1 and not os.path.exists(removed[0]))
+
+print("PASSED")
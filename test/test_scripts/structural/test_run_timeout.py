@@ -0,0 +1,70 @@
+"""
+Test file to ensure a kat.run that times out cleans up after itself, and
+that waiting for Finesse to connect to the pykat pipe stops when Finesse
+is killed before connecting
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import pykat
+import pykat.finesse as finesse
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n1
+s s1 1 n1 n2
+pd P n2
+xaxis l1 P lin 1 10 100000
+""")
+
+removed = []
+_remove_run_files = finesse._remove_run_files
+
+def remove_run_files(katfile):
+    removed.append(katfile.name)
+    _remove_run_files(katfile)
+
+finesse._remove_run_files = remove_run_files
+
+try:
+    kat.run(timeout=1e-3, rethrowExceptions=True)
+    assert(False)
+except pykat.exceptions.FinesseTimeout:
+    pass
+
+finesse._remove_run_files = _remove_run_files
+
+assert(len(removed) == 1)
+assert(not os.path.exists(removed[0]))
+assert(not os.path.exists(os.path.splitext(removed[0])[0] + ".out"))
+
+if sys.platform.startswith("linux"):
+    pipe_name = os.path.join(tempfile.mkdtemp(), "pykat_pipe")
+    os.mkfifo(pipe_name)
+
+    # a process that makes the pipe but never connects to it
+    p = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    threading.Timer(0.5, p.kill).start()
+
+    start = time.time()
+    assert(finesse._open_pykat_pipe(pipe_name, p) is None)
+    assert(time.time() - start < 10)
+
+    p.wait()
+
+    p = subprocess.Popen([sys.executable, "-c", "f = open({0!r}, 'w'); f.write('version:2.3\\n')".format(pipe_name)])
+
+    fifo = finesse._open_pykat_pipe(pipe_name, p)
+    assert(fifo.read() == "version:2.3\n")
+    fifo.close()
+
+    p.wait()
+    os.remove(pipe_name)
+    os.rmdir(os.path.dirname(pipe_name))
+
+print("PASSED")
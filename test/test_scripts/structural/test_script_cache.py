@@ -0,0 +1,88 @@
+"""
+Test file to ensure the Finesse text components cache is remade whenever
+something it depends on changes, so generateKatScript always gives the
+same script as making it from scratch
+"""
+
+import pykat
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+const T0 0.1
+l l1 1 0 n0
+mod eom 10M 0.1 1 pm n0 n1
+s s1 1 n1 n2
+m m1 0.9 $T0 0 n2 n3
+s s2 10 n3 n4
+bs bs1 0.5 0.5 0 45 n4 n5 n6 n7
+pd P n5
+xaxis m1 phi lin 0 10 10
+""", preserveConstants=True)
+
+def fresh_script(kat):
+    for c in kat.components.values():
+        c.__dict__.pop("_finesse_text", None)
+
+    return kat.generateKatScript()[1:]
+
+def check(kat):
+    script = kat.generateKatScript()[1:]
+    assert(script == fresh_script(kat))
+    return script
+
+script = check(kat)
+h = kat.scriptHash()
+
+kat.m1.phi = 10
+kat.s2.L = 20
+assert(check(kat) != script)
+assert(kat.scriptHash() != h)
+assert("s s2 20.0 n3 n4\n" in kat.generateKatScript())
+
+kat.eom.order = 3
+kat.s1.L = "$T0"
+kat.m1.R = 0.5
+check(kat)
+
+# parameter values are checked when making the text
+kat.constants["T0"].value = 0.8
+
+try:
+    kat.generateKatScript()
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+kat.constants["T0"].value = 0.1
+check(kat)
+
+kat.nodes.replaceNode(kat.s2, kat.s2.n4, kat.nodes.createNode("n8"))
+kat.nodes.replaceNode(kat.bs1, kat.bs1.n4, kat.nodes.n8)
+assert(kat.s2.nodes[1].name == "n8")
+check(kat)
+
+kat.parse("""
+set p1 m1 phi
+func f = $p1 + 1
+put bs1 phi $f
+put s1 L $x1
+""")
+check(kat)
+
+with kat.snapshot():
+    kat.m1.T = 0.2
+    kat.bs1.phi = 1
+    changed = check(kat)
+
+assert(check(kat) != changed)
+
+kat1 = kat.deepcopy()
+kat1.m1.phi = 45
+assert(check(kat1) != check(kat))
+
+kat.remove(kat.s1)
+check(kat)
+assert(kat.scriptHash() == kat.scriptHash())
+
+print("PASSED")
@@ -0,0 +1,140 @@
+"""
+Test file to ensure IFO.sensing_matrix and IFO.sensing_matrix_f apply
+every DOF signal in a single multisig run and put each output back in the
+right place of the DOF x detector x frequency array
+"""
+
+import numpy as np
+import pykat
+import pykat.ifo as ifo
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l L0 1 0 n0
+s s0 1 n0 n1
+m M1 0.9 0.1 0 n1 n2
+s s1 1 n2 n3
+m M2 0.9 0.1 0 n3 n4
+pd1 P_M1 $fs n1
+pd1 P_M2 $fs n4
+""")
+
+IFO = ifo.IFO(kat, [], [])
+IFO.A = ifo.DOF(IFO, "A", None, "I", ["M1"], [1], 1)
+IFO.B = ifo.DOF(IFO, "B", None, "I", ["M1", "M2"], [1, -1], 1)
+IFO.update()
+
+runs = []
+_run = pykat.finesse.kat.run
+
+def run(self, *args, **kwargs):
+    runs.append(self.generateKatScript())
+    return _run(self, *args, **kwargs)
+
+pykat.finesse.kat.run = run
+
+DOFs = ["A", "B"]
+detectors = ["P_M1", "P_M2"]
+
+sens = IFO.sensing_matrix(DOFs, detectors, 10)
+assert(len(runs) == 1)
+assert(list(sens.index) == DOFs and list(sens.columns) == detectors)
+assert(np.iscomplexobj(sens.values))
+
+script = "".join(runs[0])
+assert("multisig\n" in script)
+assert("fsig A_fsig M1 z 10.0 0.0 1.0" in script)
+assert("fsig B_fsig M2 z 10.0 180.0 1.0" in script)
+
+data = IFO.sensing_matrix_f(DOFs, detectors, 10)
+assert(data.shape == (2, 2, 1))
+assert(np.allclose(data[:, :, 0], sens.values))
+
+# each DOF gets its own output
+out = IFO._sensing_kat(DOFs, 10).run()
+assert(np.allclose(data[1, :, 0], [out["B_fsig"][_] for _ in detectors]))
+
+# evenly spaced frequencies are one run with an xaxis over fsig
+del runs[:]
+f = np.logspace(0, 3, 7)
+data = IFO.sensing_matrix_f(DOFs, detectors, f)
+assert(len(runs) == 1)
+assert(data.shape == (2, 2, 7))
+assert("xaxis A_fsig f log" in "".join(runs[0]))
+
+del runs[:]
+data = IFO.sensing_matrix_f(DOFs, detectors, [1, 2, 3])
+assert(len(runs) == 1 and data.shape == (2, 2, 3))
+
+# others need one run per frequency
+del runs[:]
+data = IFO.sensing_matrix_f(DOFs, ["P_M2"], [1, 5, 7])
+assert(len(runs) == 3 and data.shape == (2, 1, 3))
+assert(all("fsig A_fsig M1 z %s " % _ in "".join(r) for _, r in zip((1.0, 5.0, 7.0), runs)))
+
+# an axis already in the model is replaced
+IFO.kat.parse("xaxis M1 phi lin 0 10 10")
+IFO.kat.parse("x2axis M2 phi lin 0 10 10")
+_kat = IFO._sensing_kat(DOFs, 10)
+assert(not hasattr(_kat, "xaxis") and not hasattr(_kat, "x2axis"))
+_kat.parse("xaxis A_fsig f lin 1 10 3", exceptionOnReplace=True)
+
+data = IFO.sensing_matrix_f(DOFs, detectors, f)
+assert(data.shape == (2, 2, 7))
+assert(hasattr(IFO.kat, "xaxis") and hasattr(IFO.kat, "x2axis"))
+IFO.kat.xaxis.remove()
+IFO.kat.x2axis.remove()
+
+for args in ((["C"], detectors, 1), (DOFs, ["P"], 1), (DOFs, detectors, [1, -1])):
+    try:
+        IFO.sensing_matrix_f(*args)
+        assert(False)
+    except pykat.exceptions.BasePyKatException:
+        pass
+
+# chunks of the frequency axis can run at the same time
+f = np.linspace(10, 100, 10)
+
+del runs[:]
+sens = IFO.sensing_matrix_over_frequency(DOFs, detectors, f, split=3)
+assert(len(runs) == 4) # the split run and its three chunks
+assert(sens.shape == (2, 2, 10))
+assert(np.allclose(sens.frequencies, f))
+
+data = IFO.sensing_matrix_f(DOFs, ["P_M2"], [1, 5, 7], split=3)
+assert(np.allclose(data, IFO.sensing_matrix_f(DOFs, ["P_M2"], [1, 5, 7])))
+
+assert(np.allclose(sens["B"], sens.data[1]))
+assert(np.allclose(sens["A", "P_M2"], sens.data[0, 1]))
+assert(np.allclose(sens.tf("A", "P_M2"), sens.data[0, 1]))
+assert(sens.frequency_index(32) == 2)
+assert(np.allclose(sens.at(32).values, sens.data[:, :, 2]))
+assert(list(sens.at(32).index) == DOFs)
+
+ref = sens.phase_reference("A")
+assert(np.allclose(ref["A"].imag, 0))
+assert(np.allclose(abs(ref.data), abs(sens.data)))
+assert(np.allclose(ref.at(50).values, sens.at(50).phase_reference("A").values))
+
+# a failed run raises rather than giving no output
+IFO.kat.parse("FAIL")
+
+for split in (None, 3):
+    try:
+        IFO.sensing_matrix_f(DOFs, detectors, f, split=split)
+        assert(False)
+    except pykat.exceptions.FinesseRunError:
+        pass
+
+IFO.kat.removeLine("FAIL")
+
+try:
+    sens["C"]
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+pykat.finesse.kat.run = _run
+
+print("PASSED")
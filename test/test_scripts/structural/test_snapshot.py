@@ -0,0 +1,63 @@
+"""
+Test file to ensure kat.snapshot puts back what is changed in a kat object
+and that deep copies are independent of the original
+"""
+
+import pykat
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n1
+s s1 1 n1 n2
+m m1 0.5 0.5 0 n2 n3
+const phi0 10
+pd P n3
+xaxis l1 P lin 1 10 10
+""", preserveConstants=True)
+
+script = kat.generateKatScript()[1:]
+
+with kat.snapshot():
+    kat.m1.phi = 45
+    kat.s1.L = "$phi0"
+    kat.constants["phi0"].value = 20
+    kat.maxtem = 2
+    kat.noxaxis = True
+    kat.xaxis.limits = [2, 3]
+    kat.parse("pd Q n2", addToBlock="extra")
+    kat.parse("fsig sig1 m1 10 0")
+
+    assert(kat.s1.L.value == 20)
+    assert("Q" in kat.detectors)
+    kat.run()
+
+assert(kat.generateKatScript()[1:] == script)
+assert(kat.m1.phi == 0)
+assert(not kat.s1.L.isConstant)
+assert(kat.maxtem is None)
+assert(not kat.noxaxis)
+assert("Q" not in kat.detectors)
+assert("extra" not in kat.getBlocks())
+assert(len(kat.signals.targets) == 0)
+
+snap = kat.snapshot()
+kat.remove(kat.P)
+
+try:
+    snap.restore()
+    assert(False)
+except pykat.exceptions.BasePyKatException:
+    pass
+
+kat1 = kat.deepcopy()
+
+assert(kat1.nodes.n1.network is kat1.nodes)
+assert(kat1.m1.phi.owner is kat1.m1)
+
+kat1.m1.phi = 90
+
+assert(kat.m1.phi == 0)
+assert(kat1.generateKatScript()[1:] != kat.generateKatScript()[1:])
+
+print("PASSED")
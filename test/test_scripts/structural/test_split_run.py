@@ -0,0 +1,40 @@
+"""
+Test file to ensure a run split into chunks gives the same outputs as a serial run
+"""
+
+import pykat
+import numpy as np
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+
+kat.parse("""
+l l1 1 0 n1
+s s1 1 n1 n2
+m m1 0.9 0.1 0 n2 n3
+s s2 10 n3 n4
+m m2 0.9 0.1 0 n4 n5
+pd P n4
+ad A 0 n4
+xaxis m2 phi lin -180 180 101
+yaxis abs:deg
+""")
+
+out = kat.run()
+out_split = kat.run(split=4)
+
+assert(np.allclose(out.x, out_split.x))
+assert(np.allclose(out.y, out_split.y))
+assert(out.ylabels == out_split.ylabels)
+assert(out_split.chunks[0].start == 0)
+assert(out_split.chunks[-1].stop == len(out.x))
+
+kat.parse("x2axis m1 phi lin -10 10 4")
+
+out = kat.run()
+out_split = kat.run(split=3)
+
+assert(np.allclose(out.z, out_split.z))
+assert(np.allclose(out["A"], out_split["A"]))
+
+print("PASSED")
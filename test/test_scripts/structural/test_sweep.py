@@ -0,0 +1,44 @@
+"""
+Test file to ensure kat.sweep gives the same outputs as changing the
+parameters of copies of the kat object and running them directly
+"""
+
+import pykat
+import numpy as np
+
+kat = pykat.finesse.kat()
+kat.verbose = False
+kat.parse("""
+l l1 1 0 n1
+s s1 1 n1 n2
+m m1 0.5 0.5 0 n2 n3
+pd P n3
+xaxis l1 P lin 1 10 10
+""")
+
+script = kat.generateKatScript()[1:]
+
+phis = [0.0, 10.0, 20.0]
+Ls = [1.0, 2.0]
+
+grid = kat.sweep([("m1.phi", phis), (kat.s1.L, Ls)], max_workers=2)
+zipped = kat.sweep([("m1.phi", phis[:2]), ("s1.L", Ls)], mode="zip", max_workers=2)
+
+assert(kat.generateKatScript()[1:] == script)
+assert(grid.dims == ("m1.phi", "s1.L"))
+assert(grid["P"].shape == (3, 2, 11))
+assert(zipped["P"].shape == (2, 11))
+
+for i, phi in enumerate(phis):
+    for j, L in enumerate(Ls):
+        _kat = kat.deepcopy()
+        _kat.m1.phi = phi
+        _kat.s1.L = L
+        out = _kat.run()
+        
+        assert(np.allclose(out["P"], grid["P"][i, j]))
+        
+        if i == j:
+            assert(np.allclose(out["P"], zipped["P"][i]))
+
+print("PASSED")